@@ -0,0 +1,230 @@
+"""
+Latency and throughput benchmarks for the secret fetch path.
+
+Runs VaultSecretFetcher, the /fetch-secret and /fetch-secrets endpoints and
+VaultManagerClient, over HTTP and over the Unix socket, against a local
+FakeVault, and reports p50/p99 latency and requests per second for each
+scenario. Needs no network access:
+
+    python benchmarks/bench_fetch.py --latency 0.005 --requests 500
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_vault import FakeVault
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(
+    name: str, latencies: List[float], elapsed: float, items: int = 0
+) -> Dict[str, Any]:
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "items_per_s": items / elapsed if items and elapsed else None,
+    }
+
+
+def timed(func: Callable[[], Any], latencies: List[float]) -> None:
+    started = time.perf_counter()
+    func()
+    latencies.append(time.perf_counter() - started)
+
+
+def run_serial(
+    name: str, count: int, func: Callable[[int], Any], before: Callable[[], Any]
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for i in range(count):
+        before()
+        timed(lambda i=i: func(i), latencies)
+    return summarize(name, latencies, time.perf_counter() - started)
+
+
+def run_concurrent(
+    name: str, count: int, concurrency: int, func: Callable[[int], Any]
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def worker(i: int) -> None:
+        started = time.perf_counter()
+        func(i)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(count)))
+    return summarize(name, latencies, time.perf_counter() - started)
+
+
+def configure(vault_url: str) -> None:
+    """Point vaultutils at the fake Vault. Must run before vaultutils is imported."""
+    os.environ.update(
+        {
+            "VAULT_URL": vault_url,
+            "VAULT_AUTH_METHOD": "token",
+            "VAULT_TOKEN": "bench-token",
+            "VAULT_CACHE_MAXSIZE": "100000",
+            "VAULT_CACHE_SOFT_TTL": "3600",
+            "VAULT_CACHE_TTL": "3600",
+            "VAULT_TOKEN_BACKGROUND_RENEWAL": "false",
+            "NO_PROXY": "127.0.0.1,localhost",
+        }
+    )
+
+
+def run_socket(count: int) -> List[Dict[str, Any]]:
+    """Cache hits through the Unix socket transport, with each codec."""
+    from vaultutils.client import VaultManagerClient  # noqa: PLC0415
+    from vaultutils.socket_transport import SocketServer, bind_socket  # noqa: PLC0415
+
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="vaultutils-"), "bench.sock")
+    listener = bind_socket(socket_path)
+    SocketServer(listener).start()
+    results = []
+    for codec in ("json", "msgpack"):
+        try:
+            client = VaultManagerClient(socket_path=socket_path, codec=codec)
+        except RuntimeError:
+            continue  # msgpack is not installed
+        client.fetch_secret("bench/warm")
+        results.append(
+            run_serial(
+                f"socket-{codec}-warm",
+                count,
+                lambda _, client=client: client.fetch_secret("bench/warm"),
+                lambda: None,
+            )
+        )
+    listener.close()
+    os.unlink(socket_path)
+    return results
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--batch-sizes", default="1,10,40,100")
+    parser.add_argument("--json", dest="json_path", help="Also write results here.")
+    args = parser.parse_args(argv)
+
+    vault = FakeVault(
+        latency=args.latency, jitter=args.jitter, payload_size=args.payload_size
+    ).start()
+    configure(vault.url)
+
+    from werkzeug.serving import make_server  # noqa: PLC0415
+
+    from vaultutils.client import VaultManagerClient  # noqa: PLC0415
+    from vaultutils.secret_fetcher import VaultSecretFetcher  # noqa: PLC0415
+    from vaultutils.server import app  # noqa: PLC0415
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    sidecar = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=sidecar.serve_forever, daemon=True).start()
+
+    fetcher = VaultSecretFetcher()
+    client = VaultManagerClient(host="127.0.0.1", port=sidecar.port)
+    count = args.requests
+    results = []
+
+    def clear() -> None:
+        fetcher.cache.clear()
+
+    def noop() -> None:
+        pass
+
+    fetcher.fetch_secret("bench/warm")
+    results.append(
+        run_serial(
+            "fetcher-cold", count, lambda i: fetcher.fetch_secret(f"bench/{i}"), clear
+        )
+    )
+    results.append(
+        run_serial(
+            "fetcher-warm", count, lambda _: fetcher.fetch_secret("bench/warm"), noop
+        )
+    )
+    fetcher.fetch_secret("bench/warm")
+    results.append(
+        run_serial(
+            "sidecar-cold", count, lambda i: client.fetch_secret(f"bench/{i}"), clear
+        )
+    )
+    client.fetch_secret("bench/warm")
+    results.append(
+        run_serial(
+            "sidecar-warm", count, lambda _: client.fetch_secret("bench/warm"), noop
+        )
+    )
+    results.extend(run_socket(count))
+
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        clear()
+        results.append(
+            run_concurrent(
+                f"sidecar-concurrency-{concurrency}",
+                count,
+                concurrency,
+                # 100 hot paths: a mix of coalesced misses and hits
+                lambda i: client.fetch_secret(f"bench/{i % 100}"),
+            )
+        )
+
+    for size in (int(s) for s in args.batch_sizes.split(",")):
+        iterations = max(1, count // size)
+        paths = [f"bench/{i}" for i in range(size)]
+        result = run_serial(
+            f"sidecar-batch-{size}",
+            iterations,
+            lambda _, paths=paths: client.fetch_secrets(paths),
+            clear,
+        )
+        elapsed = result["requests"] / result["rps"] if result["rps"] else 0.0
+        result["items_per_s"] = size * iterations / elapsed if elapsed else None
+        results.append(result)
+
+    sidecar.shutdown()
+    vault.stop()
+
+    print(f"{'scenario':<28}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for result in results:
+        print(
+            f"{result['scenario']:<28}{result['requests']:>6}"
+            f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['rps']:>10.1f}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w") as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
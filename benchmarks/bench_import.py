@@ -0,0 +1,105 @@
+"""
+Start-up cost of the vaultutils entry points.
+
+Each scenario runs in a fresh interpreter, so the numbers include everything
+a shell script calling the CLI in a loop pays per invocation:
+
+    python benchmarks/bench_import.py --runs 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+SCENARIOS = {
+    "python": "pass",
+    "import-cli": "import vaultutils.cli",
+    "cli-help": (
+        "import sys; from vaultutils.cli import cli; sys.argv = ['vaultutils', '--help']\n"
+        "try:\n    cli()\nexcept SystemExit:\n    pass"
+    ),
+    "import-client": "import vaultutils.client",
+    "import-server": "import vaultutils.server",
+    "server-app": "import vaultutils.server as server; server.get_app()",
+}
+
+
+def run(code: str, runs: int) -> List[float]:
+    env = {**os.environ, "PYTHONPATH": SRC, "PYTHONDONTWRITEBYTECODE": ""}
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code], env=env, check=True, stdout=subprocess.DEVNULL
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def slowest_imports(code: str, limit: int) -> List[Dict[str, Any]]:
+    """Return the top-level imports with the highest cumulative time."""
+    env = {**os.environ, "PYTHONPATH": SRC}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        ms = int(cumulative) / 1000
+        # Only direct imports of the snippet, not their dependencies or the
+        # interpreter's own start-up modules
+        if not name.startswith("  ") and name.strip() != "site" and ms >= 1:
+            modules.append({"module": name.strip(), "ms": ms})
+    return sorted(modules, key=lambda m: m["ms"], reverse=True)[:limit]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", help="Also write results here.")
+    args = parser.parse_args(argv)
+
+    # Warm the bytecode cache so the first run is not an outlier
+    run(SCENARIOS["server-app"], 1)
+
+    results = []
+    for name, code in SCENARIOS.items():
+        timings = run(code, args.runs)
+        results.append(
+            {
+                "scenario": name,
+                "median_ms": statistics.median(timings) * 1000,
+                "min_ms": min(timings) * 1000,
+                "slowest_imports": slowest_imports(code, args.top),
+            }
+        )
+
+    print(f"{'scenario':<16}{'median ms':>12}{'min ms':>10}  slowest imports")
+    for result in results:
+        imports = ", ".join(
+            f"{m['module']} {m['ms']:.0f}ms" for m in result["slowest_imports"]
+        )
+        print(
+            f"{result['scenario']:<16}{result['median_ms']:>12.1f}"
+            f"{result['min_ms']:>10.1f}  {imports}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w") as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
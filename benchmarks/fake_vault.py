@@ -0,0 +1,143 @@
+"""
+A local stand-in for the parts of the Vault HTTP API that vaultutils uses.
+
+It serves KV v2 reads for any path, token lookup and renewal, and can add a
+fixed or jittered latency to every request. It listens on 127.0.0.1 only and
+needs no network access.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+class FakeVault:
+    """
+    A threaded fake Vault server.
+
+    Args:
+        latency (float): Seconds added to every request.
+        jitter (float): Extra random latency of up to this many seconds.
+        payload_size (int): Approximate size in bytes of every secret.
+        token_ttl (int): TTL reported for the token.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        payload_size: int = 256,
+        token_ttl: int = 3600,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.payload_size = payload_size
+        self.token_ttl = token_ttl
+        self.requests: Counter = Counter()
+        self.versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            err_msg: str = "FakeVault is not running"
+            raise RuntimeError(err_msg)
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeVault":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-vault", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeVault":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def bump_version(self, path: str) -> None:
+        """Simulate a write: the next read of path returns a new version."""
+        with self._lock:
+            self.versions[path] = self.versions.get(path, 1) + 1
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests.clear()
+
+    def _respond(self, method: str, path: str) -> Any:
+        with self._lock:
+            self.requests[(method, path)] += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if path == "/v1/auth/token/lookup-self":
+            return {"data": {"ttl": self.token_ttl, "renewable": True}}
+        if path == "/v1/auth/token/renew-self":
+            return {"auth": {"lease_duration": self.token_ttl, "renewable": True}}
+        if path == "/v1/sys/health":
+            return {"initialized": True, "sealed": False}
+
+        parts = path.split("/", 4)  # "", "v1", mount, "data"|"metadata", secret
+        if len(parts) == 5 and parts[3] in ("data", "metadata"):
+            secret_path = parts[4]
+            version = self.versions.get(secret_path, 1)
+            metadata = {"version": version, "created_time": "", "destroyed": False}
+            if parts[3] == "metadata":
+                return {"data": {"current_version": version, "versions": {}}}
+            return {
+                "data": {
+                    "data": {
+                        "path": secret_path,
+                        "value": "x" * self.payload_size,
+                    },
+                    "metadata": metadata,
+                }
+            }
+        return None
+
+    def _handler(self) -> type:
+        vault = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; avoid delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                payload = vault._respond(self.command, self.path.split("?")[0])
+                status = HTTPStatus.OK if payload is not None else HTTPStatus.NOT_FOUND
+                body = json.dumps(payload if payload is not None else {"errors": []})
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            do_GET = do_POST = do_PUT = do_LIST = _handle  # noqa: N815
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                pass
+
+        return Handler
@@ -0,0 +1,158 @@
+"""
+ASGI entry point for the Vault Manager server.
+
+Serves the same endpoints as the Flask app, backed by AsyncVaultSecretFetcher
+so that many Vault reads share one event loop. Run it with any ASGI server,
+e.g. ``uvicorn vaultutils.asgi:app``, or with ``vaultutils start --asgi``.
+"""
+
+import asyncio
+import json
+import logging
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from vaultutils.async_secret_fetcher import AsyncVaultSecretFetcher
+from vaultutils.config import Config
+from vaultutils.prefetch import get_prefetch_paths, use_manifest
+from vaultutils.resilience import error_status
+from vaultutils.secret_fetcher import fetch_request_error
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_fetcher: Optional[AsyncVaultSecretFetcher] = None
+_warm_up_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_fetcher() -> AsyncVaultSecretFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = AsyncVaultSecretFetcher()
+    return _fetcher
+
+
+async def _read_json(receive: Receive) -> Any:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return json.loads(body) if body else {}
+
+
+async def _send_json(send: Send, payload: Any, status: int = HTTPStatus.OK) -> None:
+    body = json.dumps(payload).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": int(status),
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def authenticate(_payload: Any) -> Tuple[Any, int]:
+    try:
+        token = await get_fetcher().ensure_token()
+    except Exception as e:
+        return {"error": str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
+    return {"token": str(token)}, HTTPStatus.OK
+
+
+async def fetch_secret(payload: Any) -> Tuple[Any, int]:
+    err_msg = fetch_request_error(payload)
+    if err_msg:
+        return {"error": err_msg}, HTTPStatus.BAD_REQUEST
+    secret = await get_fetcher().fetch_secret(
+        payload["path"], payload.get("key"), payload.get("version")
+    )
+    return {"secret": secret}, HTTPStatus.OK
+
+
+async def fetch_secrets(payload: Any) -> Tuple[Any, int]:
+    paths = payload.get("paths")
+    if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+        return {"error": "'paths' must be a list of strings"}, HTTPStatus.BAD_REQUEST
+    secrets, errors = await get_fetcher().fetch_secrets(paths)
+    return {"secrets": secrets, "errors": errors}, HTTPStatus.OK
+
+
+async def cache_stats(_payload: Any) -> Tuple[Any, int]:
+    return get_fetcher().cache_info(), HTTPStatus.OK
+
+
+async def ready(_payload: Any) -> Tuple[Any, int]:
+    status = get_fetcher().warm_up_status
+    return status.as_dict(), (
+        HTTPStatus.OK if status.ready else HTTPStatus.SERVICE_UNAVAILABLE
+    )
+
+
+ROUTES: Dict[Tuple[str, str], Callable[[Any], Awaitable[Tuple[Any, int]]]] = {
+    ("POST", "/authenticate"): authenticate,
+    ("POST", "/fetch-secret"): fetch_secret,
+    ("POST", "/fetch-secrets"): fetch_secrets,
+    ("GET", "/cache-stats"): cache_stats,
+    ("GET", "/ready"): ready,
+}
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                _start_warm_up()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if _fetcher is not None:
+                    await _fetcher.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        await _send_json(send, {"error": "Not found"}, HTTPStatus.NOT_FOUND)
+        return
+
+    try:
+        payload = await _read_json(receive)
+        result, status = await handler(payload)
+    except Exception as e:
+        # Same statuses as the Flask app: 404, 403, 503 and so on
+        status = error_status(e)
+        if status == HTTPStatus.INTERNAL_SERVER_ERROR:
+            logging.exception(f"Unhandled error on {scope['path']}")
+        else:
+            logging.info(f"Error handling {scope['path']}: {e}")
+        result = {"error": str(e)}
+    await _send_json(send, result, status)
+
+
+def _start_warm_up() -> None:
+    global _warm_up_task
+    paths = get_prefetch_paths()
+    if paths:
+        _warm_up_task = asyncio.ensure_future(get_fetcher().warm_up(paths))
+
+
+def start_asgi_server(prefetch: Optional[str] = None) -> None:
+    try:
+        import uvicorn  # type: ignore  # noqa: PLC0415
+    except ModuleNotFoundError as exc:
+        msg = "uvicorn is required to serve the ASGI app: pip install vaultutils[async]"
+        raise RuntimeError(msg) from exc
+
+    if prefetch:
+        use_manifest(prefetch)
+    uvicorn.run(app, host=Config.VAULT_SERVER_HOST, port=Config.VAULT_SERVER_PORT)
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+from typing import Any, List, Optional
+
+from vaultutils.config import Config
+
+try:
+    import httpx
+except ModuleNotFoundError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+
+class AsyncVaultManagerClient:
+    """
+    An asyncio counterpart of VaultManagerClient built on httpx.
+
+    Use it as an async context manager, or call aclose() when done, so the
+    pooled keep-alive connections to the server are released.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8001,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if httpx is None:
+            msg = "httpx is required for the asyncio client: pip install vaultutils[async]"
+            raise RuntimeError(msg)
+
+        self.base_url = f"http://{host}:{port}"
+        pool_size = Config.VAULT_CLIENT_POOL_SIZE if pool_size is None else pool_size
+        self.session = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=Config.VAULT_CLIENT_TIMEOUT if timeout is None else timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+
+    async def __aenter__(self) -> "AsyncVaultManagerClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    async def authenticate(self) -> str:
+        """Authenticate with Vault using environment variables."""
+        response = await self.session.post("/authenticate")
+        if response.status_code == HTTPStatus.OK:
+            return response.json()["token"]
+        else:
+            err_msg: str = (
+                f"Error during authentication: {response.status_code} - {response.text}"
+            )
+            raise Exception(err_msg)
+
+    async def fetch_secret(
+        self, path: str, key: Optional[str] = None, version: Optional[int] = None
+    ) -> dict[str, Any]:
+        """Fetch a secret from Vault, optionally a specific KV v2 version."""
+        payload: dict[str, Any] = {"path": path, "key": key}
+        if version is not None:
+            payload["version"] = version
+        response = await self.session.post("/fetch-secret", json=payload)
+        return response.json()
+
+    async def fetch_secrets(self, paths: List[str]) -> dict[str, Any]:
+        """Fetch several secrets from Vault in one request."""
+        response = await self.session.post("/fetch-secrets", json={"paths": paths})
+        return response.json()
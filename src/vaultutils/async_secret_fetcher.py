@@ -0,0 +1,387 @@
+import asyncio
+import logging
+import math
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from hvac import exceptions, utils  # type: ignore
+
+from vaultutils import auth, metrics
+from vaultutils.cache import CacheEntry, SecretCache
+from vaultutils.config import Config
+from vaultutils.engines import ENGINES, MountSpec, parse_mounts
+from vaultutils.prefetch import WarmUpStatus
+from vaultutils.secret_fetcher import select_key
+from vaultutils.utils import create_vault_client
+
+try:
+    import httpx
+except ModuleNotFoundError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+
+class AsyncVaultSecretFetcher:
+    """
+    An asyncio variant of VaultSecretFetcher.
+
+    Secrets are read from the KV v2 HTTP API with httpx, so many reads can be
+    in flight on one event loop. The cache behaves like the synchronous
+    fetcher: lock-free hits, one Vault read per path for concurrent misses,
+    and stale entries served while a background task refreshes them.
+
+    Paths are routed to the KV mounts in VAULT_MOUNTS like the synchronous
+    fetcher does, and read in their mount's namespace with that namespace's
+    token. Dynamic engines are not supported, as their leases are tracked
+    and renewed by the synchronous fetcher only.
+
+    An instance must only be used from a single event loop.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the AsyncVaultSecretFetcher.
+
+        Raises:
+            RuntimeError: If httpx is not installed.
+            ValueError: If VAULT_MOUNTS names a mount that is not a KV mount.
+        """
+        if httpx is None:
+            msg = "httpx is required for the asyncio fetcher: pip install vaultutils[async]"
+            raise RuntimeError(msg)
+
+        self.url = Config.VAULT_URL.rstrip("/")
+        self.mount_point = Config.VAULT_MOUNT_POINT
+        self.soft_ttl = Config.VAULT_CACHE_SOFT_TTL
+        self.cache = SecretCache.from_config()
+        self.versions = SecretCache(
+            policy="lru", maxsize=Config.VAULT_CACHE_MAXSIZE, ttl=math.inf
+        )
+        self.mounts: Dict[str, MountSpec] = {}
+        self.default_mount = self._build_mounts(parse_mounts(Config.VAULT_MOUNTS))
+        # Only used to log in; reads go through the async HTTP client
+        self.auth_client = create_vault_client(namespace=Config.VAULT_NAMESPACE)
+        self._auth_clients: Dict[Optional[str], Any] = {
+            Config.VAULT_NAMESPACE: self.auth_client
+        }
+        self._http: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future[CacheEntry]] = {}
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.warm_up_status = WarmUpStatus()
+
+    async def fetch_secret(
+        self, path: str, key: Optional[str] = None, version: Optional[int] = None
+    ) -> Any:
+        """
+        Fetch a secret from Vault.
+
+        Args:
+            path (str): The path of the secret.
+            key (Optional[str]): The specific key within the secret.
+            version (Optional[int]): A KV v2 version to read instead of the
+                latest one; such reads are cached without expiry.
+
+        Returns:
+            Any: The secret value.
+
+        Raises:
+            KeyError: If the key is not found in the secret.
+        """
+        if version is not None:
+            pinned = await self._get_version(path, version)
+            return select_key(path, pinned.value, key)
+
+        entry = self._get_cached(path)
+        if entry is None:
+            entry = await self._single_flight(path, lambda: self._load_secret(path))
+
+        return select_key(path, entry.value, key)
+
+    async def fetch_secrets(
+        self, paths: Iterable[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Fetch several secrets at once.
+
+        Args:
+            paths (Iterable[str]): The paths of the secrets.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, str]]: The secrets by path, and an
+            error message for every path that could not be fetched.
+        """
+        secrets: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        unique = list(dict.fromkeys(paths))
+        results = await asyncio.gather(
+            *(self.fetch_secret(path) for path in unique), return_exceptions=True
+        )
+        for path, result in zip(unique, results):
+            if isinstance(result, Exception):
+                errors[path] = str(result)
+            else:
+                secrets[path] = result
+        return secrets, errors
+
+    async def warm_up(self, paths: Iterable[str]) -> None:
+        """
+        Load secrets into the cache once logging in to Vault succeeds.
+
+        Progress is reported by warm_up_status; only the first call has any
+        effect.
+
+        Args:
+            paths (Iterable[str]): The paths of the secrets.
+        """
+        paths = list(dict.fromkeys(paths))
+        if not paths or not self.warm_up_status.begin(len(paths)):
+            return
+
+        backoff = 1.0
+        while True:
+            try:
+                await self.ensure_token()
+                break
+            except Exception as e:
+                logging.warning(f"Warm-up is waiting for a Vault login: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+        secrets, errors = await self.fetch_secrets(paths)
+        self.warm_up_status.finish(len(secrets), errors)
+        logging.info(f"Warm-up loaded {len(secrets)} of {len(paths)} secrets")
+
+    def cache_info(self) -> Dict[str, Any]:
+        """
+        Return cache occupancy and hit/miss/eviction counters.
+
+        Returns:
+            Dict[str, Any]: The cache statistics.
+        """
+        return self.cache.info()
+
+    async def aclose(self) -> None:
+        """
+        Cancel background refreshes and close the HTTP connection pool.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _get_cached(self, path: str) -> Optional[CacheEntry]:
+        entry = self.cache.get(path)
+        if entry is not None and time.monotonic() - entry.fetched_at >= self.soft_ttl:
+            self._schedule_refresh(path)
+        return entry
+
+    async def _single_flight(
+        self, path: str, factory: Callable[[], Awaitable[CacheEntry]]
+    ) -> CacheEntry:
+        future = self._inflight.get(path)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        # Shielded so a cancelled caller does not cancel the shared read
+        return await asyncio.shield(future)
+
+    async def _get_version(self, path: str, version: int) -> CacheEntry:
+        cache_key = f"{path}?version={version}"
+        entry = self.versions.get(cache_key)
+        if entry is not None:
+            return entry
+
+        async def load() -> CacheEntry:
+            value = await self._read_with_auth(path, version)
+            entry = CacheEntry(value, time.monotonic(), version=version)
+            self.versions.set(cache_key, entry)
+            return entry
+
+        return await self._single_flight(cache_key, load)
+
+    async def _load_secret(self, path: str) -> CacheEntry:
+        entry = self.cache.peek(path)
+        if entry is not None:
+            return entry
+        return await self._refresh_secret(path)
+
+    async def _refresh_secret(self, path: str) -> CacheEntry:
+        started = time.monotonic()
+        value = await self._read_with_auth(path)
+        fetched_at = time.monotonic()
+        self.cache.stats.record_refresh(fetched_at - started)
+        entry = CacheEntry(value, fetched_at)
+        self.cache.set(path, entry)
+        return entry
+
+    def _schedule_refresh(self, path: str) -> None:
+        if path in self._refreshing:
+            return
+        self._refreshing.add(path)
+        task = asyncio.ensure_future(self._background_refresh(path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _background_refresh(self, path: str) -> None:
+        try:
+            await self._single_flight(path, lambda: self._refresh_secret(path))
+        except Exception as e:
+            logging.warning(f"Background refresh of {path} failed: {e}")
+        finally:
+            self._refreshing.discard(path)
+
+    async def ensure_token(self, namespace: Optional[str] = None) -> str:
+        """
+        Return a valid Vault token, logging in only if it is not fresh.
+
+        Args:
+            namespace (Optional[str]): The namespace the token is for,
+                VAULT_NAMESPACE by default.
+
+        Returns:
+            str: The Vault token.
+        """
+        namespace = namespace or Config.VAULT_NAMESPACE
+        manager = auth.get_token_manager(namespace)
+        token = manager.token
+        if token and manager.is_fresh():
+            return token
+        client = self._auth_clients.get(namespace)
+        if client is None:
+            client = self._auth_clients[namespace] = create_vault_client(
+                namespace=namespace
+            )
+        # Logging in is rare and may involve a browser flow: keep it off the loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, auth.login_vault, client)
+        return client.token
+
+    def _build_mounts(self, specs: List[MountSpec]) -> MountSpec:
+        """
+        Resolve the routed mounts and return the default one.
+
+        Args:
+            specs (List[MountSpec]): The mounts from VAULT_MOUNTS.
+
+        Returns:
+            MountSpec: The mount for paths that name no other mount, with
+            every mount's engine and namespace resolved.
+
+        Raises:
+            ValueError: If a mount is not a KV mount.
+        """
+        default = MountSpec(self.mount_point, namespace=Config.VAULT_NAMESPACE)
+        for spec in specs:
+            engine = ENGINES[spec.engine].name
+            if engine not in ("kv1", "kv2"):
+                err_msg: str = (
+                    f"Mount {spec.name} ({spec.engine}) is not supported by the "
+                    "asyncio fetcher, which only reads kv1 and kv2 mounts"
+                )
+                raise ValueError(err_msg)
+            mount = MountSpec(
+                spec.name, engine, spec.namespace or Config.VAULT_NAMESPACE
+            )
+            self.mounts[spec.name] = mount
+            if spec.name == self.mount_point:
+                default = mount
+        return default
+
+    def _route(self, path: str) -> Tuple[MountSpec, str]:
+        name, sep, relative = path.partition("/")
+        mount = self.mounts.get(name) if sep else None
+        if mount is None:
+            return self.default_mount, path
+        return mount, relative
+
+    async def _read_with_auth(self, path: str, version: Optional[int] = None) -> dict:
+        mount, relative = self._route(path)
+        token = await self.ensure_token(mount.namespace)
+        try:
+            return await self._fetch_secret_from_vault(mount, relative, token, version)
+        except exceptions.Forbidden:
+            auth.invalidate_token(token)
+            token = await self.ensure_token(mount.namespace)
+            return await self._fetch_secret_from_vault(mount, relative, token, version)
+
+    async def _fetch_secret_from_vault(
+        self,
+        mount: MountSpec,
+        path: str,
+        token: str,
+        version: Optional[int] = None,
+    ) -> dict:
+        """
+        Fetch a secret from the KV HTTP API directly.
+
+        Args:
+            mount (MountSpec): The mount the secret is read from.
+            path (str): The path of the secret below the mount.
+            token (str): A Vault token for the mount's namespace.
+            version (Optional[int]): The KV v2 version, the latest by default.
+
+        Returns:
+            dict: The secret data.
+
+        Raises:
+            ValueError: If a version is requested from a KV v1 mount.
+        """
+        path = path.lstrip("/")
+        if mount.engine == "kv1" and version is not None:
+            err_msg: str = f"Mount {mount.name} (kv1) has no versions"
+            raise ValueError(err_msg)
+        url = (
+            f"/v1/{mount.name}/{path}"
+            if mount.engine == "kv1"
+            else f"/v1/{mount.name}/data/{path}"
+        )
+        headers = {"X-Vault-Token": token}
+        if mount.namespace:
+            headers["X-Vault-Namespace"] = mount.namespace
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(Config.VAULT_BATCH_CONCURRENCY)
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await self._get_http().get(
+                url,
+                headers=headers,
+                params={"version": version} if version is not None else None,
+            )
+            metrics.VAULT_REQUEST_SECONDS.observe(time.perf_counter() - started, "read")
+
+        if response.status_code == httpx.codes.FORBIDDEN:
+            raise exceptions.Forbidden(response.text)
+        if response.status_code == httpx.codes.NOT_FOUND:
+            err_msg = f"Secret not found at {mount.name}/{path}"
+            raise exceptions.InvalidPath(err_msg)
+        if response.is_error:
+            # The exception hvac raises for the status, e.g. VaultDown for 503
+            utils.raise_for_error("get", url, response.status_code, text=response.text)
+        data = response.json()["data"]
+        return data if mount.engine == "kv1" else data["data"]
+
+    def _get_http(self) -> "httpx.AsyncClient":
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.url,
+                timeout=Config.VAULT_HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=Config.VAULT_HTTP_POOL_SIZE,
+                    max_keepalive_connections=Config.VAULT_HTTP_POOL_SIZE,
+                ),
+            )
+        return self._http
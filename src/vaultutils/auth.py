@@ -1,55 +1,289 @@
 import logging
+import os
 import time
-import urllib.parse
 import webbrowser
-from http import HTTPStatus
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from threading import Thread
-from typing import Any, List, Optional
+from threading import Event, Thread
+from typing import Any, Dict, Optional, Tuple
 
 from hvac import Client, exceptions  # type: ignore
 
+from vaultutils import metrics, oidc
 from vaultutils.config import Config
-from vaultutils.utils import _extract_auth_url_params, _get_oidc_client_token
-
-SELF_CLOSING_PAGE = """
-<!doctype html>
-<html>
-<head>
-<script>
-// Closes IE, Edge, Chrome, Brave
-window.onload = function load() {
-  window.open("", "_self", "");
-  window.close();
-};
-</script>
-</head>
-<body>
-  <p>Authentication successful, you can close the browser now.</p>
-  <script>
-    // Needed for Firefox security
-    setTimeout(function() {
-          window.close()
-    }, 5000);
-  </script>
-</body>
-</html>
-"""
-
-# Global variable to store the token
-global_token: Optional[str] = None
+from vaultutils.disk_cache import get_disk_cache
+from vaultutils.utils import (
+    _extract_auth_url_params,
+    _get_oidc_client_token,
+    create_vault_client,
+)
+
+# Serialises logins so concurrent cache misses never start parallel auth flows
+_login_lock = metrics.TimedLock("login")
+
+# Shortest time between storing a token and renewing it in the background
+MIN_RENEWAL_INTERVAL = 1.0
 
 logging.basicConfig(format="%(asctime)s - %(message)s", datefmt="%d-%b-%y %H:%M:%S")
 
 
+class TokenManager:
+    """
+    Holds the current Vault token together with the time it expires.
+
+    While the token is known to be valid for longer than the refresh margin,
+    callers can use it without asking Vault. Only when the expiry is unknown
+    or close does login_vault look the token up, renew it or log in again.
+
+    Tokens belong to the namespace they were issued in, so there is one
+    manager per namespace, see get_token_manager.
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = Config.VAULT_TOKEN_REFRESH_MARGIN,
+        namespace: Optional[str] = None,
+    ):
+        self.namespace = namespace
+        self.token: Optional[str] = None
+        self.expires_at: Optional[float] = None
+        self.issued_at: Optional[float] = None
+        self.renewable = False
+        self.refresh_margin = refresh_margin
+
+    def store(
+        self, token: str, ttl: Optional[float] = None, *, renewable: bool = False
+    ) -> None:
+        """
+        Remember a token and, if known, how many seconds it stays valid.
+
+        A TTL of 0 means the token never expires (e.g. root tokens).
+        """
+        now = time.monotonic()
+        if ttl is None:
+            expires_at = None
+        elif ttl <= 0:
+            expires_at = float("inf")
+        else:
+            expires_at = now + ttl
+        # Publish the expiry before the token so lock-free readers never pair
+        # a new token with a stale expiry.
+        self.expires_at = None
+        self.issued_at = now
+        self.renewable = renewable
+        self.token = token
+        self.expires_at = expires_at
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """
+        Forget the current token, or only the given one if it is still current.
+        """
+        if token is None or token == self.token:
+            self.expires_at = None
+            self.token = None
+
+    def is_fresh(self) -> bool:
+        """
+        Return True if the token is valid for longer than the refresh margin.
+        """
+        expires_at = self.expires_at
+        return (
+            self.token is not None
+            and expires_at is not None
+            and time.monotonic() < expires_at - self.refresh_margin
+        )
+
+    def renewal_delay(self, fraction: float) -> Optional[float]:
+        """
+        Return the seconds until the token should be renewed, or None if
+        there is nothing to schedule (no token, unknown or infinite TTL).
+
+        Renewal is due once the given fraction of the TTL has elapsed, and
+        early enough that the token never stops being fresh. For TTLs too
+        short to leave two refresh margins, it is never due before half that
+        fraction, nor within MIN_RENEWAL_INTERVAL of the token being stored,
+        so a renewal never schedules the next one immediately.
+        """
+        expires_at, issued_at = self.expires_at, self.issued_at
+        if self.token is None or expires_at is None or issued_at is None:
+            return None
+        if expires_at == float("inf"):
+            return None
+        ttl = expires_at - issued_at
+        due = min(issued_at + ttl * fraction, expires_at - 2 * self.refresh_margin)
+        due = max(due, issued_at + max(ttl * fraction / 2, MIN_RENEWAL_INTERVAL))
+        return max(0.0, due - time.monotonic())
+
+
+class TokenRenewer:
+    """
+    Background thread that renews the stored token at a fraction of its TTL.
+
+    Once Vault stops extending the token (it is not renewable or has reached
+    its max TTL) the renewer logs in again ahead of expiry, so request
+    threads keep finding a fresh token and never wait on authentication.
+    """
+
+    def __init__(
+        self,
+        manager: TokenManager,
+        url: str,
+        fraction: float = Config.VAULT_TOKEN_RENEW_FRACTION,
+    ) -> None:
+        self.manager = manager
+        self.fraction = fraction
+        self.client = create_vault_client(url, namespace=manager.namespace)
+        self._wakeup = Event()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            name = "vaultutils-token-renewer"
+            if self.manager.namespace:
+                name += f"-{self.manager.namespace}"
+            self._thread = Thread(target=self._run, name=name, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def notify(self) -> None:
+        """
+        Recompute the schedule, e.g. after a new token was stored.
+        """
+        self._wakeup.set()
+
+    def renew(self) -> None:
+        """
+        Renew the stored token, or log in again if it cannot be extended.
+        """
+        with _login_lock:
+            token = self.manager.token
+            if token is None:
+                return
+            self.client.token = token
+
+            if self.manager.renewable:
+                try:
+                    auth_data = self.client.auth.token.renew_self()["auth"]
+                    ttl = auth_data["lease_duration"]
+                    if ttl > self.manager.refresh_margin:
+                        self.manager.store(
+                            token, ttl, renewable=auth_data.get("renewable", False)
+                        )
+                        metrics.AUTH_RENEWALS.inc()
+                        _save_token(self.manager)
+                        logging.info("Renewed Vault token in the background.")
+                        return
+                except exceptions.VaultError as e:
+                    logging.info(f"Token renewal failed, logging in again: {e}")
+
+            ttl, renewable = _authenticate(self.client)
+            if ttl is None:
+                ttl, renewable = _lookup_token(self.client)
+            self.manager.store(self.client.token, ttl, renewable=renewable)
+            _save_token(self.manager)
+            logging.info("Logged in to Vault again ahead of token expiry.")
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            delay = self.manager.renewal_delay(self.fraction)
+            if delay is None or delay > 0:
+                self._wakeup.wait(timeout=delay)
+                self._wakeup.clear()
+                continue
+
+            try:
+                self.renew()
+                backoff = 1.0
+            except Exception as e:
+                logging.warning(f"Background token renewal failed: {e}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+
+# The token of the login namespace, VAULT_NAMESPACE; the only one saved to
+# the disk cache
+token_manager = TokenManager(namespace=Config.VAULT_NAMESPACE)
+# Tokens of the other namespaces mounts are read from
+token_managers: Dict[Optional[str], TokenManager] = {}
+token_renewers: Dict[Optional[str], TokenRenewer] = {}
+
+
+def get_token_manager(namespace: Optional[str] = None) -> TokenManager:
+    """
+    Return the manager of the token used in a namespace.
+
+    A token is only valid in the namespace it was issued in (and below), so
+    each namespace logs in, renews and stores its token separately.
+
+    Args:
+        namespace (Optional[str]): The Vault Enterprise namespace, or None
+            for the root namespace.
+
+    Returns:
+        TokenManager: The manager of that namespace.
+    """
+    if namespace == token_manager.namespace:
+        return token_manager
+    manager = token_managers.get(namespace)
+    if manager is None:
+        manager = token_managers.setdefault(
+            namespace, TokenManager(namespace=namespace)
+        )
+    return manager
+
+
+def client_namespace(client: Any) -> Optional[str]:
+    """
+    Return the namespace an hvac client sends its requests to.
+    """
+    namespace = getattr(getattr(client, "adapter", None), "namespace", None)
+    return namespace if isinstance(namespace, str) else None
+
+
 def get_stored_token() -> Optional[str]:
-    global global_token
-    return global_token
+    return token_manager.token
 
 
 def store_token(token: str) -> None:
-    global global_token
-    global_token = token
+    token_manager.store(token)
+
+
+def start_token_renewer(url: str, manager: Optional[TokenManager] = None) -> None:
+    """
+    Start the background renewer of a namespace's token, by default the
+    login namespace's, if it is enabled and not running.
+    """
+    if not Config.VAULT_TOKEN_BACKGROUND_RENEWAL:
+        return
+    manager = manager or token_manager
+    renewer = token_renewers.get(manager.namespace)
+    if renewer is None:
+        renewer = token_renewers.setdefault(
+            manager.namespace, TokenRenewer(manager, url)
+        )
+    renewer.start()
+    renewer.notify()
+
+
+def stop_token_renewer() -> None:
+    for renewer in list(token_renewers.values()):
+        renewer.stop()
+
+
+def _after_fork_in_child() -> None:
+    # The tokens stay valid in the child, but the renewer threads and their
+    # connections belong to the parent.
+    global _login_lock
+    _login_lock = metrics.TimedLock("login")
+    token_renewers.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 def validate_token(client: Client, token: str) -> bool:
@@ -58,6 +292,16 @@ def validate_token(client: Client, token: str) -> bool:
 
 
 def get_oidc_token(client: Client, oidc_callback_port: int = 8250) -> str:
+    """
+    Log in through the browser and return the Vault token.
+
+    The callback listener on oidc_callback_port is shared with concurrent
+    logins and closed once none is waiting; the headless browser, with
+    VAULT_OIDC_HEADLESS, is kept for later logins.
+
+    Raises:
+        TimeoutError: If the login is not completed within VAULT_OIDC_TIMEOUT.
+    """
     host = Config.VAULT_SERVER_HOST
     oidc_redirect_uri = f"http://{host}:{oidc_callback_port}/oidc/callback"
 
@@ -78,83 +322,121 @@ def get_oidc_token(client: Client, oidc_callback_port: int = 8250) -> str:
 
     auth_url_nonce, auth_url_state = _extract_auth_url_params(auth_url)
 
-    trusted_uris = Config.NETWORK_NEGOTIATE_AUTH_TRUSTED_URIS
-    delegation_uris = Config.NETWORK_NEGOTIATE_AUTH_DELEGATION_URIS
-
-    token_holder: List[Any] = []
-
-    server_thread = Thread(
-        target=lambda: _start_local_http_server(oidc_callback_port, token_holder)
-    )
-    server_thread.start()
-
-    if Config.VAULT_OIDC_HEADLESS:
-        time.sleep(3)
-        try:
-            from playwright.sync_api import (  # type: ignore  # noqa: PLC0415
-                sync_playwright,
-            )
-        except ModuleNotFoundError as exc:
-            msg = "Playwright is required for headless OIDC authentication"
-            raise RuntimeError(msg) from exc
-
-        with sync_playwright() as playwright:
-            browser = playwright.firefox.launch(
-                headless=True,
-                firefox_user_prefs={
-                    "network.negotiate-auth.trusted-uris": trusted_uris,
-                    "network.negotiate-auth.delegation-uris": delegation_uris,
-                },
-            )
-            page = browser.new_page()
-            page.goto(auth_url)
-            browser.close()
-    else:
-        webbrowser.open(auth_url)
-
-    server_thread.join()
-
-    if not token_holder:
-        err_msg: str = "OIDC token not received"
-        raise ValueError(err_msg)
-
-    token = token_holder[0]
-    return _get_oidc_client_token(client, token, auth_url_nonce, auth_url_state)
-
-
-def _start_local_http_server(oidc_callback_port: int, token_holder: List[Any]) -> None:
-    class HttpServ(HTTPServer):
-        def __init__(self, *args: Any, **kwargs: Any) -> None:
-            super().__init__(*args, **kwargs)
-            self.token = None
-
-    class AuthHandler(BaseHTTPRequestHandler):
-        token: str = ""
-
-        def do_GET(self):
-            params = urllib.parse.parse_qs(self.path.split("?")[1])
-            self.server.token = params["code"][0]
-            token_holder.append(self.server.token)
-            self.send_response(HTTPStatus.OK)
-            self.end_headers()
-            self.wfile.write(str.encode(SELF_CLOSING_PAGE))
+    # The listener is bound, and the login registered, before the browser
+    # opens the URL: no fixed wait for the server to come up is needed
+    callback_server, pending = oidc.open_login(oidc_callback_port, auth_url_state)
+    timeout = Config.VAULT_OIDC_TIMEOUT
+    try:
+        if Config.VAULT_OIDC_HEADLESS:
+            oidc.get_browser().open(auth_url, pending, timeout)
+        else:
+            webbrowser.open(auth_url)
+        code = pending.wait(timeout)
+    finally:
+        oidc.close_login(callback_server, auth_url_state)
 
-    server_address = ("", oidc_callback_port)
-    httpd = HttpServ(server_address, AuthHandler)
-    logging.info(f"Starting local HTTP server at {server_address}")
-    httpd.handle_request()
+    return _get_oidc_client_token(client, code, auth_url_nonce, auth_url_state)
 
 
 def login_vault(client: Client) -> None:
+    """
+    Give the client a valid token for its namespace, logging in if needed.
+    """
     if not client.url:
         err_msg: str = "Vault URL not defined for vault client"
         raise KeyError(err_msg)
 
-    token = get_stored_token()
-    if token and validate_token(client, token):
+    # Steady state: the token is known to be valid, no call to Vault needed
+    manager = get_token_manager(client_namespace(client))
+    token = manager.token
+    if token and manager.is_fresh():
+        client.token = token
+        return
+
+    with _login_lock:
+        _login_vault(client, manager)
+
+
+def invalidate_token(token: Optional[str] = None) -> None:
+    """
+    Drop the stored token, e.g. after Vault rejected it with a 403.
+    """
+    if token is None or token == token_manager.token:
+        disk = get_disk_cache()
+        if disk is not None:
+            disk.set_token(None)
+    token_manager.invalidate(token)
+    for manager in list(token_managers.values()):
+        manager.invalidate(token)
+
+
+def _save_token(manager: TokenManager) -> None:
+    """
+    Save the login namespace's token to the disk cache, if enabled, so it
+    survives a restart. Tokens whose expiry is unknown are not saved.
+    """
+    disk = get_disk_cache()
+    token, expires_at = manager.token, manager.expires_at
+    if (
+        disk is None
+        or manager is not token_manager
+        or token is None
+        or expires_at is None
+    ):
+        return
+    wall_clock_expiry = (
+        0 if expires_at == float("inf") else time.time() + expires_at - time.monotonic()
+    )
+    disk.set_token(token, wall_clock_expiry, renewable=manager.renewable)
+
+
+def _restore_token() -> Optional[str]:
+    """
+    Load the token saved by a previous run from the disk cache, if enabled.
+    """
+    disk = get_disk_cache()
+    saved = disk.get_token() if disk is not None else None
+    if not saved:
+        return None
+    ttl = saved["expires_at"] - time.time() if saved["expires_at"] else 0
+    token_manager.store(saved["token"], ttl, renewable=saved["renewable"])
+    logging.info("Restored Vault token from the disk cache.")
+    return saved["token"]
+
+
+def _login_vault(client: Client, manager: TokenManager) -> None:
+    token = manager.token
+    if not token and manager is token_manager:
+        token = _restore_token()
+    if token and manager.is_fresh():
+        # Another thread refreshed the token while we waited for the lock
+        client.token = token
+        return
+
+    if token and _revalidate_token(client, token, manager):
         logging.info("Using stored token for authentication.")
         return
 
+    ttl, renewable = _authenticate(client)
+    if ttl is None:
+        try:
+            ttl, renewable = _lookup_token(client)
+        except exceptions.VaultError:
+            err_msg: str = "Vault authentication failed"
+            raise exceptions.VaultError(err_msg)
+
+    manager.store(client.token, ttl, renewable=renewable)
+    _save_token(manager)
+    start_token_renewer(client.url, manager)
+
+
+def _authenticate(client: Client) -> Tuple[Optional[float], bool]:
+    """
+    Log in with the configured auth method.
+
+    Returns the token TTL and renewability when the login response carries
+    them, or (None, False) when the token has to be looked up.
+    """
     auth_method = Config.get_auth_method()
 
     if auth_method == "oidc":
@@ -163,15 +445,48 @@ def login_vault(client: Client) -> None:
     elif auth_method == "token":
         client.token = Config.VAULT_TOKEN
     elif auth_method == "approle":
-        client.auth.approle.login(
+        response = client.auth.approle.login(
             role_id=Config.VAULT_ROLE_ID, secret_id=Config.VAULT_SECRET_ID
         )
+        metrics.AUTH_LOGINS.inc(label_value=auth_method)
+        auth_data = (response or {}).get("auth") or {}
+        if "lease_duration" in auth_data:
+            return auth_data["lease_duration"], auth_data.get("renewable", False)
     else:
-        err_msg = "No valid authentication method found."
+        err_msg: str = "No valid authentication method found."
         raise ValueError(err_msg)
 
-    if not client.is_authenticated():
-        err_msg = "Vault authentication failed"
-        raise exceptions.VaultError(err_msg)
+    if auth_method != "approle":
+        metrics.AUTH_LOGINS.inc(label_value=auth_method)
+    return None, False
+
+
+def _lookup_token(client: Client) -> Tuple[float, bool]:
+    data = client.auth.token.lookup_self()["data"]
+    return data.get("ttl", 0), data.get("renewable", False)
 
-    store_token(client.token)
+
+def _revalidate_token(client: Client, token: str, manager: TokenManager) -> bool:
+    """
+    Check a stored token whose expiry is unknown or close, renewing it if
+    possible. Returns False if a new login is required.
+    """
+    client.token = token
+    try:
+        ttl, renewable = _lookup_token(client)
+        if ttl and ttl <= manager.refresh_margin and renewable:
+            auth_data = client.auth.token.renew_self()["auth"]
+            ttl = auth_data["lease_duration"]
+            renewable = auth_data.get("renewable", False)
+            metrics.AUTH_RENEWALS.inc()
+    except exceptions.VaultError:
+        return False
+
+    if ttl and ttl <= manager.refresh_margin:
+        # Cannot be renewed any further: log in again before it expires
+        return False
+
+    manager.store(token, ttl, renewable=renewable)
+    _save_token(manager)
+    start_token_renewer(client.url, manager)
+    return True
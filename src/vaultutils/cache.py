@@ -0,0 +1,395 @@
+import hashlib
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from cachetools import Cache, LFUCache, LRUCache, TLRUCache
+
+from vaultutils.config import Config
+
+CACHE_POLICIES = ("lru", "lfu", "ttl", "hybrid")
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached secret together with the time it was read from Vault and, when
+    known, its KV v2 version or the lease it was issued under. Stale entries
+    are last-known-good values served while Vault is failing.
+    """
+
+    value: dict
+    fetched_at: float
+    expires_at: float = field(default=math.inf)
+    version: Optional[int] = None
+    lease_id: Optional[str] = None
+    stale: bool = False
+    etag: Optional[str] = None
+
+
+class CacheStats:
+    """
+    Counters describing how a SecretCache is performing.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.refreshes = 0
+        self.revalidations = 0
+        self.stale_served = 0
+        self.negative_hits = 0
+        self.refresh_seconds_total = 0.0
+        self.refresh_seconds_max = 0.0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_refresh(self, seconds: float) -> None:
+        with self._lock:
+            self.refreshes += 1
+            self.refresh_seconds_total += seconds
+            self.refresh_seconds_max = max(self.refresh_seconds_max, seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "refreshes": self.refreshes,
+                "revalidations": self.revalidations,
+                "stale_served": self.stale_served,
+                "negative_hits": self.negative_hits,
+                "refresh_seconds_avg": (
+                    self.refresh_seconds_total / self.refreshes
+                    if self.refreshes
+                    else 0.0
+                ),
+                "refresh_seconds_max": self.refresh_seconds_max,
+            }
+
+
+def _with_eviction_callback(base: type) -> type:
+    """
+    Subclass a cachetools cache so that every removal it decides on by itself
+    (capacity evictions and TTL expiry) is reported to a callback.
+    """
+
+    class _Policy(base):  # type: ignore
+        def __init__(
+            self,
+            *args: Any,
+            on_remove: Callable[[Any, Any, str], None],
+            **kwargs: Any,
+        ) -> None:
+            super().__init__(*args, **kwargs)
+            self._on_remove = on_remove
+
+        def popitem(self) -> Any:
+            key, value = super().popitem()
+            self._on_remove(key, value, "evictions")
+            return key, value
+
+        def expire(self, time: Optional[float] = None) -> Any:
+            expired = super().expire(time)
+            for key, value in expired or ():
+                self._on_remove(key, value, "expirations")
+            return expired
+
+    return _Policy
+
+
+_POLICY_CLASSES = {
+    "lru": _with_eviction_callback(LRUCache),
+    "lfu": _with_eviction_callback(LFUCache),
+    "ttl": _with_eviction_callback(TLRUCache),
+    "hybrid": _with_eviction_callback(TLRUCache),
+}
+
+
+def entry_etag(entry: CacheEntry) -> str:
+    """
+    Return an entity tag identifying the value of an entry.
+
+    The tag is a digest of the data, computed once per entry, prefixed with
+    the KV v2 version when known. The digest keeps tags distinct when a
+    secret's metadata is deleted and its versions start again from 1.
+
+    Args:
+        entry (CacheEntry): The cache entry.
+
+    Returns:
+        str: The entity tag, without quotes.
+    """
+    if entry.etag is None:
+        data = json.dumps(entry.value, sort_keys=True, default=str).encode()
+        digest = hashlib.sha256(data).hexdigest()[:24]
+        entry.etag = digest if entry.version is None else f"v{entry.version}-{digest}"
+    return entry.etag
+
+
+def estimate_size(key: str, value: Any) -> int:
+    """
+    Estimate the number of bytes a cached secret occupies.
+
+    Args:
+        key (str): The cache key.
+        value (Any): The secret data.
+
+    Returns:
+        int: The approximate size in bytes.
+    """
+    return len(key) + len(json.dumps(value, default=str))
+
+
+class SecretCache:
+    """
+    An in-memory secret cache with a pluggable eviction policy.
+
+    Entries live in a plain dict so that lookups never wait for the cache
+    lock held by writers; they only take the stats lock for the instant it
+    takes to count a hit or miss. A cachetools cache of the configured
+    policy ("lru", "lfu", "ttl" or "hybrid") tracks the keys and their sizes
+    and decides what to evict when the entry count or byte budget is
+    exceeded. Recency and frequency updates are best-effort: a lookup skips
+    them rather than wait for a writer.
+
+    The "lru" and "lfu" policies know nothing of expiry, so before they
+    would evict a live entry to make room, the expired ones are dropped.
+    Entries that are already expired when set, such as those under a TTL
+    override of 0, are not stored.
+    """
+
+    def __init__(
+        self,
+        policy: str = "ttl",
+        maxsize: int = 100,
+        max_bytes: int = 0,
+        ttl: float = 300,
+        ttl_overrides: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        """
+        Initialize the SecretCache.
+
+        Args:
+            policy (str): One of "lru", "lfu", "ttl" or "hybrid".
+            maxsize (int): Maximum number of entries when max_bytes is 0.
+            max_bytes (int): Byte budget for all entries; 0 to count entries.
+            ttl (float): Default time to live in seconds.
+            ttl_overrides (Optional[Mapping[str, float]]): TTLs for path prefixes.
+
+        Raises:
+            ValueError: If the policy is unknown.
+        """
+        if policy not in _POLICY_CLASSES:
+            err_msg: str = (
+                f"Unknown cache policy {policy!r}, expected one of {CACHE_POLICIES}"
+            )
+            raise ValueError(err_msg)
+
+        self.policy = policy
+        self.ttl = ttl
+        # Longest prefix first, so the most specific override wins
+        self.ttl_overrides = dict(
+            sorted((ttl_overrides or {}).items(), key=lambda item: -len(item[0]))
+        )
+        self.stats = CacheStats()
+        self._lock = Lock()
+        self._entries: Dict[str, CacheEntry] = {}
+
+        kwargs: Dict[str, Any] = {"on_remove": self._on_remove}
+        if max_bytes:
+            kwargs["maxsize"] = max_bytes
+            kwargs["getsizeof"] = lambda value: value[0]
+        else:
+            kwargs["maxsize"] = maxsize
+        if policy in ("ttl", "hybrid"):
+            # The policy expires each entry at its own expires_at, which for a
+            # dynamic secret follows the lease rather than the configured TTL.
+            kwargs["ttu"] = lambda _key, value, _now: value[1].expires_at
+        self._policy: Cache = _POLICY_CLASSES[policy](**kwargs)
+        self._max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls) -> "SecretCache":
+        """
+        Build a SecretCache from the VAULT_CACHE_* settings.
+
+        Returns:
+            SecretCache: The configured cache.
+        """
+        return cls(
+            policy=Config.VAULT_CACHE_POLICY,
+            maxsize=Config.VAULT_CACHE_MAXSIZE,
+            max_bytes=Config.VAULT_CACHE_MAX_BYTES,
+            ttl=Config.VAULT_CACHE_TTL,
+            ttl_overrides=Config.get_cache_ttl_overrides(),
+        )
+
+    def ttl_for(self, key: str) -> float:
+        """
+        Return the time to live for a key, honouring prefix overrides.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            float: The time to live in seconds.
+        """
+        for prefix, ttl in self.ttl_overrides.items():
+            if key == prefix or key.startswith(prefix.rstrip("/") + "/"):
+                return ttl
+        return self.ttl
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """
+        Look up a key without updating counters or eviction order.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None if missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Look up a key without blocking.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None if missing or expired.
+        """
+        entry = self.peek(key)
+        if entry is None:
+            self.stats.incr("misses")
+            return None
+
+        self.stats.incr("hits")
+        if self.policy in ("lru", "lfu", "hybrid") and self._lock.acquire(
+            blocking=False
+        ):
+            try:
+                self._policy.get(key)
+            finally:
+                self._lock.release()
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """
+        Store an entry, evicting others if the cache is over budget.
+
+        Args:
+            key (str): The cache key.
+            entry (CacheEntry): The entry to store.
+        """
+        if entry.lease_id is None:
+            # Leased entries expire with their lease, set by the fetcher
+            entry.expires_at = entry.fetched_at + self.ttl_for(key)
+        size = estimate_size(key, entry.value) if self._max_bytes else 1
+        with self._lock:
+            # Drop the previous entry first, so that the policy cannot expire
+            # or evict it on insert and take the new entry along with it.
+            self._entries.pop(key, None)
+            self._policy.pop(key, None)
+            if entry.expires_at <= time.monotonic():
+                # Already dead, e.g. a TTL override of 0: nothing to keep
+                return
+            if (
+                self.policy in ("lru", "lfu")
+                and self._policy.currsize + size > self._policy.maxsize
+            ):
+                self._purge_expired()
+            self._entries[key] = entry
+            try:
+                # The policy holds the entry itself, to read its expiry and
+                # to tell it apart from a newer entry under the same key
+                self._policy[key] = (size, entry)
+            except ValueError:
+                # Larger than the whole budget: do not cache it at all
+                self._entries.pop(key, None)
+                self._policy.pop(key, None)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a key from the cache.
+
+        Args:
+            key (str): The cache key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._policy.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._policy.clear()
+
+    def keys(self) -> list:
+        return list(self._entries)
+
+    def sizes(self) -> Dict[str, int]:
+        """
+        Return the estimated size in bytes of every entry, by key.
+        """
+        return {
+            key: estimate_size(key, entry.value)
+            for key, entry in list(self._entries.items())
+        }
+
+    def __contains__(self, key: str) -> bool:
+        return self.peek(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> Dict[str, Any]:
+        """
+        Return the cache configuration, occupancy and counters.
+
+        Returns:
+            Dict[str, Any]: The cache statistics.
+        """
+        info = self.stats.as_dict()
+        info.update(
+            {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "size": self._policy.currsize,
+                "maxsize": self._policy.maxsize,
+                "size_unit": "bytes" if self._max_bytes else "entries",
+            }
+        )
+        return info
+
+    def _purge_expired(self) -> None:
+        # Called with self._lock held
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            del self._entries[key]
+            self._policy.pop(key, None)
+            self.stats.incr("expirations")
+
+    def _on_remove(self, key: str, value: Any, reason: str) -> None:
+        # Called by the policy with self._lock held
+        if self._entries.get(key) is value[1]:
+            del self._entries[key]
+        self.stats.incr(reason)
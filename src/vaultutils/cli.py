@@ -1,12 +1,23 @@
 import subprocess
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Tuple
 
 import click  # type: ignore
 
-from vaultutils.client import VaultManagerClient
-from vaultutils.server import start_server, stop_server
+# Commands import the server and the client lazily: a fetch-secret call
+# should not pay for Flask, hvac and the server-side fetcher at startup.
+if TYPE_CHECKING:
+    from vaultutils.client import VaultManagerClient
 
-client = VaultManagerClient()
+_client: Optional["VaultManagerClient"] = None
+
+
+def get_client() -> "VaultManagerClient":
+    global _client
+    if _client is None:
+        from vaultutils.client import VaultManagerClient  # noqa: PLC0415
+
+        _client = VaultManagerClient()
+    return _client
 
 
 @click.group()
@@ -21,35 +32,111 @@ def setup() -> None:
     subprocess.run(["playwright", "install"], check=True)
 
 
+def _check_manifest(
+    _ctx: click.Context, _param: click.Parameter, value: Optional[str]
+) -> Optional[str]:
+    """Report a manifest the server could not read as a usage error."""
+    if value is not None:
+        from vaultutils.prefetch import load_manifest  # noqa: PLC0415
+
+        try:
+            load_manifest(value)
+        except (ValueError, RuntimeError) as e:
+            raise click.BadParameter(str(e)) from e
+    return value
+
+
 @cli.command()
-def start() -> None:
+@click.option("--asgi", is_flag=True, help="Serve the asyncio (ASGI) app instead.")
+@click.option(
+    "--workers", type=int, help="Run under gunicorn with this many processes."
+)
+@click.option(
+    "--threads", type=int, help="Threads per gunicorn worker; requires --workers."
+)
+@click.option(
+    "--prefetch",
+    type=click.Path(exists=True, dir_okay=False),
+    callback=_check_manifest,
+    help="Manifest of secret paths to load into the cache at startup.",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Also serve secrets on this Unix domain socket.",
+)
+def start(
+    asgi: bool,  # noqa: FBT001
+    workers: Optional[int],
+    threads: Optional[int],
+    prefetch: Optional[str],
+    socket_path: Optional[str],
+) -> None:
     """Start the Vault Manager server."""
-    start_server()
+    if asgi:
+        from vaultutils.asgi import start_asgi_server  # noqa: PLC0415
+
+        start_asgi_server(prefetch=prefetch)
+    else:
+        from vaultutils.server import start_server  # noqa: PLC0415
+
+        try:
+            start_server(
+                workers=workers,
+                threads=threads,
+                prefetch=prefetch,
+                socket_path=socket_path,
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e)) from e
+
+
+@cli.command()
+def reload() -> None:
+    """Gracefully restart the workers of the Vault Manager server."""
+    from vaultutils.server import reload_server  # noqa: PLC0415
+
+    reload_server()
 
 
 @cli.command()
 def stop() -> None:
     """Stop the Vault Manager server."""
+    from vaultutils.server import stop_server  # noqa: PLC0415
+
     stop_server()
 
 
 @cli.command()
 @click.argument("path")
 @click.argument("key", required=False)
-def fetch_secret(path: str, key: Optional[str]) -> None:
+@click.option("--version", type=int, help="Read this KV v2 version of the secret.")
+def fetch_secret(path: str, key: Optional[str], version: Optional[int]) -> None:
     """Fetch a secret from Vault."""
     try:
-        secret = client.fetch_secret(path, key)
+        secret = get_client().fetch_secret(path, key, version)
         click.echo(secret)
     except Exception as e:
         click.echo(f"Error: {e}")
 
 
+@cli.command()
+@click.argument("paths", nargs=-1, required=True)
+def fetch_secrets(paths: Tuple[str, ...]) -> None:
+    """Fetch several secrets from Vault in one request."""
+    try:
+        secrets = get_client().fetch_secrets(list(paths))
+        click.echo(secrets)
+    except Exception as e:
+        click.echo(f"Error: {e}")
+
+
 @cli.command()
 def authenticate() -> None:
     """Authenticate with Vault using environment variables."""
     try:
-        token = client.authenticate()
+        token = get_client().authenticate()
         click.echo(f"Authenticated successfully. Token: {token}")
     except Exception as e:
         click.echo(f"Error: {e}")
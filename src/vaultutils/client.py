@@ -1,15 +1,142 @@
+import copy
+import json
+import logging
+import re
 import subprocess
+import time
+from dataclasses import dataclass
 from http import HTTPStatus
-from typing import Any, Optional
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
-import requests
+from cachetools import LRUCache
 
-from vaultutils.server import start_server, stop_server
+from vaultutils.config import Config
+from vaultutils.utils import create_session
+
+if TYPE_CHECKING:
+    from vaultutils.socket_transport import SocketTransport
+
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CachedSecret:
+    """
+    A fetch_secret response kept by the client, with the server's ETag for
+    revalidating it once it is no longer fresh.
+    """
+
+    body: Dict[str, Any]
+    etag: Optional[str]
+    fresh_until: float
+
+
+class SecretWatch:
+    """
+    A subscription to the /watch stream of the server, started by
+    VaultManagerClient.watch. It reconnects until stopped.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        paths: List[str],
+        callback: Callable[[Dict[str, Any]], None],
+        timeout: float,
+    ) -> None:
+        self.url = url
+        self.paths = paths
+        self.callback = callback
+        self.timeout = timeout
+        # Its own connection, so the stream never holds one of the client's
+        self.session = create_session(pool_size=1)
+        self._response: Any = None
+        self._stopped = Event()
+        self._thread = Thread(target=self._run, name="vaultutils-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._response is not None:
+            self._response.close()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            try:
+                self._stream()
+                backoff = 1.0
+            except Exception as e:
+                if self._stopped.is_set():
+                    return
+                logging.warning(f"Watch stream interrupted, reconnecting: {e}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _stream(self) -> None:
+        # The server sends a keep-alive every VAULT_WATCH_KEEPALIVE seconds,
+        # so a longer silence means the connection is dead
+        read_timeout = Config.VAULT_WATCH_KEEPALIVE * 3
+        with self.session.get(
+            self.url,
+            params={"path": self.paths},
+            stream=True,
+            timeout=(self.timeout, read_timeout),
+        ) as response:
+            self._response = response
+            response.raise_for_status()
+            # SSE streams are UTF-8 whatever the Content-Type says
+            for raw in response.iter_lines():
+                if self._stopped.is_set():
+                    return
+                line = raw.decode("utf-8")
+                if line.startswith("data:"):
+                    self.callback(json.loads(line[len("data:") :]))
 
 
 class VaultManagerClient:
-    def __init__(self, host: str = "localhost", port: int = 8001) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str = "localhost",
+        port: int = 8001,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        *,
+        socket_path: Optional[str] = None,
+        codec: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+    ) -> None:
         self.base_url = f"http://{host}:{port}"
+        self.timeout = Config.VAULT_CLIENT_TIMEOUT if timeout is None else timeout
+        pool_size = Config.VAULT_CLIENT_POOL_SIZE if pool_size is None else pool_size
+        # One long-lived session so calls reuse keep-alive connections
+        self.session = create_session(pool_size=pool_size)
+        # Secret reads go over the server's Unix socket when it has one
+        socket_path = Config.VAULT_SERVER_SOCKET if socket_path is None else socket_path
+        self.transport: Optional[SocketTransport] = None
+        if socket_path:
+            from vaultutils import socket_transport  # noqa: PLC0415
+
+            self.transport = socket_transport.SocketTransport(
+                socket_path,
+                codec or Config.VAULT_CLIENT_CODEC,
+                pool_size=pool_size,
+                timeout=self.timeout,
+            )
+        # Secrets read again within cache_ttl are answered without a request;
+        # after that they are revalidated with If-None-Match
+        self.cache_ttl = (
+            Config.VAULT_CLIENT_CACHE_TTL if cache_ttl is None else cache_ttl
+        )
+        self.cache: Optional[LRUCache] = None
+        if self.cache_ttl > 0:
+            self.cache = LRUCache(maxsize=Config.VAULT_CLIENT_CACHE_MAXSIZE)
+        self._cache_lock = Lock()
 
     def setup(self) -> None:
         """Setup Playwright."""
@@ -17,26 +144,135 @@ class VaultManagerClient:
 
     def start(self) -> None:
         """Start the Vault Manager server."""
+        from vaultutils.server import start_server  # noqa: PLC0415
+
         start_server()
 
     def stop(self) -> None:
         """Stop the Vault Manager server."""
+        from vaultutils.server import stop_server  # noqa: PLC0415
+
         stop_server()
 
     def authenticate(self) -> str:
         """Authenticate with Vault using environment variables."""
-        response = requests.post(f"{self.base_url}/authenticate", timeout=10)
+        if self.transport is not None:
+            status, body = self.transport.call("authenticate")
+            if status == HTTPStatus.OK:
+                return body["token"]
+            err_msg: str = f"Error during authentication: {status} - {body}"
+            raise Exception(err_msg)
+
+        response = self.session.post(
+            f"{self.base_url}/authenticate", timeout=self.timeout
+        )
         if response.status_code == HTTPStatus.OK:
             return response.json()["token"]
         else:
-            err_msg: str = (
+            err_msg = (
                 f"Error during authentication: {response.status_code} - {response.text}"
             )
             raise Exception(err_msg)
 
-    def fetch_secret(self, path: str, key: Optional[str] = None) -> dict[str, Any]:
-        """Fetch a secret from Vault."""
-        response = requests.post(
-            f"{self.base_url}/fetch-secret", json={"path": path, "key": key}, timeout=10
+    def fetch_secret(
+        self, path: str, key: Optional[str] = None, version: Optional[int] = None
+    ) -> dict[str, Any]:
+        """Fetch a secret from Vault, optionally a specific KV v2 version."""
+        payload: dict[str, Any] = {"path": path, "key": key}
+        if version is not None:
+            payload["version"] = version
+        if self.cache is not None:
+            return self._fetch_secret_cached(payload)
+        if self.transport is not None:
+            return self.transport.call("fetch_secret", **payload)[1]
+        response = self.session.post(
+            f"{self.base_url}/fetch-secret",
+            json=payload,
+            timeout=self.timeout,
+        )
+        return response.json()
+
+    def clear_cache(self) -> None:
+        """Forget the secrets cached by the client."""
+        if self.cache is not None:
+            with self._cache_lock:
+                self.cache.clear()
+
+    def _fetch_secret_cached(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        cache_key = (payload["path"], payload["key"], payload.get("version"))
+        with self._cache_lock:
+            cached: Optional[CachedSecret] = self.cache.get(cache_key)  # type: ignore
+        if cached is not None and time.monotonic() < cached.fresh_until:
+            # A copy, so callers cannot change the cached secret
+            return copy.deepcopy(cached.body)
+
+        if self.transport is not None:
+            status, body = self.transport.call("fetch_secret", **payload)
+            etag, max_age = None, None
+        else:
+            status, body, etag, max_age = self._get_secret(payload, cached)
+
+        if status in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED) and not body.get("stale"):
+            ttl = self.cache_ttl if max_age is None else min(self.cache_ttl, max_age)
+            with self._cache_lock:
+                self.cache[cache_key] = CachedSecret(  # type: ignore
+                    body, etag, time.monotonic() + ttl
+                )
+        return copy.deepcopy(body)
+
+    def _get_secret(
+        self, payload: Dict[str, Any], cached: Optional[CachedSecret]
+    ) -> Tuple[int, Dict[str, Any], Optional[str], Optional[float]]:
+        """
+        GET a secret, revalidating the cached copy if it has an ETag.
+
+        Returns:
+            Tuple[int, Dict[str, Any], Optional[str], Optional[float]]: The
+            status, the body (the cached one on a 304), the ETag and the
+            max-age the server allows.
+        """
+        headers = {}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        response = self.session.get(
+            f"{self.base_url}/fetch-secret",
+            params={
+                name: value for name, value in payload.items() if value is not None
+            },
+            headers=headers,
+            timeout=self.timeout,
+        )
+        if response.status_code == HTTPStatus.NOT_MODIFIED and cached is not None:
+            body = cached.body
+        else:
+            body = response.json()
+        match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        return (
+            response.status_code,
+            body,
+            response.headers.get("ETag"),
+            float(match.group(1)) if match else None,
+        )
+
+    def watch(
+        self, paths: List[str], callback: Callable[[Dict[str, Any]], None]
+    ) -> SecretWatch:
+        """
+        Call callback with an event dict (path, version, deleted) whenever
+        one of the secrets changes, from a background thread.
+
+        The server checks each path once however many clients watch it.
+        Call stop() on the returned watch to unsubscribe.
+        """
+        return SecretWatch(f"{self.base_url}/watch", paths, callback, self.timeout)
+
+    def fetch_secrets(self, paths: List[str]) -> dict[str, Any]:
+        """Fetch several secrets from Vault in one request."""
+        if self.transport is not None:
+            return self.transport.call("fetch_secrets", paths=paths)[1]
+        response = self.session.post(
+            f"{self.base_url}/fetch-secrets",
+            json={"paths": paths},
+            timeout=self.timeout,
         )
         return response.json()
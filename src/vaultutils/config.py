@@ -1,16 +1,33 @@
 import os
+import tempfile
+from typing import Dict
 
 
 class Config:
     VAULT_URL = os.getenv("VAULT_URL", "http://localhost:8200")
     VAULT_MOUNT_POINT = os.getenv("VAULT_MOUNT_POINT", "secret")
+    VAULT_MOUNTS = os.getenv("VAULT_MOUNTS", "")
+    VAULT_NAMESPACE = os.getenv("VAULT_NAMESPACE") or None
     VAULT_OIDC_HEADLESS = os.getenv("VAULT_OIDC_HEADLESS", "false").lower() == "true"
     VAULT_OIDC_AUTH = os.getenv("VAULT_OIDC_AUTH", "true").lower() == "true"
+    VAULT_OIDC_TIMEOUT = float(os.getenv("VAULT_OIDC_TIMEOUT", "120"))
     VAULT_ROLE_ID = os.getenv("VAULT_ROLE_ID")
     VAULT_SECRET_ID = os.getenv("VAULT_SECRET_ID")
     VAULT_TOKEN = os.getenv("VAULT_TOKEN")
     VAULT_SERVER_HOST = os.getenv("VAULT_SERVER_HOST", "localhost")
     VAULT_SERVER_PORT = int(os.getenv("VAULT_SERVER_PORT", "8001"))
+    VAULT_SERVER_WORKERS = int(os.getenv("VAULT_SERVER_WORKERS", "0"))
+    VAULT_SERVER_THREADS = int(os.getenv("VAULT_SERVER_THREADS", "4"))
+    VAULT_SERVER_SOCKET = os.getenv("VAULT_SERVER_SOCKET", "")
+    VAULT_CLIENT_CODEC = os.getenv("VAULT_CLIENT_CODEC", "json")
+    VAULT_SERVER_PIDFILE = os.getenv(
+        "VAULT_SERVER_PIDFILE",
+        os.path.join(tempfile.gettempdir(), "vaultutils-server.pid"),
+    )
+    VAULT_SHARED_CACHE = os.getenv("VAULT_SHARED_CACHE", "true").lower() == "true"
+    # Set by the server master when it starts the shared cache for its workers
+    VAULT_SHARED_CACHE_SOCKET = ""
+    VAULT_SHARED_CACHE_AUTHKEY = b""
     NETWORK_NEGOTIATE_AUTH_TRUSTED_URIS = os.getenv(
         "NETWORK_NEGOTIATE_AUTH_TRUSTED_URIS", ".myorg.com"
     )
@@ -18,6 +35,78 @@ class Config:
         "NETWORK_NEGOTIATE_AUTH_DELEGATION_URIS", ".myorg.com"
     )
     VAULT_AUTH_METHOD = os.getenv("VAULT_AUTH_METHOD")
+    VAULT_HTTP_POOL_SIZE = int(os.getenv("VAULT_HTTP_POOL_SIZE", "10"))
+    VAULT_HTTP_RETRIES = int(os.getenv("VAULT_HTTP_RETRIES", "2"))
+    VAULT_HTTP_TIMEOUT = float(os.getenv("VAULT_HTTP_TIMEOUT", "30"))
+    VAULT_CLIENT_POOL_SIZE = int(os.getenv("VAULT_CLIENT_POOL_SIZE", "10"))
+    VAULT_CLIENT_TIMEOUT = float(os.getenv("VAULT_CLIENT_TIMEOUT", "10"))
+    VAULT_CLIENT_CACHE_TTL = float(os.getenv("VAULT_CLIENT_CACHE_TTL", "0"))
+    VAULT_CLIENT_CACHE_MAXSIZE = int(os.getenv("VAULT_CLIENT_CACHE_MAXSIZE", "1000"))
+    VAULT_TOKEN_REFRESH_MARGIN = float(os.getenv("VAULT_TOKEN_REFRESH_MARGIN", "30"))
+    VAULT_TOKEN_BACKGROUND_RENEWAL = (
+        os.getenv("VAULT_TOKEN_BACKGROUND_RENEWAL", "true").lower() == "true"
+    )
+    VAULT_TOKEN_RENEW_FRACTION = float(os.getenv("VAULT_TOKEN_RENEW_FRACTION", "0.66"))
+    VAULT_LEASE_RENEW_FRACTION = float(os.getenv("VAULT_LEASE_RENEW_FRACTION", "0.66"))
+    VAULT_LEASE_RENEW_WINDOW = float(os.getenv("VAULT_LEASE_RENEW_WINDOW", "30"))
+    VAULT_LEASE_EXPIRY_MARGIN = float(os.getenv("VAULT_LEASE_EXPIRY_MARGIN", "30"))
+    VAULT_CACHE_TTL = float(os.getenv("VAULT_CACHE_TTL", "300"))
+    VAULT_NEGATIVE_CACHE_TTL = float(os.getenv("VAULT_NEGATIVE_CACHE_TTL", "5"))
+    VAULT_STALE_MAX_AGE = float(os.getenv("VAULT_STALE_MAX_AGE", "3600"))
+    VAULT_CIRCUIT_FAILURE_THRESHOLD = int(
+        os.getenv("VAULT_CIRCUIT_FAILURE_THRESHOLD", "5")
+    )
+    VAULT_CIRCUIT_RESET_TIMEOUT = float(os.getenv("VAULT_CIRCUIT_RESET_TIMEOUT", "10"))
+    VAULT_UPSTREAM_INITIAL_CONCURRENCY = int(
+        os.getenv("VAULT_UPSTREAM_INITIAL_CONCURRENCY", "8")
+    )
+    VAULT_UPSTREAM_MIN_CONCURRENCY = int(
+        os.getenv("VAULT_UPSTREAM_MIN_CONCURRENCY", "2")
+    )
+    VAULT_UPSTREAM_MAX_CONCURRENCY = int(
+        os.getenv("VAULT_UPSTREAM_MAX_CONCURRENCY", "64")
+    )
+    VAULT_UPSTREAM_RETRIES = int(os.getenv("VAULT_UPSTREAM_RETRIES", "2"))
+    VAULT_UPSTREAM_BACKOFF_MAX = float(os.getenv("VAULT_UPSTREAM_BACKOFF_MAX", "10"))
+    VAULT_DEBUG_ENDPOINTS = (
+        os.getenv("VAULT_DEBUG_ENDPOINTS", "false").lower() == "true"
+    )
+    VAULT_CACHE_SOFT_TTL = float(os.getenv("VAULT_CACHE_SOFT_TTL", "240"))
+    VAULT_CACHE_REFRESH_WORKERS = int(os.getenv("VAULT_CACHE_REFRESH_WORKERS", "4"))
+    VAULT_CACHE_POLICY = os.getenv("VAULT_CACHE_POLICY", "ttl").lower()
+    VAULT_CACHE_MAXSIZE = int(os.getenv("VAULT_CACHE_MAXSIZE", "100"))
+    VAULT_CACHE_MAX_BYTES = int(os.getenv("VAULT_CACHE_MAX_BYTES", "0"))
+    VAULT_CACHE_REVALIDATE = (
+        os.getenv("VAULT_CACHE_REVALIDATE", "false").lower() == "true"
+    )
+    VAULT_CACHE_TTL_OVERRIDES = os.getenv("VAULT_CACHE_TTL_OVERRIDES", "")
+    VAULT_DISK_CACHE_PATH = os.getenv("VAULT_DISK_CACHE_PATH", "")
+    VAULT_DISK_CACHE_FLUSH_INTERVAL = float(
+        os.getenv("VAULT_DISK_CACHE_FLUSH_INTERVAL", "1")
+    )
+    VAULT_CACHE_KEY = os.getenv("VAULT_CACHE_KEY")
+    VAULT_PREFETCH_MANIFEST = os.getenv("VAULT_PREFETCH_MANIFEST", "")
+    VAULT_PREFETCH_PATHS = os.getenv("VAULT_PREFETCH_PATHS", "")
+    VAULT_BATCH_CONCURRENCY = int(os.getenv("VAULT_BATCH_CONCURRENCY", "8"))
+    VAULT_WATCH_INTERVAL = float(os.getenv("VAULT_WATCH_INTERVAL", "10"))
+    VAULT_WATCH_KEEPALIVE = float(os.getenv("VAULT_WATCH_KEEPALIVE", "15"))
+    # Each /watch stream holds a server thread: leave the others for reads
+    VAULT_WATCH_MAX_STREAMS = int(
+        os.getenv("VAULT_WATCH_MAX_STREAMS", str(max(1, VAULT_SERVER_THREADS // 2)))
+    )
+
+    @classmethod
+    def get_cache_ttl_overrides(cls) -> Dict[str, float]:
+        overrides: Dict[str, float] = {}
+        for item in cls.VAULT_CACHE_TTL_OVERRIDES.split(","):
+            if not item.strip():
+                continue
+            prefix, sep, ttl = item.partition("=")
+            if not sep:
+                err_msg: str = f"Invalid VAULT_CACHE_TTL_OVERRIDES entry: {item!r}"
+                raise ValueError(err_msg)
+            overrides[prefix.strip().strip("/")] = float(ttl)
+        return overrides
 
     @classmethod
     def get_auth_method(cls):
@@ -1,24 +1,161 @@
+import json
+import logging
 import os
 import signal
+import time
 from http import HTTPStatus
 from threading import Lock, Thread
-from typing import Any, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
 
-from flask import jsonify, request  # type: ignore
-from hvac import Client  # type: ignore
+from flask import (  # type: ignore
+    Response,
+    abort,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from werkzeug.exceptions import HTTPException  # type: ignore
 
-from vaultutils import auth
+from vaultutils import auth, debug, metrics
+from vaultutils.cache import CacheEntry, entry_etag
 from vaultutils.config import Config
-from vaultutils.secret_fetcher import VaultSecretFetcher
+from vaultutils.prefetch import get_prefetch_paths
+from vaultutils.resilience import error_status
+from vaultutils.secret_fetcher import VaultSecretFetcher, fetch_request_error
 
-vault_secret_fetcher = VaultSecretFetcher()
-lock = Lock()
+lock = metrics.TimedLock("authenticate")
+
+# Open /watch streams: each one holds a server thread while it lasts
+_watch_lock = Lock()
+_watch_streams = 0
+
+
+def _open_watch_stream() -> bool:
+    """
+    Take a /watch slot, or return False if VAULT_WATCH_MAX_STREAMS are open.
+    """
+    global _watch_streams
+    with _watch_lock:
+        if _watch_streams >= Config.VAULT_WATCH_MAX_STREAMS:
+            return False
+        _watch_streams += 1
+        return True
+
+
+def _close_watch_stream() -> None:
+    global _watch_streams
+    with _watch_lock:
+        _watch_streams -= 1
+
+
+def get_fetcher() -> VaultSecretFetcher:
+    """
+    Return the fetcher singleton, creating it (and its Vault client) on first
+    use rather than when the server module is imported.
+    """
+    return VaultSecretFetcher()
+
+
+def start_warm_up() -> None:
+    """
+    Prefetch the paths from the configured manifest, if any.
+    """
+    get_fetcher().start_warm_up(get_prefetch_paths())
+
+
+def revoke_leases() -> None:
+    """
+    Revoke the leases of the dynamic secrets this process has cached.
+    """
+    revoked = get_fetcher().revoke_leases()
+    if revoked:
+        logging.info(f"Revoked {revoked} leases before shutting down.")
+
+
+def __getattr__(name: str) -> Any:
+    if name == "vault_secret_fetcher":
+        return get_fetcher()
+    err_msg: str = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(err_msg)
+
+
+CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations", "refreshes")
+
+
+def collect_cache_metrics() -> List[Tuple[str, str, str, List[metrics.Sample]]]:
+    """
+    Report the fetcher's cache statistics and upstream concurrency, read at
+    scrape time so the cache does not have to update a second set of
+    counters.
+    """
+    info: Dict[str, Any] = get_fetcher().cache_info()
+    families: List[Tuple[str, str, str, List[metrics.Sample]]] = [
+        (
+            f"vaultutils_cache_{name}_total",
+            "counter",
+            f"Secret cache {name}.",
+            [(f"vaultutils_cache_{name}_total", {}, info[name])],
+        )
+        for name in CACHE_COUNTERS
+    ]
+    families.append(
+        (
+            "vaultutils_cache_entries",
+            "gauge",
+            "Secrets currently cached.",
+            [("vaultutils_cache_entries", {}, info["entries"])],
+        )
+    )
+    for name, help_text in (
+        ("limit", "Current concurrency limit of Vault calls."),
+        ("inflight", "Vault calls in flight."),
+        ("queued", "Vault calls waiting for a concurrency slot."),
+    ):
+        families.append(
+            (
+                f"vaultutils_upstream_{name}",
+                "gauge",
+                help_text,
+                [(f"vaultutils_upstream_{name}", {}, info["upstream"][name])],
+            )
+        )
+    return families
+
+
+metrics.REGISTRY.add_collector(collect_cache_metrics)
+
+
+def _max_age(entry: CacheEntry, soft_ttl: float) -> int:
+    # Clients may reuse a value until the server would refresh it
+    now = time.monotonic()
+    fresh_until = min(entry.fetched_at + soft_ttl, entry.expires_at)
+    return max(0, int(fresh_until - now))
+
+
+def _require_debug_endpoints() -> None:
+    # Answer as if the endpoints did not exist unless they were enabled
+    if not Config.VAULT_DEBUG_ENDPOINTS:
+        abort(HTTPStatus.NOT_FOUND)
 
 
 class VaultController:
+    @staticmethod
+    def handle_error(error: Exception) -> Any:
+        """
+        Answer with a JSON error and a status that tells a missing or denied
+        secret (404, 403) apart from Vault being down (502, 503).
+        """
+        if isinstance(error, HTTPException):
+            return error
+        status = error_status(error)
+        if status == HTTPStatus.INTERNAL_SERVER_ERROR:
+            logging.exception(f"Unhandled error on {request.path}")
+        return jsonify({"error": str(error)}), status
+
     @staticmethod
     def authenticate() -> Tuple[dict[str, Any], int]:
-        client = Client(url=Config.VAULT_URL)
+        # Reuse the fetcher's client and its connection pool to Vault
+        client = get_fetcher().client
         if not client.url:
             return jsonify({"error": "Vault URL not defined"}), HTTPStatus.BAD_REQUEST
 
@@ -33,20 +170,168 @@ class VaultController:
 
     @staticmethod
     def fetch_secret() -> Tuple[dict[str, Any], int]:
-        path = request.json["path"]
-        key = request.json.get("key")
+        """
+        Return a secret, from the JSON body of a POST or the query string of
+        a GET. Fresh answers carry an ETag and a Cache-Control max-age up to
+        the next background refresh; a request whose If-None-Match matches
+        the ETag gets an empty 304.
+        """
+        payload: Any
+        if request.method == "GET":
+            payload = {
+                "path": request.args.get("path"),
+                "key": request.args.get("key"),
+                "version": request.args.get("version", type=int),
+            }
+        else:
+            payload = request.get_json(silent=True)
+        err_msg = fetch_request_error(payload)
+        if err_msg:
+            return jsonify({"error": err_msg}), HTTPStatus.BAD_REQUEST
+
+        fetcher = get_fetcher()
+        secret, entry = fetcher.fetch_secret_detailed(
+            payload["path"], payload.get("key"), payload.get("version")
+        )
 
-        with lock:
-            secret = vault_secret_fetcher.fetch_secret(path, key)
+        if entry.stale:
+            response = jsonify({"secret": secret, "stale": True})
+            response.headers["Warning"] = '110 - "Response is Stale"'
+            response.cache_control.no_cache = True
+            return response
 
-        return jsonify({"secret": secret})
+        etag = entry_etag(entry)
+        if request.if_none_match.contains(etag):
+            response = Response(status=HTTPStatus.NOT_MODIFIED)
+        else:
+            response = jsonify({"secret": secret})
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = _max_age(entry, fetcher.soft_ttl)
+        return response
+
+    @staticmethod
+    def fetch_secrets() -> Tuple[dict[str, Any], int]:
+        paths = request.json.get("paths")
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            return (
+                jsonify({"error": "'paths' must be a list of strings"}),
+                HTTPStatus.BAD_REQUEST,
+            )
+
+        secrets, errors, stale = get_fetcher().fetch_secrets_detailed(paths)
+
+        body: Dict[str, Any] = {"secrets": secrets, "errors": errors}
+        if stale:
+            body["stale"] = stale
+        return jsonify(body)
+
+    @staticmethod
+    def cache_stats() -> Tuple[dict[str, Any], int]:
+        return jsonify(get_fetcher().cache_info())
+
+    @staticmethod
+    def ready() -> Tuple[dict[str, Any], int]:
+        status = get_fetcher().warm_up_status
+        return jsonify(status.as_dict()), (
+            HTTPStatus.OK if status.ready else HTTPStatus.SERVICE_UNAVAILABLE
+        )
+
+    @staticmethod
+    def watch() -> Response:
+        """
+        Stream change events for the ``path`` query parameters as
+        Server-Sent Events, with a comment line as keep-alive.
+
+        A stream holds a server thread for as long as it is open, so at most
+        VAULT_WATCH_MAX_STREAMS are served per process; more are answered
+        with 503 and leave the other threads free for secret reads.
+        """
+        paths = request.args.getlist("path")
+        fetcher = get_fetcher()
+        if not paths:
+            return jsonify({"error": "'path' is required"}), HTTPStatus.BAD_REQUEST
+        unwatchable = [path for path in paths if not fetcher.is_watchable(path)]
+        if unwatchable:
+            return (
+                jsonify({"error": f"Dynamic secrets cannot be watched: {unwatchable}"}),
+                HTTPStatus.BAD_REQUEST,
+            )
+
+        if not _open_watch_stream():
+            response = jsonify({"error": "Too many /watch streams are open"})
+            response.headers["Retry-After"] = str(int(Config.VAULT_WATCH_KEEPALIVE))
+            return response, HTTPStatus.SERVICE_UNAVAILABLE
+
+        def stream() -> Iterator[str]:
+            # Subscribed here, not before the response is returned: a stream
+            # closed before it starts never runs the finally clause
+            subscription = fetcher.watcher.subscribe(paths)
+            try:
+                yield ": watching\n\n"
+                while True:
+                    event = subscription.get(timeout=Config.VAULT_WATCH_KEEPALIVE)
+                    if event is None:
+                        yield ": keep-alive\n\n"
+                    else:
+                        yield f"event: change\ndata: {json.dumps(event)}\n\n"
+            finally:
+                fetcher.watcher.unsubscribe(subscription)
+
+        response = Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        # Runs however the stream ends, even if it never started
+        response.call_on_close(_close_watch_stream)
+        return response
+
+    @staticmethod
+    def metrics() -> Response:
+        return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+    @staticmethod
+    def debug_profile() -> Response:
+        """
+        Sample all threads for ``seconds`` (default 10) and return the stacks
+        in collapsed format, ready for flamegraph.pl or speedscope.
+        """
+        _require_debug_endpoints()
+        seconds = request.args.get("seconds", 10.0, type=float)
+        interval = request.args.get("interval", 0.005, type=float)
+        if seconds <= 0 or interval <= 0:
+            return (
+                jsonify({"error": "'seconds' and 'interval' must be positive"}),
+                HTTPStatus.BAD_REQUEST,
+            )
+        try:
+            stacks = debug.profile(seconds, interval)
+        except debug.ProfilerBusyError as e:
+            return jsonify({"error": str(e)}), HTTPStatus.CONFLICT
+        return Response(stacks, mimetype="text/plain")
+
+    @staticmethod
+    def debug_threads() -> Tuple[dict[str, Any], int]:
+        _require_debug_endpoints()
+        return jsonify(debug.thread_dump())
+
+    @staticmethod
+    def debug_cache() -> Tuple[dict[str, Any], int]:
+        _require_debug_endpoints()
+        top = request.args.get("top", 50, type=int)
+        return jsonify(debug.cache_report(get_fetcher(), top))
 
     @staticmethod
     def shutdown() -> Tuple[dict[str, str], int]:
+        func = request.environ.get("werkzeug.server.shutdown")
+
         def shutdown_server():
-            func = request.environ.get("werkzeug.server.shutdown")
+            revoke_leases()
             if func is None:
-                os.kill(os.getpid(), signal.SIGTERM)
+                # Under gunicorn, stop the master rather than this worker
+                pid = int(os.environ.get("VAULTUTILS_SERVER_PID", os.getpid()))
+                os.kill(pid, signal.SIGTERM)
             else:
                 func()
 
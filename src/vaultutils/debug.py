@@ -0,0 +1,177 @@
+"""
+Diagnostics for a live server, served by the opt-in /debug endpoints.
+
+The profiler samples the stacks of all threads with sys._current_frames and
+aggregates them in the collapsed format read by flamegraph.pl, speedscope
+and inferno: one ``thread;outer;...;inner count`` line per distinct stack.
+Sampling only runs while a profile is requested, so an idle server pays
+nothing for it.
+"""
+
+import gc
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from threading import Lock
+from types import FrameType
+from typing import Any, Dict, List
+
+from vaultutils import metrics
+
+MAX_PROFILE_SECONDS = 60
+
+_profile_lock = Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """
+    Raised when a profile is requested while another one is running.
+    """
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapse(thread_name: str, frame: FrameType) -> str:
+    names = []
+    current: Any = frame
+    while current is not None:
+        names.append(_frame_name(current))
+        current = current.f_back
+    names.append(thread_name.replace(";", "_"))
+    return ";".join(reversed(names))
+
+
+def profile(seconds: float, interval: float = 0.005) -> str:
+    """
+    Sample the stacks of all other threads for a while.
+
+    Args:
+        seconds (float): How long to sample, at most MAX_PROFILE_SECONDS.
+        interval (float): Seconds between two samples.
+
+    Returns:
+        str: The stacks in collapsed format, most frequent first.
+
+    Raises:
+        ProfilerBusyError: If another profile is running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        err_msg: str = "A profile is already running"
+        raise ProfilerBusyError(err_msg)
+    try:
+        counts: Counter = Counter()
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + min(seconds, MAX_PROFILE_SECONDS)
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                counts[_collapse(names.get(ident, str(ident)), frame)] += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def thread_dump() -> Dict[str, Any]:
+    """
+    Return the stack of every thread, and the TimedLocks with their holder
+    and number of waiting threads.
+
+    Returns:
+        Dict[str, Any]: ``threads`` and ``locks``.
+    """
+    threads = {thread.ident: thread for thread in threading.enumerate()}
+    locks = metrics.timed_locks()
+    held: Dict[int, List[str]] = {}
+    for lock in locks:
+        owner = lock.owner
+        if owner is not None:
+            held.setdefault(owner, []).append(lock.name)
+
+    dump = []
+    for ident, frame in sys._current_frames().items():
+        thread = threads.get(ident)
+        dump.append(
+            {
+                "name": thread.name if thread is not None else str(ident),
+                "ident": ident,
+                "daemon": thread.daemon if thread is not None else None,
+                "holds": held.get(ident, []),
+                "stack": [
+                    f"{summary.filename}:{summary.lineno} in {summary.name}"
+                    for summary in traceback.extract_stack(frame)
+                ],
+            }
+        )
+    return {
+        "threads": dump,
+        "locks": [
+            {
+                "name": lock.name,
+                "locked": lock.locked(),
+                "owner": (
+                    threads[lock.owner].name if lock.owner in threads else lock.owner
+                ),
+                "waiters": lock.waiters,
+            }
+            for lock in locks
+        ],
+    }
+
+
+def _process_memory() -> Dict[str, Any]:
+    info: Dict[str, Any] = {
+        "threads": threading.active_count(),
+        "gc_counts": gc.get_count(),
+    }
+    try:
+        import resource  # noqa: PLC0415
+    except ImportError:
+        return info
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    info["max_rss_bytes"] = max_rss if sys.platform == "darwin" else max_rss * 1024
+    return info
+
+
+def cache_report(fetcher: Any, top: int = 50) -> Dict[str, Any]:
+    """
+    Report the size of every cache tier of a fetcher, with its largest
+    entries. Only paths and sizes are reported, never secret values.
+
+    Args:
+        fetcher (Any): A VaultSecretFetcher.
+        top (int): Number of entries listed per tier, largest first.
+
+    Returns:
+        Dict[str, Any]: Sizes by tier, and the process's memory use.
+    """
+    mounts = [fetcher.default_mount, *fetcher.mounts.values()]
+    tiers = {f"mount:{mount.name}": mount.cache for mount in mounts}
+    tiers.update(
+        {
+            "versions": fetcher.versions,
+            "negative": fetcher.negative,
+            "last_good": fetcher.last_good,
+        }
+    )
+    report = {}
+    for name, cache in tiers.items():
+        sizes = cache.sizes()
+        largest = sorted(sizes.items(), key=lambda item: item[1], reverse=True)
+        report[name] = {
+            "entries": len(sizes),
+            "bytes": sum(sizes.values()),
+            "largest": [{"path": path, "bytes": size} for path, size in largest[:top]],
+        }
+    return {"caches": report, "process": _process_memory()}
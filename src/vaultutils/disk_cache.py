@@ -0,0 +1,275 @@
+"""
+An optional encrypted on-disk cache, so restarts do not start cold.
+
+Non-expired secrets and the Vault token are kept in a single file encrypted
+with Fernet (AES-128-CBC + HMAC-SHA256). The key comes from VAULT_CACHE_KEY
+or, if the keyring package is installed, from the OS keyring. The file is
+replaced atomically and merged under an advisory lock on write, so several
+processes can share it.
+"""
+
+import atexit
+import json
+import logging
+import os
+import tempfile
+import time
+from threading import Lock, Timer
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from vaultutils.config import Config
+
+try:
+    import fcntl
+except ModuleNotFoundError:  # Windows: os.replace alone keeps writes atomic
+    fcntl = None  # type: ignore
+
+KEYRING_SERVICE = "vaultutils"
+KEYRING_USERNAME = "cache-key"
+
+_disk_cache: Optional["DiskCache"] = None
+_disk_cache_lock = Lock()
+
+
+def _load_fernet(key: Optional[str]) -> Any:
+    try:
+        from cryptography.fernet import Fernet  # noqa: PLC0415
+    except ModuleNotFoundError as exc:
+        msg = "cryptography is required for the disk cache: pip install vaultutils[disk-cache]"
+        raise RuntimeError(msg) from exc
+
+    if not key:
+        key = _get_keyring_key(Fernet)
+    return Fernet(key.encode() if isinstance(key, str) else key)
+
+
+def _get_keyring_key(fernet_class: Any) -> str:
+    """
+    Read the cache key from the OS keyring, creating one on first use.
+    """
+    try:
+        import keyring  # type: ignore  # noqa: PLC0415
+    except ModuleNotFoundError as exc:
+        msg = "Set VAULT_CACHE_KEY or install keyring to use the disk cache"
+        raise RuntimeError(msg) from exc
+
+    key = keyring.get_password(KEYRING_SERVICE, KEYRING_USERNAME)
+    if not key:
+        key = fernet_class.generate_key().decode()
+        keyring.set_password(KEYRING_SERVICE, KEYRING_USERNAME, key)
+    return key
+
+
+class DiskCache:
+    """
+    Encrypted file holding secrets and the token with wall-clock expiry.
+
+    Secret writes are buffered and flushed at most every flush_interval
+    seconds (and at exit), so a burst of refreshes costs one file write.
+    Token writes are flushed immediately.
+
+    Args:
+        path (str): The cache file.
+        key (Optional[str]): A Fernet key; read from the keyring if empty.
+        flush_interval (float): Seconds to buffer secret writes for.
+    """
+
+    def __init__(
+        self, path: str, key: Optional[str] = None, flush_interval: float = 1.0
+    ) -> None:
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.flush_interval = flush_interval
+        self._fernet = _load_fernet(key)
+        self._lock = Lock()
+        self._secrets: Dict[str, Tuple[Any, float, float]] = {}
+        self._deleted: set = set()
+        self._token: Optional[Dict[str, Any]] = None
+        self._token_dirty = False
+        self._timer: Optional[Timer] = None
+
+    @classmethod
+    def from_config(cls) -> Optional["DiskCache"]:
+        if not Config.VAULT_DISK_CACHE_PATH:
+            return None
+        return cls(
+            Config.VAULT_DISK_CACHE_PATH,
+            Config.VAULT_CACHE_KEY,
+            Config.VAULT_DISK_CACHE_FLUSH_INTERVAL,
+        )
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Read and decrypt the file, dropping expired items.
+
+        Returns:
+            Dict[str, Any]: {"secrets": {path: [value, fetched_at,
+            expires_at]}, "token": {...} or None}. Empty if the file is
+            missing, unreadable or was encrypted with another key.
+        """
+        try:
+            with open(self.path, "rb") as cache_file:
+                data = json.loads(self._fernet.decrypt(cache_file.read()))
+        except FileNotFoundError:
+            return {"secrets": {}, "token": None}
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable disk cache {self.path}: {e}")
+            return {"secrets": {}, "token": None}
+
+        now = time.time()
+        secrets = {
+            path: item
+            for path, item in data.get("secrets", {}).items()
+            if item[2] > now
+        }
+        token = data.get("token")
+        if token and token["expires_at"] and token["expires_at"] <= now:
+            token = None
+        return {"secrets": secrets, "token": token}
+
+    def secrets(self) -> Iterator[Tuple[str, Any, float, float]]:
+        """
+        Yield (path, value, fetched_at, expires_at) for every live secret.
+        """
+        for path, (value, fetched_at, expires_at) in self.load()["secrets"].items():
+            yield path, value, fetched_at, expires_at
+
+    def get_token(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the saved token as {"token", "expires_at", "renewable"}, where
+        an expires_at of 0 means the token does not expire.
+        """
+        return self.load()["token"]
+
+    def set(self, key: str, value: Any, fetched_at: float, expires_at: float) -> None:
+        with self._lock:
+            self._secrets[key] = (value, fetched_at, expires_at)
+            self._deleted.discard(key)
+        self._schedule_flush()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._secrets.pop(key, None)
+            self._deleted.add(key)
+        self._schedule_flush()
+
+    def set_token(
+        self, token: Optional[str], expires_at: float = 0, *, renewable: bool = False
+    ) -> None:
+        """
+        Save the token, or forget it when token is None.
+        """
+        with self._lock:
+            self._token = (
+                {"token": token, "expires_at": expires_at, "renewable": renewable}
+                if token
+                else None
+            )
+            self._token_dirty = True
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Merge the buffered writes into the file and replace it atomically.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, deleted = self._secrets, self._deleted
+            token, token_dirty = self._token, self._token_dirty
+            self._secrets, self._deleted, self._token_dirty = {}, set(), False
+        if not pending and not deleted and not token_dirty:
+            return
+
+        try:
+            with self._file_lock():
+                data = self.load()
+                for path in deleted:
+                    data["secrets"].pop(path, None)
+                for path, item in pending.items():
+                    current = data["secrets"].get(path)
+                    # Another process may have written a fresher copy
+                    if current is None or current[1] <= item[1]:
+                        data["secrets"][path] = list(item)
+                if token_dirty:
+                    data["token"] = token
+                self._write(json.dumps(data).encode())
+        except Exception as e:
+            logging.warning(f"Failed to write disk cache {self.path}: {e}")
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _write(self, plaintext: bytes) -> None:
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".vaultutils-cache-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(self._fernet.encrypt(plaintext))
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _file_lock(self) -> "_FileLock":
+        return _FileLock(f"{self.path}.lock")
+
+
+class _FileLock:
+    """
+    Advisory inter-process lock on a side file; readers never take it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "_FileLock":
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """
+    Return the process-wide disk cache, or None if VAULT_DISK_CACHE_PATH is
+    not set.
+    """
+    global _disk_cache
+    if not Config.VAULT_DISK_CACHE_PATH:
+        return None
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            _disk_cache = DiskCache.from_config()
+            atexit.register(_disk_cache.flush)  # type: ignore
+    return _disk_cache
+
+
+def _after_fork_in_child() -> None:
+    # Locks may have been held by parent threads that do not exist here, and
+    # the pending flush timer died with them.
+    global _disk_cache_lock
+    _disk_cache_lock = Lock()
+    if _disk_cache is not None:
+        _disk_cache._lock = Lock()
+        _disk_cache._timer = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
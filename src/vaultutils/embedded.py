@@ -0,0 +1,124 @@
+"""
+VaultManagerClient without the server: the fetcher, token manager and cache
+run inside the calling process.
+
+Calls return the same bodies as VaultManagerClient, so code can switch
+between the two. The client is thread-safe, and fork-safe: a child process,
+e.g. a gunicorn or multiprocessing worker, gets a fetcher with its own Vault
+connections, locks and background threads on first use, while keeping the
+parent's token.
+"""
+
+import logging
+import subprocess
+from http import HTTPStatus
+from threading import Event, Thread
+from typing import Any, Callable, Dict, List, Optional
+
+from vaultutils import auth, oidc
+from vaultutils.prefetch import get_prefetch_paths
+from vaultutils.secret_fetcher import VaultSecretFetcher
+from vaultutils.watcher import Subscription
+
+
+class EmbeddedWatch:
+    """
+    A watch started by EmbeddedVaultClient.watch, delivering events to the
+    callback from a background thread.
+    """
+
+    def __init__(
+        self,
+        fetcher: VaultSecretFetcher,
+        paths: List[str],
+        callback: Callable[[Dict[str, Any]], None],
+    ) -> None:
+        self.fetcher = fetcher
+        self.callback = callback
+        self.subscription: Subscription = fetcher.watcher.subscribe(paths)
+        self._stopped = Event()
+        self._thread = Thread(target=self._run, name="vaultutils-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.fetcher.watcher.unsubscribe(self.subscription)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            event = self.subscription.get(timeout=0.5)
+            if event is None:
+                continue
+            try:
+                self.callback(event)
+            except Exception as e:
+                logging.warning(f"Watch callback failed: {e}")
+
+
+class EmbeddedVaultClient:
+    """
+    The VaultManagerClient API, served by an in-process VaultSecretFetcher.
+    """
+
+    @property
+    def fetcher(self) -> VaultSecretFetcher:
+        # Looked up on every call rather than kept, so that after a fork the
+        # child's own fetcher is used
+        return VaultSecretFetcher()
+
+    def setup(self) -> None:
+        """Setup Playwright."""
+        subprocess.run(["playwright", "install"], check=True)
+
+    def start(self) -> None:
+        """Start loading the configured prefetch paths in the background."""
+        self.fetcher.start_warm_up(get_prefetch_paths())
+
+    def stop(self) -> None:
+        """Revoke leases, stop the token renewer and close the OIDC browser."""
+        self.fetcher.revoke_leases()
+        auth.stop_token_renewer()
+        oidc.shutdown()
+
+    def authenticate(self) -> str:
+        """Authenticate with Vault using environment variables."""
+        client = self.fetcher.client
+        try:
+            auth.login_vault(client)
+        except Exception as e:
+            err_msg: str = (
+                f"Error during authentication: {HTTPStatus.INTERNAL_SERVER_ERROR} - {e}"
+            )
+            raise Exception(err_msg) from e
+        return client.token if isinstance(client.token, str) else str(client.token)
+
+    def fetch_secret(
+        self, path: str, key: Optional[str] = None, version: Optional[int] = None
+    ) -> dict[str, Any]:
+        """Fetch a secret from Vault, optionally a specific KV v2 version."""
+        try:
+            secret, entry = self.fetcher.fetch_secret_detailed(path, key, version)
+        except Exception as e:
+            return {"error": str(e)}
+        return {"secret": secret, "stale": True} if entry.stale else {"secret": secret}
+
+    def fetch_secrets(self, paths: List[str]) -> dict[str, Any]:
+        """Fetch several secrets from Vault at once."""
+        secrets, errors, stale = self.fetcher.fetch_secrets_detailed(paths)
+        body: dict[str, Any] = {"secrets": secrets, "errors": errors}
+        if stale:
+            body["stale"] = stale
+        return body
+
+    def watch(
+        self, paths: List[str], callback: Callable[[Dict[str, Any]], None]
+    ) -> EmbeddedWatch:
+        """
+        Call callback with an event dict (path, version, deleted) whenever
+        one of the secrets changes. Call stop() on the returned watch to
+        unsubscribe.
+        """
+        return EmbeddedWatch(self.fetcher, paths, callback)
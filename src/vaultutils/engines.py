@@ -0,0 +1,178 @@
+"""
+Adapters for the secrets engines VaultSecretFetcher can read from.
+
+Every engine turns a read of a path below its mount into a Secret, so the
+fetcher can cache KV data and dynamic credentials the same way.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+
+from vaultutils import metrics
+from vaultutils.cache import SecretCache
+
+if TYPE_CHECKING:
+    from hvac import Client  # type: ignore
+
+
+@dataclass
+class Secret:
+    """
+    The result of a read: the data plus its KV version or lease, if any.
+    """
+
+    data: dict
+    version: Optional[int] = None
+    lease_id: Optional[str] = None
+    lease_duration: Optional[float] = None
+    renewable: bool = False
+
+
+class SecretEngine(ABC):
+    """
+    Reads secrets from one mount.
+
+    Args:
+        client (Client): The Vault client used for this mount.
+        mount_point (str): The mount path.
+    """
+
+    name = ""
+    versioned = False
+
+    def __init__(self, client: "Client", mount_point: str) -> None:
+        self.client = client
+        self.mount_point = mount_point
+
+    @abstractmethod
+    def read(self, path: str, version: Optional[int] = None) -> Secret:
+        """Read the secret at a path below the mount."""
+
+    def current_version(self, path: str) -> Optional[int]:  # noqa: ARG002
+        """Return the current version of a secret, or None if unversioned."""
+        return None
+
+
+class KVv2Engine(SecretEngine):
+    name = "kv2"
+    versioned = True
+
+    def read(self, path: str, version: Optional[int] = None) -> Secret:
+        with metrics.VAULT_REQUEST_SECONDS.time("read"):
+            data = self.client.secrets.kv.read_secret_version(
+                path=path, version=version, mount_point=self.mount_point
+            )
+        metadata = data["data"].get("metadata") or {}
+        if data["data"]["data"] is None:
+            # A deleted or destroyed version: report it like a missing secret
+            # rather than cache None for good
+            from hvac import exceptions  # type: ignore  # noqa: PLC0415
+
+            state = "destroyed" if metadata.get("destroyed") else "deleted"
+            err_msg: str = (
+                f"Version {metadata.get('version', version)} of {path} is {state}"
+            )
+            raise exceptions.InvalidPath(err_msg)
+        return Secret(data["data"]["data"], version=metadata.get("version"))
+
+    def current_version(self, path: str) -> Optional[int]:
+        with metrics.VAULT_REQUEST_SECONDS.time("metadata"):
+            data = self.client.secrets.kv.read_secret_metadata(
+                path=path, mount_point=self.mount_point
+            )
+        return data["data"]["current_version"]
+
+
+class KVv1Engine(SecretEngine):
+    name = "kv1"
+
+    def read(self, path: str, version: Optional[int] = None) -> Secret:
+        if version is not None:
+            err_msg: str = f"Mount {self.mount_point} (kv1) has no versions"
+            raise ValueError(err_msg)
+        with metrics.VAULT_REQUEST_SECONDS.time("read"):
+            data = self.client.secrets.kv.v1.read_secret(
+                path=path, mount_point=self.mount_point
+            )
+        return Secret(data["data"])
+
+
+class DynamicEngine(SecretEngine):
+    """
+    Engines that issue leased credentials on read, e.g. database, aws or
+    rabbitmq: ``database/creds/my-role`` reads ``creds/my-role`` here.
+    """
+
+    name = "dynamic"
+
+    def read(self, path: str, version: Optional[int] = None) -> Secret:
+        if version is not None:
+            err_msg: str = f"Mount {self.mount_point} issues leases, not versions"
+            raise ValueError(err_msg)
+        with metrics.VAULT_REQUEST_SECONDS.time("lease"):
+            response = self.client.read(f"{self.mount_point}/{path}")
+        if response is None:
+            err_msg = f"No secret at {self.mount_point}/{path}"
+            raise KeyError(err_msg)
+        return Secret(
+            response.get("data") or {},
+            lease_id=response.get("lease_id") or None,
+            lease_duration=response.get("lease_duration"),
+            renewable=response.get("renewable", False),
+        )
+
+
+ENGINES: Dict[str, Type[SecretEngine]] = {
+    "kv": KVv2Engine,
+    "kv2": KVv2Engine,
+    "kv1": KVv1Engine,
+    "dynamic": DynamicEngine,
+    "database": DynamicEngine,
+    "aws": DynamicEngine,
+}
+
+
+@dataclass
+class MountSpec:
+    """
+    A mount from VAULT_MOUNTS, written as ``name[:engine][@namespace]``.
+    """
+
+    name: str
+    engine: str = "kv2"
+    namespace: Optional[str] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "MountSpec":
+        spec, _, namespace = spec.strip().partition("@")
+        name, _, engine = spec.partition(":")
+        name = name.strip("/")
+        engine = engine or "kv2"
+        if not name or engine not in ENGINES:
+            err_msg: str = (
+                f"Invalid mount {spec!r}: expected name[:engine][@namespace] "
+                f"with engine one of {sorted(ENGINES)}"
+            )
+            raise ValueError(err_msg)
+        return cls(name, engine, namespace or None)
+
+
+def parse_mounts(specs: str) -> List[MountSpec]:
+    return [MountSpec.parse(spec) for spec in specs.split(",") if spec.strip()]
+
+
+@dataclass
+class Mount:
+    """
+    A mount the fetcher routes to, with its engine and cache partition.
+    """
+
+    name: str
+    engine: SecretEngine
+    cache: SecretCache
+    namespace: Optional[str] = None
+
+    @property
+    def client(self) -> Any:
+        return self.engine.client
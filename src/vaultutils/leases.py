@@ -0,0 +1,245 @@
+"""
+Renewal and revocation of the leases behind dynamic secrets.
+
+A dynamic engine (database, aws, ...) issues new credentials on every read,
+each under a lease. The fetcher caches them until shortly before the lease
+ends, and the LeaseManager keeps the cached ones alive: a background thread
+renews every lease that is due, together with those due soon after, in one
+pass, and moves the expiry of the cache entry with each renewal. Leases are
+revoked when the server shuts down.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, replace
+from functools import partial
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional
+
+from hvac import exceptions  # type: ignore
+
+from vaultutils import metrics
+from vaultutils.cache import SecretCache
+from vaultutils.config import Config
+from vaultutils.engines import Secret
+
+
+@dataclass
+class Lease:
+    """
+    A lease the fetcher holds, and the cache entry that depends on it.
+    """
+
+    lease_id: str
+    path: str
+    cache: SecretCache
+    client: Any
+    renewable: bool
+    issued_at: float
+    expires_at: float
+
+
+class LeaseManager:
+    """
+    Tracks the leases of cached dynamic secrets and renews them in bulk.
+
+    Args:
+        with_auth (Callable): Calls Vault with a valid token for a client, as
+            VaultSecretFetcher._with_auth does.
+        fraction (float): Fraction of a lease after which it is renewed.
+        window (float): Leases due within this many seconds of the first
+            one are renewed in the same pass.
+        margin (float): Seconds before the end of a lease at which its
+            cache entry expires.
+    """
+
+    def __init__(
+        self,
+        with_auth: Callable[[Callable[[], Any], Any], Any],
+        fraction: float = Config.VAULT_LEASE_RENEW_FRACTION,
+        window: float = Config.VAULT_LEASE_RENEW_WINDOW,
+        margin: float = Config.VAULT_LEASE_EXPIRY_MARGIN,
+    ) -> None:
+        self.with_auth = with_auth
+        self.fraction = fraction
+        self.window = window
+        self.margin = margin
+        self._lock = Lock()
+        self._leases: Dict[str, Lease] = {}
+        self._wakeup = Event()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def track(
+        self, path: str, secret: Secret, cache: SecretCache, client: Any
+    ) -> float:
+        """
+        Start tracking the lease of a secret that is about to be cached.
+
+        Args:
+            path (str): The cache key of the secret.
+            secret (Secret): The secret, with its lease.
+            cache (SecretCache): The cache partition the secret goes into.
+            client (Any): The client of the mount that issued the lease.
+
+        Returns:
+            float: When the cache entry must expire, on the monotonic clock.
+        """
+        now = time.monotonic()
+        lease = Lease(
+            secret.lease_id or "",
+            path,
+            cache,
+            client,
+            secret.renewable,
+            now,
+            now + (secret.lease_duration or 0),
+        )
+        with self._lock:
+            self._leases[lease.lease_id] = lease
+        self._start()
+        self._wakeup.set()
+        return self._entry_expiry(lease)
+
+    def renew_due(self) -> int:
+        """
+        Renew every lease that is due, or will be within the window.
+
+        Leases whose secret is no longer cached are not renewed; they run out
+        on their own, or are revoked at shutdown.
+
+        Returns:
+            int: The number of leases renewed.
+        """
+        now = time.monotonic()
+        renewed = 0
+        for lease in self._due(now + self.window):
+            entry = lease.cache.peek(lease.path)
+            if entry is None or entry.lease_id != lease.lease_id:
+                # Evicted or replaced: let the lease run out
+                lease.renewable = False
+                continue
+            try:
+                response = self.with_auth(
+                    partial(lease.client.sys.renew_lease, lease_id=lease.lease_id),
+                    lease.client,
+                )
+            except exceptions.VaultError as e:
+                # The entry still expires with the lease, so the next read
+                # after that issues new credentials.
+                metrics.LEASE_RENEWALS.inc(label_value="failed")
+                logging.warning(f"Renewal of lease {lease.lease_id} failed: {e}")
+                lease.renewable = False
+                continue
+
+            renewed_at = time.monotonic()
+            lease.issued_at = renewed_at
+            lease.expires_at = renewed_at + response["lease_duration"]
+            lease.renewable = response.get("renewable", False)
+            if lease.cache.peek(lease.path) is entry:
+                # Re-insert so the eviction policy learns the new expiry
+                lease.cache.set(
+                    lease.path, replace(entry, expires_at=self._entry_expiry(lease))
+                )
+            metrics.LEASE_RENEWALS.inc(label_value="renewed")
+            renewed += 1
+        self._forget_expired(time.monotonic())
+        return renewed
+
+    def revoke_all(self) -> int:
+        """
+        Revoke every lease that has not run out yet.
+
+        Returns:
+            int: The number of leases revoked.
+        """
+        with self._lock:
+            leases = list(self._leases.values())
+            self._leases.clear()
+
+        revoked = 0
+        now = time.monotonic()
+        for lease in leases:
+            if lease.expires_at <= now:
+                continue
+            try:
+                self.with_auth(
+                    partial(lease.client.sys.revoke_lease, lease_id=lease.lease_id),
+                    lease.client,
+                )
+                revoked += 1
+            except exceptions.VaultError as e:
+                logging.warning(f"Revocation of lease {lease.lease_id} failed: {e}")
+            lease.cache.delete(lease.path)
+        if revoked:
+            logging.info(f"Revoked {revoked} Vault leases.")
+        return revoked
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def info(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            leases = list(self._leases.values())
+        due = [self._due_at(lease) for lease in leases if lease.renewable]
+        return {
+            "leases": len(leases),
+            "renewable": len(due),
+            "next_renewal_seconds": max(0.0, min(due) - now) if due else None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    def _due_at(self, lease: Lease) -> float:
+        if not lease.renewable:
+            return float("inf")
+        return lease.issued_at + (lease.expires_at - lease.issued_at) * self.fraction
+
+    def _due(self, until: float) -> List[Lease]:
+        with self._lock:
+            return [
+                lease for lease in self._leases.values() if self._due_at(lease) <= until
+            ]
+
+    def _entry_expiry(self, lease: Lease) -> float:
+        duration = lease.expires_at - lease.issued_at
+        return lease.expires_at - min(self.margin, duration / 10)
+
+    def _forget_expired(self, now: float) -> None:
+        with self._lock:
+            for lease_id in [
+                lease_id
+                for lease_id, lease in self._leases.items()
+                if lease.expires_at <= now
+            ]:
+                del self._leases[lease_id]
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = Thread(
+                target=self._run, name="vaultutils-lease-renewer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            with self._lock:
+                due = min(map(self._due_at, self._leases.values()), default=None)
+            now = time.monotonic()
+            if due is None or due > now:
+                # Wake up for the next lease to expire, so it is forgotten
+                self._wakeup.wait(timeout=None if due is None else min(due - now, 60))
+                self._wakeup.clear()
+                if due is None or time.monotonic() < due:
+                    self._forget_expired(time.monotonic())
+                    continue
+
+            try:
+                self.renew_due()
+            except Exception as e:
+                logging.warning(f"Background lease renewal failed: {e}")
+                self._stopped.wait(1.0)
@@ -0,0 +1,321 @@
+"""
+Lightweight, dependency-free metrics in the Prometheus text format.
+
+Recording a sample costs one uncontended lock and, for histograms, a bisect
+over the bucket bounds, so the instrumentation can stay on in production.
+"""
+
+import os
+import time
+from bisect import bisect_left
+from threading import Lock, get_ident
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from weakref import WeakSet
+
+Sample = Tuple[str, Dict[str, str], float]
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    formatted = (
+        f'{key}="{_escape_label_value(value)}"' for key, value in sorted(labels.items())
+    )
+    return "{" + ",".join(formatted) + "}"
+
+
+class Counter:
+    """
+    A monotonically increasing counter, optionally split by one label.
+    """
+
+    def __init__(self, name: str, documentation: str, label: Optional[str] = None):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self._lock = Lock()
+        self._values: Dict[str, float] = {}
+
+    def inc(self, amount: float = 1, label_value: str = "") -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value: str = "") -> float:
+        return self._values.get(label_value, 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            (self.name, {self.label: key} if self.label else {}, value)
+            for key, value in values.items()
+        ]
+
+
+class Histogram:
+    """
+    A cumulative histogram of durations in seconds, optionally split by one
+    label.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label: Optional[str] = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        # label value -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, seconds: float, label_value: str = "") -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                label_value, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += seconds
+
+    def time(self, label_value: str = "") -> "_Timer":
+        """Return a context manager that observes the time spent inside it."""
+        return _Timer(self, label_value)
+
+    def count(self, label_value: str = "") -> int:
+        item = self._values.get(label_value)
+        return sum(item[0]) if item else 0
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = {k: (list(c), t[0]) for k, (c, t) in self._values.items()}
+        samples: List[Sample] = []
+        for key, (counts, total) in values.items():
+            labels = {self.label: key} if self.label else {}
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append(
+                    (f"{self.name}_bucket", {**labels, "le": le}, cumulative)
+                )
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, label_value: str) -> None:
+        self.histogram = histogram
+        self.label_value = label_value
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, self.label_value)
+
+
+class TimedLock:
+    """
+    A Lock that records how long callers wait to acquire it, and which
+    thread holds it, so debug thread dumps can show lock convoys.
+    """
+
+    def __init__(self, name: str, histogram: Optional[Histogram] = None) -> None:
+        self.name = name
+        self.histogram = histogram or LOCK_WAIT_SECONDS
+        self.owner: Optional[int] = None
+        self.waiters = 0
+        self._lock = Lock()
+        _timed_locks.add(self)
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:  # noqa: FBT001, FBT002
+        if self._lock.acquire(blocking=False):
+            self.owner = get_ident()
+            self.histogram.observe(0.0, self.name)
+            return True
+        started = time.perf_counter()
+        # Not atomic: an approximate count is enough for diagnostics
+        self.waiters += 1
+        try:
+            acquired = self._lock.acquire(blocking, timeout)
+        finally:
+            self.waiters -= 1
+        if acquired:
+            self.owner = get_ident()
+        self.histogram.observe(time.perf_counter() - started, self.name)
+        return acquired
+
+    def release(self) -> None:
+        self.owner = None
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+
+_timed_locks: "WeakSet[TimedLock]" = WeakSet()
+
+
+def timed_locks() -> List[TimedLock]:
+    """
+    Return the TimedLocks alive in this process.
+    """
+    return list(_timed_locks)
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class Registry:
+    """
+    Renders registered metrics, plus samples produced by collector callbacks
+    at scrape time, in the Prometheus text exposition format.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[object] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: object) -> None:
+        self._metrics.append(metric)
+
+    def reset_locks(self) -> None:
+        """
+        Replace the metrics' locks, e.g. in a forked child where a parent
+        thread may have held one.
+        """
+        for metric in self._metrics:
+            metric._lock = Lock()  # type: ignore
+
+    def add_collector(self, collector: Collector) -> None:
+        """
+        Add a callback returning (name, type, help, samples) tuples.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families: List[Tuple[str, str, str, List[Sample]]] = []
+        for metric in self._metrics:
+            kind = "counter" if isinstance(metric, Counter) else "histogram"
+            families.append(
+                (metric.name, kind, metric.documentation, metric.samples())  # type: ignore
+            )
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines: List[str] = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(
+                f"{sample}{_format_labels(labels)} {value!r}"
+                for sample, labels, value in samples
+            )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=REGISTRY.reset_locks)
+
+
+def _registered(metric: object) -> object:
+    REGISTRY.register(metric)
+    return metric
+
+
+VAULT_REQUEST_SECONDS: Histogram = _registered(  # type: ignore
+    Histogram(
+        "vaultutils_vault_request_seconds",
+        "Round-trip time of secret reads from Vault.",
+        label="operation",
+    )
+)
+LOCK_WAIT_SECONDS: Histogram = _registered(  # type: ignore
+    Histogram(
+        "vaultutils_lock_wait_seconds",
+        "Time spent waiting for a lock or for a coalesced Vault read.",
+        label="lock",
+    )
+)
+REQUEST_SECONDS: Histogram = _registered(  # type: ignore
+    Histogram(
+        "vaultutils_request_seconds",
+        "End-to-end handler time of server requests.",
+        label="endpoint",
+    )
+)
+AUTH_LOGINS: Counter = _registered(  # type: ignore
+    Counter(
+        "vaultutils_auth_logins_total",
+        "Logins to Vault, by auth method.",
+        label="method",
+    )
+)
+AUTH_RENEWALS: Counter = _registered(  # type: ignore
+    Counter("vaultutils_auth_renewals_total", "Successful token renewals.")
+)
+LEASE_RENEWALS: Counter = _registered(  # type: ignore
+    Counter(
+        "vaultutils_lease_renewals_total",
+        "Renewals of dynamic secret leases, by outcome.",
+        label="outcome",
+    )
+)
+CIRCUIT_OPENED: Counter = _registered(  # type: ignore
+    Counter("vaultutils_circuit_opened_total", "Times the Vault circuit opened.")
+)
+CIRCUIT_REJECTIONS: Counter = _registered(  # type: ignore
+    Counter(
+        "vaultutils_circuit_rejections_total",
+        "Vault calls not made because the circuit was open.",
+    )
+)
+UPSTREAM_QUEUE_SECONDS: Histogram = _registered(  # type: ignore
+    Histogram(
+        "vaultutils_upstream_queue_seconds",
+        "Time Vault calls waited for a concurrency slot, by priority.",
+        label="priority",
+    )
+)
+UPSTREAM_BACKOFFS: Counter = _registered(  # type: ignore
+    Counter(
+        "vaultutils_upstream_backoffs_total",
+        "Backoffs after Vault answered 429 or 5xx.",
+    )
+)
@@ -0,0 +1,395 @@
+"""
+The browser side of OIDC logins.
+
+A login opens Vault's authorization URL in a browser; the identity provider
+then redirects the browser to a local callback listener with the
+authorization code. A callback is matched to its login by the ``state``
+parameter, so logins running at the same time share one listener. The
+listener only binds VAULT_SERVER_HOST and is closed once no login is
+waiting, so other processes (other workers, the Vault CLI) can take the
+port between logins. For headless logins, the Playwright browser is
+started on first use and kept for later logins.
+"""
+
+import logging
+import os
+import time
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+from vaultutils.config import Config
+
+SELF_CLOSING_PAGE = """
+<!doctype html>
+<html>
+<head>
+<script>
+// Closes IE, Edge, Chrome, Brave
+window.onload = function load() {
+  window.open("", "_self", "");
+  window.close();
+};
+</script>
+</head>
+<body>
+  <p>Authentication successful, you can close the browser now.</p>
+  <script>
+    // Needed for Firefox security
+    setTimeout(function() {
+          window.close()
+    }, 5000);
+  </script>
+</body>
+</html>
+"""
+
+
+class PendingLogin:
+    """
+    A login waiting for its callback.
+    """
+
+    def __init__(self, state: str) -> None:
+        self.state = state
+        self.code: Optional[str] = None
+        self.error: Optional[str] = None
+        self.done = Event()
+
+    def resolve(self, code: str) -> None:
+        self.code = code
+        self.done.set()
+
+    def fail(self, error: str) -> None:
+        if not self.done.is_set():
+            self.error = error
+            self.done.set()
+
+    def wait(self, timeout: float) -> str:
+        """
+        Wait for the authorization code.
+
+        Args:
+            timeout (float): Seconds to wait.
+
+        Returns:
+            str: The authorization code.
+
+        Raises:
+            TimeoutError: If no callback arrived in time.
+            ValueError: If the login failed.
+        """
+        if not self.done.wait(timeout):
+            err_msg: str = f"OIDC callback not received within {timeout} seconds"
+            raise TimeoutError(err_msg)
+        if self.code is None:
+            err_msg = f"OIDC login failed: {self.error}"
+            raise ValueError(err_msg)
+        return self.code
+
+
+class CallbackServer:
+    """
+    The local listener for OIDC redirects, serving any number of logins.
+
+    The port is bound when the server is created, so the browser can be
+    sent to the authorization URL as soon as the constructor returns.
+
+    Args:
+        port (int): The port to listen on, 0 for any free port.
+        host (str): The address to listen on, loopback by default.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1") -> None:
+        self._lock = Lock()
+        self._pending: Dict[str, PendingLogin] = {}
+        # Logins using this listener, see open_login and close_login
+        self.logins = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.port: int = self.httpd.server_address[1]
+        logging.info(f"Listening for OIDC callbacks on {host}:{self.port}")
+        Thread(
+            target=self.httpd.serve_forever, name="vaultutils-oidc", daemon=True
+        ).start()
+
+    def expect(self, state: str) -> PendingLogin:
+        """
+        Register a login, to be resolved by the callback carrying its state.
+        """
+        pending = PendingLogin(state)
+        with self._lock:
+            self._pending[state] = pending
+        return pending
+
+    def cancel(self, state: str) -> None:
+        with self._lock:
+            pending = self._pending.pop(state, None)
+        if pending is not None:
+            pending.fail("cancelled")
+
+    def deliver(self, params: Dict[str, Any]) -> bool:
+        """
+        Hand the parameters of a callback to the login waiting for them.
+
+        Returns:
+            bool: False if no login is waiting for the callback's state.
+        """
+        state = params.get("state", [""])[0]
+        with self._lock:
+            pending = self._pending.pop(state, None)
+        if pending is None:
+            return False
+        if "code" in params:
+            pending.resolve(params["code"][0])
+        else:
+            pending.fail(params.get("error", ["no authorization code"])[0])
+        return True
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class CallbackHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                query = urllib.parse.urlsplit(self.path).query
+                if server.deliver(urllib.parse.parse_qs(query)):
+                    self.send_response(HTTPStatus.OK)
+                    self.end_headers()
+                    self.wfile.write(str.encode(SELF_CLOSING_PAGE))
+                else:
+                    self.send_error(HTTPStatus.BAD_REQUEST, "Unknown or expired login")
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                logging.debug(format % args)
+
+        return CallbackHandler
+
+
+def _sync_playwright() -> Any:
+    try:
+        from playwright.sync_api import (  # type: ignore  # noqa: PLC0415
+            sync_playwright,
+        )
+    except ModuleNotFoundError as exc:
+        msg = "Playwright is required for headless OIDC authentication"
+        raise RuntimeError(msg) from exc
+    return sync_playwright
+
+
+class HeadlessBrowser:
+    """
+    A headless Firefox kept running between logins.
+
+    Playwright's sync API must be used from the thread that started it, so
+    the browser lives in a thread of its own and is sent the pages to open.
+    The thread does not wait for a login to finish before opening the next
+    page; it closes each page once its login is done or timed out. Pages
+    share one browser context, which keeps the identity provider's session
+    cookies: later logins usually redirect straight back.
+
+    Args:
+        trusted_uris (str): Hosts allowed to negotiate Kerberos/SPNEGO.
+        delegation_uris (str): Hosts credentials may be delegated to.
+    """
+
+    def __init__(self, trusted_uris: str, delegation_uris: str) -> None:
+        self.trusted_uris = trusted_uris
+        self.delegation_uris = delegation_uris
+        self._jobs: Queue = Queue()
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+    def open(self, url: str, pending: PendingLogin, timeout: float) -> None:
+        """
+        Open url in a new page, closed once the login is done or timed out.
+        """
+        sync_playwright = _sync_playwright()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(
+                    target=self._run,
+                    args=(sync_playwright,),
+                    name="vaultutils-oidc-browser",
+                    daemon=True,
+                )
+                self._thread.start()
+        self._jobs.put((url, pending, timeout))
+
+    def close(self) -> None:
+        self._jobs.put(None)
+
+    def _run(self, sync_playwright: Any) -> None:
+        try:
+            with sync_playwright() as playwright:
+                browser = playwright.firefox.launch(
+                    headless=True,
+                    firefox_user_prefs={
+                        "network.negotiate-auth.trusted-uris": self.trusted_uris,
+                        "network.negotiate-auth.delegation-uris": self.delegation_uris,
+                    },
+                )
+                context = browser.new_context()
+                pages: List[Tuple[Any, PendingLogin, float]] = []
+                while True:
+                    try:
+                        # Wake up regularly while pages wait for their login
+                        job = self._jobs.get(timeout=0.1 if pages else None)
+                    except Empty:
+                        job = ()
+                    if job is None:
+                        break
+                    if job:
+                        page = self._open_page(context, *job)
+                        if page is not None:
+                            pages.append(page)
+                    pages = self._close_finished(pages)
+                browser.close()
+        except Exception as e:
+            logging.warning(f"Headless browser for OIDC logins failed: {e}")
+            # Fail the logins already queued instead of letting them time out
+            while not self._jobs.empty():
+                job = self._jobs.get_nowait()
+                if job is not None:
+                    job[1].fail(str(e))
+
+    @staticmethod
+    def _open_page(
+        context: Any, url: str, pending: PendingLogin, timeout: float
+    ) -> Optional[Tuple[Any, PendingLogin, float]]:
+        """
+        Start a login in a new page, without waiting for it to finish.
+
+        Returns:
+            Optional[Tuple[Any, PendingLogin, float]]: The page, its login and
+            the time it is given up, or None if the page failed to open.
+        """
+        deadline = time.monotonic() + timeout
+        page = context.new_page()
+        try:
+            # Only wait for the first response: the identity provider keeps
+            # redirecting on its own while other logins are started
+            page.goto(url, timeout=timeout * 1000, wait_until="commit")
+        except Exception as e:
+            pending.fail(str(e))
+            HeadlessBrowser._close_page(page)
+            return None
+        return page, pending, deadline
+
+    @staticmethod
+    def _close_finished(
+        pages: List[Tuple[Any, PendingLogin, float]],
+    ) -> List[Tuple[Any, PendingLogin, float]]:
+        """
+        Close the pages whose login is done or timed out; return the others.
+        """
+        now = time.monotonic()
+        remaining = []
+        for page, pending, deadline in pages:
+            if pending.done.is_set() or now >= deadline:
+                HeadlessBrowser._close_page(page)
+            else:
+                remaining.append((page, pending, deadline))
+        return remaining
+
+    @staticmethod
+    def _close_page(page: Any) -> None:
+        try:
+            page.close()
+        except Exception as e:
+            # The callback page may already have closed itself
+            logging.debug(f"Closing OIDC page failed: {e}")
+
+
+_lock = Lock()
+_servers: Dict[int, CallbackServer] = {}
+_browser: Optional[HeadlessBrowser] = None
+
+
+def open_login(port: int, state: str) -> Tuple[CallbackServer, PendingLogin]:
+    """
+    Register a login with the callback listener for a port, starting the
+    listener if no other login is using it.
+
+    Every call must be followed by close_login once the login is over.
+
+    Args:
+        port (int): The callback port.
+        state (str): The state parameter of the authorization URL.
+
+    Returns:
+        Tuple[CallbackServer, PendingLogin]: The listener, and the login
+        waiting for its callback.
+    """
+    with _lock:
+        server = _servers.get(port)
+        if server is None:
+            server = _servers[port] = CallbackServer(port, Config.VAULT_SERVER_HOST)
+        server.logins += 1
+        return server, server.expect(state)
+
+
+def close_login(server: CallbackServer, state: str) -> None:
+    """
+    End a login registered with open_login, closing the listener if no
+    other login is using it.
+    """
+    server.cancel(state)
+    with _lock:
+        server.logins -= 1
+        if server.logins > 0:
+            return
+        for port, current in list(_servers.items()):
+            if current is server:
+                del _servers[port]
+    server.close()
+
+
+def get_browser() -> HeadlessBrowser:
+    """
+    Return the shared headless browser, started on the first login.
+    """
+    global _browser
+    with _lock:
+        if _browser is None:
+            _browser = HeadlessBrowser(
+                Config.NETWORK_NEGOTIATE_AUTH_TRUSTED_URIS,
+                Config.NETWORK_NEGOTIATE_AUTH_DELEGATION_URIS,
+            )
+        return _browser
+
+
+def shutdown() -> None:
+    """
+    Stop the callback listeners and the headless browser.
+    """
+    global _browser
+    with _lock:
+        servers, browser = list(_servers.values()), _browser
+        _servers.clear()
+        _browser = None
+    for server in servers:
+        server.close()
+    if browser is not None:
+        browser.close()
+
+
+def _after_fork_in_child() -> None:
+    # The listener and browser threads belong to the parent: close the
+    # inherited sockets so the child can start its own on first use.
+    global _lock, _browser
+    _lock = Lock()
+    for server in _servers.values():
+        server.httpd.socket.close()
+    _servers.clear()
+    _browser = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
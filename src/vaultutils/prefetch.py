@@ -0,0 +1,150 @@
+"""
+Manifests of secret paths to load into the cache before they are requested.
+
+A manifest is a JSON or YAML list of paths (or a mapping with a ``paths``
+list), or a plain text file with one path per line. Paths can also be given
+directly in VAULT_PREFETCH_PATHS.
+"""
+
+import json
+import os
+import time
+from threading import Event, Lock
+from typing import Any, Dict, List, Optional
+
+from vaultutils.config import Config
+
+
+def load_manifest(path: str) -> List[str]:
+    """
+    Read the paths listed in a manifest file.
+
+    Args:
+        path (str): The manifest file.
+
+    Returns:
+        List[str]: The secret paths, in order.
+
+    Raises:
+        ValueError: If the manifest cannot be parsed.
+        RuntimeError: If the manifest is YAML and PyYAML is not installed.
+    """
+    with open(path) as manifest:
+        content = manifest.read()
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".yaml", ".yml"):
+        try:
+            import yaml  # type: ignore  # noqa: PLC0415
+        except ModuleNotFoundError as exc:
+            msg = "PyYAML is required to read YAML manifests: pip install vaultutils[yaml]"
+            raise RuntimeError(msg) from exc
+        try:
+            data: Any = yaml.safe_load(content)
+        except yaml.YAMLError as exc:
+            err_msg: str = f"Manifest {path} is not valid YAML: {exc}"
+            raise ValueError(err_msg) from exc
+    elif extension == ".json":
+        data = json.loads(content)
+    else:
+        data = [
+            line.strip()
+            for line in content.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+    if isinstance(data, dict):
+        data = data.get("paths")
+    if not isinstance(data, list) or not all(isinstance(p, str) for p in data):
+        err_msg = f"Manifest {path} must contain a list of secret paths"
+        raise ValueError(err_msg)
+    return data
+
+
+def use_manifest(path: str) -> List[str]:
+    """
+    Validate a manifest and make it the one servers warm up from.
+
+    Args:
+        path (str): The manifest file.
+
+    Returns:
+        List[str]: The secret paths it lists.
+    """
+    paths = load_manifest(path)
+    Config.VAULT_PREFETCH_MANIFEST = os.path.abspath(path)
+    return paths
+
+
+def get_prefetch_paths() -> List[str]:
+    """
+    Return the paths from VAULT_PREFETCH_MANIFEST and VAULT_PREFETCH_PATHS,
+    without duplicates.
+
+    Returns:
+        List[str]: The secret paths to prefetch.
+    """
+    paths: List[str] = []
+    if Config.VAULT_PREFETCH_MANIFEST:
+        paths.extend(load_manifest(Config.VAULT_PREFETCH_MANIFEST))
+    paths.extend(p.strip() for p in Config.VAULT_PREFETCH_PATHS.split(",") if p.strip())
+    return list(dict.fromkeys(paths))
+
+
+class WarmUpStatus:
+    """
+    Progress of a fetcher's warm-up, as reported by the /ready endpoint.
+
+    A fetcher that was never asked to warm up is ready straight away.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._done = Event()
+        self._done.set()
+        self.state = "idle"
+        self.paths = 0
+        self.loaded = 0
+        self.errors: Dict[str, str] = {}
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def begin(self, paths: int) -> bool:
+        """
+        Mark the warm-up as started. Returns False if it already was.
+        """
+        with self._lock:
+            if self.state != "idle":
+                return False
+            self.state = "running"
+            self.paths = paths
+            self.started_at = time.monotonic()
+            self._done.clear()
+            return True
+
+    def finish(self, loaded: int, errors: Dict[str, str]) -> None:
+        with self._lock:
+            self.state = "done"
+            self.loaded = loaded
+            self.errors = errors
+            if self.started_at is not None:
+                self.seconds = time.monotonic() - self.started_at
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self._done.is_set(),
+                "state": self.state,
+                "paths": self.paths,
+                "loaded": self.loaded,
+                "errors": dict(self.errors),
+                "seconds": self.seconds,
+            }
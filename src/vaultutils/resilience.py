@@ -0,0 +1,153 @@
+"""
+Failure handling around Vault calls.
+
+A circuit breaker stops calling Vault once it keeps failing, so requests
+fail fast (or are answered from a last-known-good value) instead of each
+waiting for the HTTP timeout. After a cool-down a single probe is let
+through; its outcome closes the circuit again or keeps it open.
+"""
+
+import time
+from http import HTTPStatus
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import requests  # type: ignore
+from hvac import exceptions  # type: ignore
+
+from vaultutils import metrics
+from vaultutils.config import Config
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Errors that say Vault is unreachable or unhealthy, as opposed to errors
+# about the request itself (missing path, denied, invalid input)
+OUTAGE_ERRORS = (
+    exceptions.VaultDown,
+    exceptions.InternalServerError,
+    exceptions.BadGateway,
+    exceptions.RateLimitExceeded,
+    exceptions.UnexpectedError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+# Errors worth remembering for a short while: asking again will not help
+NEGATIVE_ERRORS = (exceptions.InvalidPath, exceptions.Forbidden)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling Vault while the circuit is open.
+    """
+
+
+def is_outage(exc: BaseException) -> bool:
+    return isinstance(exc, (CircuitOpenError, *OUTAGE_ERRORS))
+
+
+def error_status(exc: BaseException) -> int:
+    """
+    Return the HTTP status the server answers with for an exception.
+
+    Args:
+        exc (BaseException): The exception raised while handling a request.
+
+    Returns:
+        int: The status code.
+    """
+    if isinstance(exc, (KeyError, exceptions.InvalidPath)):
+        return HTTPStatus.NOT_FOUND
+    if isinstance(exc, exceptions.Forbidden):
+        return HTTPStatus.FORBIDDEN
+    if isinstance(exc, (ValueError, exceptions.InvalidRequest)):
+        return HTTPStatus.BAD_REQUEST
+    if isinstance(exc, (CircuitOpenError, exceptions.VaultDown)):
+        return HTTPStatus.SERVICE_UNAVAILABLE
+    if isinstance(exc, OUTAGE_ERRORS):
+        return HTTPStatus.BAD_GATEWAY
+    return HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive outage errors, and lets
+    one probe through ``reset_timeout`` seconds later.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a probe.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = Config.VAULT_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = Config.VAULT_CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = Lock()
+
+    def call(self, func: Callable[[], T]) -> T:
+        """
+        Call func unless the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a
+                probe already in flight.
+        """
+        self._before_call()
+        try:
+            result = func()
+        except BaseException as e:
+            self._after_call(failed=is_outage(e))
+            raise
+        self._after_call(failed=False)
+        return result
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "open_seconds": (
+                    time.monotonic() - self.opened_at
+                    if self.opened_at is not None
+                    else None
+                ),
+            }
+
+    def _before_call(self) -> None:
+        if self.state == CLOSED:
+            return
+        with self._lock:
+            if self.state == OPEN and self.opened_at is not None:
+                if time.monotonic() - self.opened_at >= self.reset_timeout:
+                    # This caller is the probe; everybody else keeps failing fast
+                    self.state = HALF_OPEN
+                    return
+            if self.state != CLOSED:
+                metrics.CIRCUIT_REJECTIONS.inc()
+                err_msg: str = "Vault is unavailable (circuit open)"
+                raise CircuitOpenError(err_msg)
+
+    def _after_call(self, *, failed: bool) -> None:
+        if not failed and self.state == CLOSED and not self.failures:
+            return
+        with self._lock:
+            if not failed:
+                self.state = CLOSED
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    metrics.CIRCUIT_OPENED.inc()
+                self.state = OPEN
+                self.opened_at = time.monotonic()
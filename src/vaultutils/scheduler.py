@@ -0,0 +1,247 @@
+"""
+Scheduling of the calls the fetcher makes to Vault.
+
+Every Vault call takes a slot from an UpstreamScheduler. The number of
+slots adapts to Vault's latency: it grows while latency stays near its
+long-term average and shrinks when requests start to queue up in Vault,
+in the style of a gradient concurrency limiter. It is also halved on
+every 429 or 5xx response. Those responses also pause all calls for a
+jittered, exponentially growing delay, so sidecars that restart together
+do not hit Vault in lockstep. Calls rejected with 429 are retried after
+the pause; other errors are left to the circuit breaker and the
+last-known-good values.
+
+Callers waiting for a slot are served by priority: reads a user is
+waiting for go before background refreshes, which go before prefetches.
+The priority of a call is taken from the context it runs in, see
+upstream_priority.
+"""
+
+import heapq
+import itertools
+import math
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Condition
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from hvac import exceptions  # type: ignore
+
+from vaultutils import metrics
+from vaultutils.config import Config
+
+T = TypeVar("T")
+
+USER, REFRESH, PREFETCH = 0, 1, 2
+PRIORITY_NAMES = {USER: "user", REFRESH: "refresh", PREFETCH: "prefetch"}
+
+# Vault is overloaded or failing: back off and lower the limit
+OVERLOAD_ERRORS = (
+    exceptions.RateLimitExceeded,
+    exceptions.InternalServerError,
+    exceptions.BadGateway,
+    exceptions.VaultDown,
+)
+
+_priority: ContextVar[int] = ContextVar("vaultutils_upstream_priority", default=USER)
+
+
+@contextmanager
+def upstream_priority(priority: int) -> Iterator[None]:
+    """
+    Give the Vault calls made in this block a priority: USER (the
+    default), REFRESH or PREFETCH.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class AdaptiveLimiter:
+    """
+    A concurrency limit that follows Vault's latency.
+
+    The latency of each call is compared with its long-term average. While
+    they match, the limit grows by about its square root per adjustment, the
+    headroom for queueing; when calls get slower than ``tolerance`` times
+    the average, the limit shrinks in proportion. Overload responses halve
+    it (multiplicative decrease).
+
+    Args:
+        initial (float): The starting limit.
+        min_limit (float): The lowest limit.
+        max_limit (float): The highest limit.
+        tolerance (float): Latency increase, as a ratio of the average,
+            accepted before the limit shrinks.
+        smoothing (float): Weight of each adjustment, between 0 and 1.
+    """
+
+    def __init__(
+        self,
+        initial: float = Config.VAULT_UPSTREAM_INITIAL_CONCURRENCY,
+        min_limit: float = Config.VAULT_UPSTREAM_MIN_CONCURRENCY,
+        max_limit: float = Config.VAULT_UPSTREAM_MAX_CONCURRENCY,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.short_rtt: Optional[float] = None
+        self.long_rtt: Optional[float] = None
+
+    def on_success(self, rtt: float, inflight: int) -> None:
+        """
+        Adjust the limit after a call that took rtt seconds, with inflight
+        calls running when it started.
+        """
+        self.short_rtt = (
+            rtt if self.short_rtt is None else 0.5 * self.short_rtt + 0.5 * rtt
+        )
+        self.long_rtt = (
+            rtt if self.long_rtt is None else 0.99 * self.long_rtt + 0.01 * rtt
+        )
+        if self.long_rtt > 2 * self.short_rtt:
+            # Latency dropped for good: let the average catch up quickly
+            self.long_rtt *= 0.95
+        if self.short_rtt <= 0:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        if gradient == 1.0 and inflight * 2 < self.limit:
+            # Not using the limit: no evidence that a higher one would work
+            return
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = (1 - self.smoothing) * self.limit + self.smoothing * target
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+    def on_overload(self) -> None:
+        self.limit = max(self.min_limit, self.limit / 2)
+
+
+class UpstreamScheduler:
+    """
+    Runs calls to Vault within the limiter's concurrency limit, in priority
+    order, backing off on overload responses.
+
+    Args:
+        limiter (Optional[AdaptiveLimiter]): The concurrency limit.
+        retries (int): Retries of a call rejected with 429.
+        backoff_base (float): Upper bound of the first backoff, in seconds.
+        backoff_max (float): Upper bound of any backoff, in seconds.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[AdaptiveLimiter] = None,
+        retries: int = Config.VAULT_UPSTREAM_RETRIES,
+        backoff_base: float = 0.1,
+        backoff_max: float = Config.VAULT_UPSTREAM_BACKOFF_MAX,
+    ) -> None:
+        self.limiter = limiter or AdaptiveLimiter()
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.inflight = 0
+        self._cond = Condition()
+        self._queue: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._overloads = 0
+        self._paused_until = 0.0
+
+    def call(self, func: Callable[[], T], priority: Optional[int] = None) -> T:
+        """
+        Call func once a slot is free.
+
+        Args:
+            func (Callable[[], T]): The Vault call.
+            priority (Optional[int]): USER, REFRESH or PREFETCH; by default
+                the priority set with upstream_priority.
+
+        Returns:
+            T: Its result.
+        """
+        priority = _priority.get() if priority is None else priority
+        attempt = 0
+        while True:
+            inflight = self._acquire(priority)
+            started = time.monotonic()
+            try:
+                result = func()
+            except OVERLOAD_ERRORS as e:
+                self._release(overloaded=True)
+                if (
+                    not isinstance(e, exceptions.RateLimitExceeded)
+                    or attempt >= self.retries
+                ):
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                self._release()
+                raise
+            self._release(rtt=time.monotonic() - started, inflight=inflight)
+            return result
+
+    def info(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": round(self.limiter.limit, 2),
+                "inflight": self.inflight,
+                "queued": len(self._queue),
+                "backoff_seconds": max(0.0, self._paused_until - time.monotonic()),
+            }
+
+    def _acquire(self, priority: int) -> int:
+        ticket = (priority, next(self._sequence))
+        started = time.perf_counter()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if (
+                    pause <= 0
+                    and self._queue[0] is ticket
+                    and self.inflight < self.limiter.limit
+                ):
+                    break
+                self._cond.wait(timeout=pause if pause > 0 else None)
+            heapq.heappop(self._queue)
+            self.inflight += 1
+            inflight = self.inflight
+            # The next caller in line may fit under the limit as well
+            self._cond.notify_all()
+        metrics.UPSTREAM_QUEUE_SECONDS.observe(
+            time.perf_counter() - started, PRIORITY_NAMES.get(priority, str(priority))
+        )
+        return inflight
+
+    def _release(
+        self,
+        rtt: Optional[float] = None,
+        inflight: int = 0,
+        *,
+        overloaded: bool = False,
+    ) -> None:
+        with self._cond:
+            self.inflight -= 1
+            if overloaded:
+                self._overloads += 1
+                self.limiter.on_overload()
+                # Full jitter: a random delay up to an exponentially growing cap
+                cap = min(self.backoff_max, self.backoff_base * 2**self._overloads)
+                self._paused_until = max(
+                    self._paused_until,
+                    time.monotonic() + random.uniform(0, cap),  # noqa: S311
+                )
+                metrics.UPSTREAM_BACKOFFS.inc()
+            elif rtt is not None:
+                self._overloads = 0
+                self.limiter.on_success(rtt, inflight)
+            self._cond.notify_all()
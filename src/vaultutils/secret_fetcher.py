@@ -1,36 +1,174 @@
-from typing import Any, Optional
+import copy
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import replace
+from functools import partial
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
 
-from cachetools import TTLCache
-from hvac import Client  # type: ignore
+from hvac import exceptions  # type: ignore
 
-from vaultutils.auth import login_vault
+from vaultutils import metrics
+from vaultutils.auth import invalidate_token, login_vault
+from vaultutils.cache import CacheEntry, SecretCache
 from vaultutils.config import Config
-from vaultutils.utils import singleton
+from vaultutils.disk_cache import DiskCache, get_disk_cache
+from vaultutils.engines import ENGINES, Mount, MountSpec, Secret, parse_mounts
+from vaultutils.leases import LeaseManager
+from vaultutils.prefetch import WarmUpStatus
+from vaultutils.resilience import NEGATIVE_ERRORS, CircuitBreaker, is_outage
+from vaultutils.scheduler import (
+    PREFETCH,
+    REFRESH,
+    UpstreamScheduler,
+    upstream_priority,
+)
+from vaultutils.shared_cache import SharedCacheClient
+from vaultutils.utils import SingleFlight, create_vault_client, singleton
+from vaultutils.watcher import SecretWatcher
+
+T = TypeVar("T")
+
+
+def select_key(path: str, secrets: dict, key: Optional[str]) -> Any:
+    """
+    Return the whole secret, or a single key of it.
+
+    Args:
+        path (str): The path of the secret.
+        secrets (dict): The secret data.
+        key (Optional[str]): The specific key within the secret.
+
+    Returns:
+        Any: The secret value.
+
+    Raises:
+        KeyError: If the key is not found in the secret.
+    """
+    if key:
+        if key in secrets:
+            return secrets[key]
+        else:
+            err_msg: str = f"Key {key} not found in path {path}"
+            raise KeyError(err_msg)
+    else:
+        return secrets
+
+
+def fetch_request_error(payload: Any) -> Optional[str]:
+    """
+    Check the arguments of a fetch-secret request before any Vault read.
+
+    Args:
+        payload (Any): The decoded request, with "path" and optionally
+            "key" and "version".
+
+    Returns:
+        Optional[str]: Why the request is malformed, or None if it is not.
+    """
+    if not isinstance(payload, dict):
+        return "The request must be a JSON object"
+    path, key, version = payload.get("path"), payload.get("key"), payload.get("version")
+    if not isinstance(path, str) or not path:
+        return "'path' must be a non-empty string"
+    if key is not None and not isinstance(key, str):
+        return "'key' must be a string"
+    if version is not None and (
+        not isinstance(version, int) or isinstance(version, bool)
+    ):
+        return "'version' must be an integer"
+    return None
 
 
 @singleton
 class VaultSecretFetcher:
     """
     A class to fetch secrets from Vault and cache them using an in-memory cache.
+
+    Cache hits are served without taking any lock. Concurrent misses for the
+    same path are coalesced into a single Vault read, while misses for
+    different paths are fetched in parallel.
+
+    Entries older than the soft TTL are still served, but trigger a refresh in
+    a background worker so hot paths are re-read before the hard TTL expires
+    them. With VAULT_CACHE_REVALIDATE, a refresh first compares the KV v2
+    current_version with the cached one and only re-reads the data if it
+    changed.
+
+    Reads of a specific version never change, so they are kept in a separate
+    LRU cache without expiry.
+
+    Paths whose first segment names a mount in VAULT_MOUNTS are routed to
+    that mount, which has its own engine (KV v1, KV v2 or a dynamic engine),
+    cache partition and, per namespace, its own client, connection pool and
+    token.
+    Other paths are read from VAULT_MOUNT_POINT.
+
+    Credentials from dynamic engines are cached until shortly before their
+    lease ends and are never refreshed early, since every read would issue
+    new ones; the LeaseManager renews the leases while they are cached.
     """
 
     def __init__(self):
         """
         Initialize the VaultSecretFetcher.
         """
-        self.client = Client(url=Config.VAULT_URL)
+        self.client = create_vault_client(namespace=Config.VAULT_NAMESPACE)
         self.mount_point = Config.VAULT_MOUNT_POINT
-        self.cache = TTLCache(
-            maxsize=100, ttl=300
-        )  # Cache with max size 100 and TTL 300 seconds
+        self.soft_ttl = Config.VAULT_CACHE_SOFT_TTL
+        self.cache = SecretCache.from_config()
+        self.mounts: Dict[str, Mount] = {}
+        self.default_mount = self._build_mounts(parse_mounts(Config.VAULT_MOUNTS))
+        self.versions = SecretCache(
+            policy="lru", maxsize=Config.VAULT_CACHE_MAXSIZE, ttl=math.inf
+        )
+        self.revalidate = Config.VAULT_CACHE_REVALIDATE
+        self.breaker = CircuitBreaker()
+        # Short-lived memory of paths Vault said are missing or denied
+        self.negative = SecretCache(
+            policy="ttl",
+            maxsize=Config.VAULT_CACHE_MAXSIZE,
+            ttl=Config.VAULT_NEGATIVE_CACHE_TTL,
+        )
+        # Last-known-good values, served (marked stale) while Vault fails
+        self.last_good = SecretCache(
+            policy="lru",
+            maxsize=Config.VAULT_CACHE_MAXSIZE,
+            ttl=Config.VAULT_STALE_MAX_AGE,
+        )
+        self.scheduler = UpstreamScheduler()
+        self.leases = LeaseManager(self._with_background_auth)
+        self.watcher = SecretWatcher(self.check_version)
+        self._cache_lock = Lock()
+        self._inflight = SingleFlight(
+            on_wait=partial(metrics.LOCK_WAIT_SECONDS.observe, label_value="inflight")
+        )
+        self._refreshing: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batch_executor: Optional[ThreadPoolExecutor] = None
+        self._shared: Optional[SharedCacheClient] = None
+        self.warm_up_status = WarmUpStatus()
+        self._disk: Optional[DiskCache] = get_disk_cache()
+        if self._disk is not None:
+            self._restore_from_disk(self._disk)
 
-    def fetch_secret(self, path: str, key: Optional[str] = None) -> Any:
+    def fetch_secret(
+        self, path: str, key: Optional[str] = None, version: Optional[int] = None
+    ) -> Any:
         """
         Fetch a secret from Vault.
 
         Args:
             path (str): The path of the secret.
             key (Optional[str]): The specific key within the secret.
+            version (Optional[int]): A KV v2 version to read instead of the
+                latest one.
 
         Returns:
             Any: The secret value.
@@ -38,32 +176,563 @@ class VaultSecretFetcher:
         Raises:
             KeyError: If the key is not found in the secret.
         """
-        if path not in self.cache:
-            login_vault(self.client)
-            self.cache[path] = self._fetch_secret_from_vault(path)
+        return self.fetch_secret_detailed(path, key, version)[0]
 
-        secrets = self.cache[path]
+    def fetch_secret_detailed(
+        self, path: str, key: Optional[str] = None, version: Optional[int] = None
+    ) -> Tuple[Any, CacheEntry]:
+        """
+        Fetch a secret like fetch_secret, together with the cache entry it
+        was taken from: its version, age, and whether it is stale.
 
-        if key:
-            if key in secrets:
-                return secrets[key]
+        A stale value is the last one read successfully, returned because
+        Vault is failing or the circuit to it is open.
+
+        Returns:
+            Tuple[Any, CacheEntry]: The secret value, and its cache entry.
+        """
+        if version is not None:
+            pinned = self._get_version(path, version)
+            return select_key(path, pinned.value, key), pinned
+
+        entry = self._get_cached(path)
+        if entry is None:
+            entry = self._inflight.do(path, lambda: self._load_secret(path))
+
+        return select_key(path, entry.value, key), entry
+
+    def fetch_secrets(
+        self, paths: Iterable[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Fetch several secrets at once.
+
+        Cache hits are answered immediately; misses are read from Vault
+        concurrently, with at most VAULT_BATCH_CONCURRENCY reads in flight.
+
+        Args:
+            paths (Iterable[str]): The paths of the secrets.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, str]]: The secrets by path, and an
+            error message for every path that could not be fetched.
+        """
+        secrets, errors, _ = self.fetch_secrets_detailed(paths)
+        return secrets, errors
+
+    def fetch_secrets_detailed(
+        self, paths: Iterable[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, str], List[str]]:
+        """
+        Fetch several secrets like fetch_secrets, and list the stale ones.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, str], List[str]]: The secrets by
+            path, the errors by path, and the paths whose value is stale.
+        """
+        stale: List[str] = []
+        secrets: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        misses = []
+        for path in dict.fromkeys(paths):
+            entry = self._get_cached(path)
+            if entry is None:
+                misses.append(path)
             else:
-                err_msg: str = f"Key {key} not found in path {path}"
-                raise KeyError(err_msg)
+                secrets[path] = entry.value
+
+        if misses:
+            executor = self._get_batch_executor()
+            futures = {
+                # Run in a copy of the caller's context: it holds the priority
+                # of the Vault calls
+                path: executor.submit(
+                    copy_context().run,
+                    self._inflight.do,
+                    path,
+                    partial(self._load_secret, path),
+                )
+                for path in misses
+            }
+            for path, future in futures.items():
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    errors[path] = str(e)
+                    continue
+                secrets[path] = entry.value
+                if entry.stale:
+                    stale.append(path)
+
+        return secrets, errors, stale
+
+    def start_warm_up(self, paths: Iterable[str]) -> None:
+        """
+        Load secrets into the cache in a background thread.
+
+        The thread waits until logging in to Vault succeeds, then reads all
+        paths in parallel like fetch_secrets. Progress is reported by
+        warm_up_status; only the first call has any effect.
+
+        Args:
+            paths (Iterable[str]): The paths of the secrets.
+        """
+        paths = list(dict.fromkeys(paths))
+        if not paths or not self.warm_up_status.begin(len(paths)):
+            return
+        Thread(
+            target=self._warm_up, args=(paths,), name="vaultutils-warm-up", daemon=True
+        ).start()
+
+    def _warm_up(self, paths: List[str]) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                login_vault(self.client)
+                break
+            except Exception as e:
+                logging.warning(f"Warm-up is waiting for a Vault login: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+        with upstream_priority(PREFETCH):
+            secrets, errors = self.fetch_secrets(paths)
+        self.warm_up_status.finish(len(secrets), errors)
+        logging.info(
+            f"Warm-up loaded {len(secrets)} of {len(paths)} secrets"
+            f" in {self.warm_up_status.seconds:.2f}s"
+        )
+
+    def _get_cached(self, path: str) -> Optional[CacheEntry]:
+        """
+        Look up a path in the cache, scheduling a refresh if it is stale.
+
+        Args:
+            path (str): The path of the secret.
+
+        Returns:
+            Optional[CacheEntry]: The cached entry, or None on a miss.
+        """
+        entry = self._route(path)[0].cache.get(path)
+        if (
+            entry is not None
+            and entry.lease_id is None
+            and time.monotonic() - entry.fetched_at >= self.soft_ttl
+        ):
+            self._schedule_refresh(path)
+        return entry
+
+    def _build_mounts(self, specs: List[MountSpec]) -> Mount:
+        """
+        Create the routed mounts and return the default one.
+
+        Mounts share a client, and so a connection pool, per namespace. The
+        default mount uses self.client and self.cache.
+
+        Args:
+            specs (List[MountSpec]): The mounts from VAULT_MOUNTS.
+
+        Returns:
+            Mount: The mount for paths that name no other mount.
+        """
+        clients = {Config.VAULT_NAMESPACE: self.client}
+        default_spec = MountSpec(self.mount_point, namespace=Config.VAULT_NAMESPACE)
+        for spec in specs:
+            if spec.name == self.mount_point:
+                default_spec = spec
+
+        def build(spec: MountSpec, cache: SecretCache) -> Mount:
+            namespace = spec.namespace or Config.VAULT_NAMESPACE
+            if namespace not in clients:
+                clients[namespace] = create_vault_client(namespace=namespace)
+            engine = ENGINES[spec.engine](clients[namespace], spec.name)
+            return Mount(spec.name, engine, cache, namespace)
+
+        default = build(default_spec, self.cache)
+        for spec in specs:
+            self.mounts[spec.name] = (
+                default
+                if spec is default_spec
+                else build(spec, SecretCache.from_config())
+            )
+        return default
+
+    def _route(self, path: str) -> Tuple[Mount, str]:
+        """
+        Return the mount a path is read from and the path below that mount.
+
+        Args:
+            path (str): The path of the secret.
+
+        Returns:
+            Tuple[Mount, str]: The mount and the path relative to it.
+        """
+        name, sep, relative = path.partition("/")
+        mount = self.mounts.get(name) if sep else None
+        if mount is None:
+            return self.default_mount, path
+        return mount, relative
+
+    def cache_info(self) -> Dict[str, Any]:
+        """
+        Return cache occupancy and hit/miss/eviction counters.
+
+        Returns:
+            Dict[str, Any]: The cache statistics.
+        """
+        info = self.cache.info()
+        info["pinned_versions"] = len(self.versions)
+        partitions = {
+            name: mount.cache.info()
+            for name, mount in self.mounts.items()
+            if mount is not self.default_mount
+        }
+        if partitions:
+            info["mounts"] = partitions
+        info["leases"] = self.leases.info()
+        info["circuit"] = self.breaker.info()
+        info["upstream"] = self.scheduler.info()
+        return info
+
+    def is_watchable(self, path: str) -> bool:
+        """
+        Return False for paths on dynamic engines, where a read issues new
+        credentials rather than returning the current ones.
+        """
+        return self._route(path)[0].engine.name != "dynamic"
+
+    def check_version(self, path: str) -> Any:
+        """
+        Check Vault for the current version of a secret, and refresh the
+        cached copy if it changed.
+
+        Args:
+            path (str): The path of the secret.
+
+        Returns:
+            Any: The KV v2 version, or a checksum of the data for mounts
+            without versions.
+        """
+        mount, relative = self._route(path)
+        with upstream_priority(REFRESH):
+            if not mount.engine.versioned:
+                entry = self._inflight.do(path, lambda: self._refresh_secret(path))
+                data = json.dumps(entry.value, sort_keys=True, default=str).encode()
+                return hashlib.sha256(data).hexdigest()[:16]
+
+            version = self._with_auth(
+                lambda: mount.engine.current_version(relative), mount.client
+            )
+            cached = mount.cache.peek(path)
+            if cached is None or cached.version != version:
+                self._inflight.do(path, lambda: self._refresh_secret(path))
+        return version
+
+    def revoke_leases(self) -> int:
+        """
+        Stop renewing leases and revoke those still valid, e.g. on shutdown.
+
+        Returns:
+            int: The number of leases revoked.
+        """
+        self.leases.stop()
+        return self.leases.revoke_all()
+
+    def _get_version(self, path: str, version: int) -> CacheEntry:
+        """
+        Return a specific version of a secret, cached without expiry.
+
+        Args:
+            path (str): The path of the secret.
+            version (int): The KV v2 version.
+
+        Returns:
+            CacheEntry: The cached entry.
+        """
+        cache_key = f"{path}?version={version}"
+        entry = self.versions.get(cache_key)
+        if entry is not None:
+            return entry
+
+        def load() -> CacheEntry:
+            entry = self.versions.peek(cache_key)
+            if entry is None:
+                secret = self._read_with_auth(path, version)
+                entry = CacheEntry(secret.data, time.monotonic(), version=version)
+                self.versions.set(cache_key, entry)
+            return entry
+
+        return self._inflight.do(cache_key, load)
+
+    def _get_batch_executor(self) -> ThreadPoolExecutor:
+        with self._cache_lock:
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(
+                    max_workers=Config.VAULT_BATCH_CONCURRENCY,
+                    thread_name_prefix="vaultutils-batch",
+                )
+            return self._batch_executor
+
+    def _load_secret(self, path: str) -> CacheEntry:
+        """
+        Return the cached entry for a path, reading it from Vault on a miss.
+
+        Args:
+            path (str): The path of the secret.
+
+        Returns:
+            CacheEntry: The cached entry.
+        """
+        entry = self._route(path)[0].cache.peek(path)
+        if entry is not None:
+            return entry
+
+        entry = self._get_shared_cached(path)
+        if entry is not None:
+            return entry
+
+        failure = self.negative.peek(path)
+        if failure is not None:
+            self.cache.stats.incr("negative_hits")
+            raise copy.copy(failure.value)
+        try:
+            return self._refresh_secret(path)
+        except NEGATIVE_ERRORS as e:
+            self.negative.set(path, CacheEntry(e, time.monotonic()))  # type: ignore
+            raise
+        except Exception as e:
+            last_good = self.last_good.peek(path) if is_outage(e) else None
+            if last_good is None:
+                raise
+            self.cache.stats.incr("stale_served")
+            logging.warning(f"Serving a stale value for {path}: {e}")
+            return replace(last_good, stale=True)
+
+    def _refresh_secret(self, path: str) -> CacheEntry:
+        """
+        Read a secret from Vault and store it in the cache.
+
+        Args:
+            path (str): The path of the secret.
+
+        Returns:
+            CacheEntry: The new cache entry.
+        """
+        mount = self._route(path)[0]
+        cache = mount.cache
+        started = time.monotonic()
+        if self.revalidate:
+            secret = self._read_if_changed(path)
         else:
-            return secrets
+            secret = self._read_with_auth(path)
+        fetched_at = time.monotonic()
+        cache.stats.record_refresh(fetched_at - started)
+        value = secret.data
+        entry = CacheEntry(value, fetched_at, version=secret.version)
+        if secret.lease_id is not None and secret.lease_duration:
+            entry.lease_id = secret.lease_id
+            entry.expires_at = self.leases.track(path, secret, cache, mount.client)
+            cache.set(path, entry)
+            # Kept out of the shared and disk tiers: the lease is renewed and
+            # revoked by this process only
+            return entry
+        cache.set(path, entry)
+        # A copy: the stale store sets its own expiry on the entry
+        self.last_good.set(path, replace(entry))
+
+        shared = self._get_shared()
+        if shared is not None or self._disk is not None:
+            wall_clock = time.time()
+            expires_at = wall_clock + (entry.expires_at - fetched_at)
+            if shared is not None:
+                shared.set(path, value, wall_clock, expires_at)
+            if self._disk is not None:
+                self._disk.set(path, value, wall_clock, expires_at)
+        return entry
+
+    def _restore_from_disk(self, disk: DiskCache) -> None:
+        """
+        Warm the cache with the non-expired secrets saved by a previous run.
+
+        Args:
+            disk (DiskCache): The disk cache.
+        """
+        restored = 0
+        for path, value, fetched_at, expires_at in disk.secrets():
+            self._set_from_wall_clock(path, value, fetched_at, expires_at)
+            restored += 1
+        if restored:
+            logging.info(f"Restored {restored} secrets from {disk.path}")
+
+    def _set_from_wall_clock(
+        self, path: str, value: Any, fetched_at: float, expires_at: float
+    ) -> CacheEntry:
+        """
+        Cache a secret read by another process, given wall-clock times.
+
+        Args:
+            path (str): The path of the secret.
+            value (Any): The secret data.
+            fetched_at (float): When it was read from Vault.
+            expires_at (float): When it expires.
+
+        Returns:
+            CacheEntry: The new cache entry.
+        """
+        # Translate wall-clock times to this process' monotonic clock
+        offset = time.monotonic() - time.time()
+        entry = CacheEntry(value, fetched_at + offset)
+        self._route(path)[0].cache.set(path, entry)
+        entry.expires_at = min(entry.expires_at, expires_at + offset)
+        return entry
+
+    def _get_shared(self) -> Optional[SharedCacheClient]:
+        # Resolved lazily: the server configures the shared tier after this
+        # singleton was created, just before forking its workers.
+        if self._shared is None:
+            self._shared = SharedCacheClient.from_config()
+        return self._shared
 
-    def _fetch_secret_from_vault(self, path: str) -> dict:
+    def _get_shared_cached(self, path: str) -> Optional[CacheEntry]:
         """
-        Fetch a secret from Vault directly.
+        Look up a path in the cache shared by the server's worker processes.
 
         Args:
             path (str): The path of the secret.
 
         Returns:
-            dict: The secret data.
+            Optional[CacheEntry]: The entry, now also cached locally, or None.
         """
-        data = self.client.secrets.kv.read_secret_version(
-            path=path, mount_point=self.mount_point
+        shared = self._get_shared()
+        item = shared.get(path) if shared is not None else None
+        if item is None:
+            return None
+
+        return self._set_from_wall_clock(path, *item)
+
+    def _read_if_changed(self, path: str) -> Secret:
+        """
+        Re-read a secret only if its KV v2 version changed.
+
+        Args:
+            path (str): The path of the secret.
+
+        Returns:
+            Secret: The secret data and its version.
+        """
+        mount, relative = self._route(path)
+        cached = mount.cache.peek(path)
+        if not mount.engine.versioned or cached is None or cached.version is None:
+            return self._read_with_auth(path)
+
+        version = self._with_auth(
+            lambda: mount.engine.current_version(relative), mount.client
+        )
+        if version == cached.version:
+            mount.cache.stats.incr("revalidations")
+            return Secret(cached.value, version=version)
+        # Read the version the metadata reported, not whatever is latest now
+        return self._read_with_auth(path, version)
+
+    def _read_with_auth(self, path: str, version: Optional[int] = None) -> Secret:
+        """
+        Read a secret, logging in again once if Vault rejects the token.
+
+        Args:
+            path (str): The path of the secret.
+            version (Optional[int]): A KV v2 version, the latest by default.
+
+        Returns:
+            Secret: The secret data with its version or lease.
+        """
+        return self._with_auth(
+            lambda: self._fetch_secret_from_vault(path, version),
+            self._route(path)[0].client,
         )
-        return data["data"]["data"]
+
+    def _with_auth(self, read: Callable[[], T], client: Any = None) -> T:
+        """
+        Call Vault, logging in again once if Vault rejects the token.
+
+        Args:
+            read (Callable[[], T]): The call to make.
+            client (Any): The client read uses, self.client by default.
+
+        Returns:
+            T: Its result.
+        """
+        client = client or self.client
+
+        def call() -> T:
+            login_vault(client)
+            token = client.token
+            try:
+                return read()
+            except exceptions.Forbidden:
+                # The token may have been revoked or expired early
+                invalidate_token(token)
+                login_vault(client)
+                return read()
+
+        # Fails fast while Vault is known to be down, and otherwise waits for
+        # a slot within the upstream concurrency limit
+        return self.breaker.call(lambda: self.scheduler.call(call))
+
+    def _with_background_auth(self, read: Callable[[], T], client: Any = None) -> T:
+        """
+        Like _with_auth, for background work that gives way to user reads.
+        """
+        with upstream_priority(REFRESH):
+            return self._with_auth(read, client)
+
+    def _schedule_refresh(self, path: str) -> None:
+        """
+        Refresh a path in the background unless a refresh is already queued.
+
+        Args:
+            path (str): The path of the secret.
+        """
+        with self._cache_lock:
+            if path in self._refreshing:
+                return
+            self._refreshing.add(path)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=Config.VAULT_CACHE_REFRESH_WORKERS,
+                    thread_name_prefix="vaultutils-refresh",
+                )
+            executor = self._executor
+        executor.submit(self._background_refresh, path)
+
+    def _background_refresh(self, path: str) -> None:
+        try:
+            with upstream_priority(REFRESH):
+                self._inflight.do(path, lambda: self._refresh_secret(path))
+        except Exception as e:
+            # The stale entry keeps being served until the hard TTL expires it.
+            logging.warning(f"Background refresh of {path} failed: {e}")
+        finally:
+            with self._cache_lock:
+                self._refreshing.discard(path)
+
+    def _fetch_secret_from_vault(
+        self, path: str, version: Optional[int] = None
+    ) -> Secret:
+        """
+        Read a secret from the engine of the mount the path routes to.
+
+        Args:
+            path (str): The path of the secret.
+            version (Optional[int]): A KV v2 version, the latest by default.
+
+        Returns:
+            Secret: The secret data with its version or lease.
+        """
+        mount, relative = self._route(path)
+        return mount.engine.read(relative, version)
+
+
+if hasattr(os, "register_at_fork"):
+    # A forked child shares the parent's Vault connections and has none of
+    # its threads: it gets a fetcher of its own on first use.
+    os.register_at_fork(after_in_child=VaultSecretFetcher.reset)  # type: ignore
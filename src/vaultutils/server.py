@@ -1,22 +1,202 @@
 import logging
+import os
+import secrets
+import signal
+import tempfile
+import time
 from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import requests  # type: ignore
-from flask import Flask  # type: ignore
 
+from vaultutils import metrics
 from vaultutils.config import Config
-from vaultutils.views.vault_view import vault_blueprint
+from vaultutils.prefetch import use_manifest
+
+if TYPE_CHECKING:
+    import socket
+
+    from flask import Flask  # type: ignore
+
+    from vaultutils.shared_cache import SharedCacheServer
+
+_app: Optional["Flask"] = None
+
+
+def get_app() -> "Flask":
+    """
+    Return the Flask app, creating it on first use.
+
+    Flask, the views and the server-side fetcher are only imported here, so
+    commands such as ``vaultutils stop`` never load them.
+    """
+    global _app
+    if _app is None:
+        from flask import Flask, g, request  # noqa: PLC0415
+
+        from vaultutils.controllers.vault_controller import (  # noqa: PLC0415
+            start_warm_up,
+        )
+        from vaultutils.views.vault_view import vault_blueprint  # noqa: PLC0415
+
+        app = Flask(__name__)
+        app.register_blueprint(vault_blueprint)
+
+        @app.before_request
+        def _start_timer() -> None:
+            g.request_started = time.perf_counter()
+
+        @app.teardown_request
+        def _observe_request(_exc: Optional[BaseException]) -> None:
+            started = g.pop("request_started", None)
+            if started is not None:
+                metrics.REQUEST_SECONDS.observe(
+                    time.perf_counter() - started, request.endpoint or "unmatched"
+                )
+
+        _app = app
+        start_warm_up()
+    return _app
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps ``vaultutils.server:app`` working for WSGI servers and imports
+    if name == "app":
+        return get_app()
+    err_msg: str = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(err_msg)
 
-app = Flask(__name__)
-app.register_blueprint(vault_blueprint)
 
 logging.basicConfig(format="%(asctime)s - %(message)s", datefmt="%d-%b-%y %H:%M:%S")
 
 
-def start_server() -> None:
+def start_server(
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    prefetch: Optional[str] = None,
+    socket_path: Optional[str] = None,
+) -> None:
+    if prefetch:
+        use_manifest(prefetch)
+    if socket_path is not None:
+        Config.VAULT_SERVER_SOCKET = socket_path
     host = Config.VAULT_SERVER_HOST
     port = Config.VAULT_SERVER_PORT
-    app.run(host=host, port=port)
+    workers = Config.VAULT_SERVER_WORKERS if workers is None else workers
+    if not workers and threads is not None:
+        # The development server starts a thread per request instead
+        err_msg: str = "--threads requires --workers"
+        raise ValueError(err_msg)
+    listener = _bind_socket()
+    try:
+        if not workers:
+            if listener is not None:
+                _serve_socket(listener)
+            get_app().run(host=host, port=port)
+            return
+
+        threads = Config.VAULT_SERVER_THREADS if threads is None else threads
+        _run_gunicorn(f"{host}:{port}", workers, threads, listener)
+    finally:
+        if listener is not None:
+            listener.close()
+            os.unlink(Config.VAULT_SERVER_SOCKET)
+
+
+def _bind_socket() -> Optional["socket.socket"]:
+    if not Config.VAULT_SERVER_SOCKET:
+        return None
+    from vaultutils.socket_transport import bind_socket  # noqa: PLC0415
+
+    return bind_socket(Config.VAULT_SERVER_SOCKET)
+
+
+def _serve_socket(listener: "socket.socket") -> None:
+    from vaultutils.socket_transport import SocketServer  # noqa: PLC0415
+
+    SocketServer(listener).start()
+    logging.info(f"Serving secrets on {Config.VAULT_SERVER_SOCKET}")
+
+
+def reload_server() -> None:
+    """Gracefully restart the workers of a server started with --workers."""
+    try:
+        with open(Config.VAULT_SERVER_PIDFILE) as pidfile:
+            pid = int(pidfile.read().strip())
+        os.kill(pid, signal.SIGHUP)
+        logging.info("Server reload requested.")
+    except (OSError, ValueError) as e:
+        logging.info(f"Error reloading the server: {e}")
+
+
+def _run_gunicorn(
+    bind: str, workers: int, threads: int, listener: Optional["socket.socket"] = None
+) -> None:
+    try:
+        from gunicorn.app.base import BaseApplication  # type: ignore  # noqa: PLC0415
+    except ModuleNotFoundError as exc:
+        msg = "gunicorn is required to run the server with workers"
+        raise RuntimeError(msg) from exc
+
+    class GunicornApplication(BaseApplication):
+        def __init__(self, options: Dict[str, Any]) -> None:
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Any:
+            return get_app()
+
+    shared_cache = _start_shared_cache() if workers > 1 else None
+    # Lets /shutdown stop the whole server rather than a single worker
+    os.environ["VAULTUTILS_SERVER_PID"] = str(os.getpid())
+    try:
+        GunicornApplication(
+            {
+                "bind": bind,
+                "workers": workers,
+                "threads": threads,
+                "worker_class": "gthread",
+                "pidfile": Config.VAULT_SERVER_PIDFILE,
+                "graceful_timeout": 30,
+                "worker_exit": _worker_exit,
+                # Workers inherit the listening socket and accept on it in turn
+                "post_worker_init": (
+                    (lambda _worker: _serve_socket(listener))
+                    if listener is not None
+                    else (lambda _worker: None)
+                ),
+            }
+        ).run()
+    finally:
+        if shared_cache is not None:
+            shared_cache.stop()
+
+
+def _worker_exit(_arbiter: Any, _worker: Any) -> None:
+    # Every worker revokes the leases it holds, not only the one that
+    # served /shutdown
+    from vaultutils.controllers.vault_controller import revoke_leases  # noqa: PLC0415
+
+    revoke_leases()
+
+
+def _start_shared_cache() -> Optional["SharedCacheServer"]:
+    if not Config.VAULT_SHARED_CACHE:
+        return None
+    from vaultutils.shared_cache import SharedCacheServer  # noqa: PLC0415
+
+    socket_dir = tempfile.mkdtemp(prefix="vaultutils-")
+    Config.VAULT_SHARED_CACHE_SOCKET = os.path.join(socket_dir, "cache.sock")
+    Config.VAULT_SHARED_CACHE_AUTHKEY = secrets.token_bytes(32)
+    server = SharedCacheServer(
+        Config.VAULT_SHARED_CACHE_SOCKET, Config.VAULT_SHARED_CACHE_AUTHKEY
+    )
+    server.start()
+    return server
 
 
 def stop_server() -> None:
@@ -0,0 +1,181 @@
+"""
+A cache tier shared by all worker processes of one server.
+
+The master process runs a small multiprocessing manager listening on a Unix
+socket; workers look secrets up there before going to Vault, so N workers do
+not turn into N times as many Vault reads.
+"""
+
+import logging
+import os
+import time
+from multiprocessing.managers import BaseManager
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from vaultutils.cache import estimate_size
+from vaultutils.config import Config
+
+_store: Optional["_Store"] = None
+
+
+class _Store:
+    """
+    The dict of secrets held by the manager process. Times are wall-clock
+    timestamps because monotonic clocks are not comparable across processes.
+
+    Like the workers' caches it holds at most VAULT_CACHE_MAX_BYTES of
+    estimated secret data when that is set, or else VAULT_CACHE_MAXSIZE
+    entries.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._data: Dict[str, Tuple[Any, float, float]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        item = self._data.get(key)
+        if item is None or item[2] <= time.time():
+            return None
+        return item
+
+    def set(self, key: str, value: Any, fetched_at: float, expires_at: float) -> None:
+        max_bytes = Config.VAULT_CACHE_MAX_BYTES
+        size = estimate_size(key, value) if max_bytes else 0
+        with self._lock:
+            self._remove(key)
+            if max_bytes and size > max_bytes:
+                # Larger than the whole budget: do not cache it at all
+                return
+            self._data[key] = (value, fetched_at, expires_at)
+            self._sizes[key] = size
+            self._bytes += size
+            if self._over_budget(max_bytes):
+                self._purge(max_bytes)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        self._data.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def _over_budget(self, max_bytes: int) -> bool:
+        if max_bytes:
+            return self._bytes > max_bytes
+        return len(self._data) > Config.VAULT_CACHE_MAXSIZE
+
+    def _purge(self, max_bytes: int) -> None:
+        now = time.time()
+        for key in [k for k, item in self._data.items() if item[2] <= now]:
+            self._remove(key)
+        # Still over budget: drop the entries closest to expiry
+        for key, _ in sorted(self._data.items(), key=lambda kv: kv[1][2]):
+            if not self._over_budget(max_bytes):
+                break
+            self._remove(key)
+
+
+def _get_store() -> _Store:
+    global _store
+    if _store is None:
+        _store = _Store()
+    return _store
+
+
+class _SharedCacheManager(BaseManager):
+    pass
+
+
+_SharedCacheManager.register("store", callable=_get_store)
+
+
+class SharedCacheServer:
+    """
+    Runs the shared cache manager in a child process of the server master.
+    """
+
+    def __init__(self, address: str, authkey: bytes) -> None:
+        self.address = address
+        self.authkey = authkey
+        self._manager: Optional[_SharedCacheManager] = None
+
+    def start(self) -> None:
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._manager = _SharedCacheManager(address=self.address, authkey=self.authkey)
+        self._manager.start()
+        logging.info(f"Shared cache listening on {self.address}")
+
+    def stop(self) -> None:
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+class SharedCacheClient:
+    """
+    Connects a worker to the shared cache.
+
+    The connection is opened lazily and re-opened after a fork, so an
+    instance created in the master can be inherited by workers. Errors are
+    logged and reported as misses: the shared tier is only an optimisation.
+    """
+
+    def __init__(self, address: str, authkey: bytes) -> None:
+        self.address = address
+        self.authkey = authkey
+        self._lock = Lock()
+        self._store: Any = None
+        self._pid: Optional[int] = None
+        self._retry_at = 0.0
+
+    @classmethod
+    def from_config(cls) -> Optional["SharedCacheClient"]:
+        if (
+            not Config.VAULT_SHARED_CACHE_SOCKET
+            or not Config.VAULT_SHARED_CACHE_AUTHKEY
+        ):
+            return None
+        return cls(Config.VAULT_SHARED_CACHE_SOCKET, Config.VAULT_SHARED_CACHE_AUTHKEY)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Return (value, fetched_at, expires_at) with wall-clock times, or None.
+        """
+        return self._call("get", key)
+
+    def set(self, key: str, value: Any, fetched_at: float, expires_at: float) -> None:
+        self._call("set", key, value, fetched_at, expires_at)
+
+    def delete(self, key: str) -> None:
+        self._call("delete", key)
+
+    def _call(self, method: str, *args: Any) -> Any:
+        if self._pid == os.getpid() and time.monotonic() < self._retry_at:
+            return None
+        try:
+            return getattr(self._connect(), method)(*args)
+        except Exception as e:
+            logging.warning(f"Shared cache unavailable: {e}")
+            self._store = None
+            self._pid = os.getpid()
+            self._retry_at = time.monotonic() + 5
+            return None
+
+    def _connect(self) -> Any:
+        pid = os.getpid()
+        if self._store is not None and self._pid == pid:
+            return self._store
+        with self._lock:
+            if self._store is None or self._pid != pid:
+                manager = _SharedCacheManager(
+                    address=self.address, authkey=self.authkey
+                )
+                manager.connect()
+                self._store = manager.store()  # type: ignore[attr-defined]
+                self._pid = pid
+        return self._store
@@ -0,0 +1,337 @@
+"""
+A Unix domain socket transport between VaultManagerClient and the server.
+
+Client and server always share a host, so instead of HTTP over TCP they can
+exchange length-prefixed frames over a Unix socket. Each frame is a 4-byte
+big-endian length followed by a payload encoded with the codec the client
+chose when it connected: JSON, or msgpack when installed. A request is
+``[op, args]`` and a response ``[status, body]``, with the same bodies the
+HTTP endpoints return.
+"""
+
+import json
+import logging
+import os
+import socket
+import struct
+from http import HTTPStatus
+from queue import Empty, Full, LifoQueue
+from threading import Thread
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_HEADER = struct.Struct("!I")
+_MAX_FRAME = 64 * 1024 * 1024
+_REJECTED = b"!"
+
+
+def _msgpack() -> Any:
+    try:
+        import msgpack  # type: ignore  # noqa: PLC0415
+    except ModuleNotFoundError as exc:
+        msg = (
+            "msgpack is required for the msgpack codec: pip install vaultutils[msgpack]"
+        )
+        raise RuntimeError(msg) from exc
+    return msgpack
+
+
+class Codec:
+    """
+    Encodes frame payloads. Identified on the wire by a single byte.
+    """
+
+    def __init__(
+        self, tag: bytes, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]
+    ) -> None:
+        self.tag = tag
+        self.dumps = dumps
+        self.loads = loads
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Return the codec called name, "json" or "msgpack".
+
+    Raises:
+        ValueError: If the codec is unknown.
+        RuntimeError: If msgpack is requested but not installed.
+    """
+    if name == "json":
+        return Codec(
+            b"j",
+            lambda obj: json.dumps(obj, separators=(",", ":")).encode(),
+            json.loads,
+        )
+    if name == "msgpack":
+        msgpack = _msgpack()
+        return Codec(
+            b"m",
+            lambda obj: msgpack.packb(obj, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False),
+        )
+    err_msg: str = f"Unknown codec {name!r}, expected 'json' or 'msgpack'"
+    raise ValueError(err_msg)
+
+
+def _codec_for_tag(tag: bytes) -> Optional[Codec]:
+    for name in ("json", "msgpack"):
+        try:
+            codec = get_codec(name)
+        except RuntimeError:
+            continue
+        if codec.tag == tag:
+            return codec
+    return None
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            err_msg: str = "Connection closed"
+            raise ConnectionError(err_msg)
+        received += count
+    return bytes(buffer)
+
+
+def send_frame(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    if size > _MAX_FRAME:
+        err_msg: str = f"Frame of {size} bytes exceeds the limit"
+        raise ConnectionError(err_msg)
+    return _recv_exactly(sock, size)
+
+
+def bind_socket(path: str) -> socket.socket:
+    """
+    Create a listening Unix socket at path, replacing a stale one.
+
+    Only the owner can connect: the socket gives access to secrets.
+
+    Args:
+        path (str): The socket file.
+
+    Returns:
+        socket.socket: The listening socket.
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(128)
+    return listener
+
+
+class SocketServer:
+    """
+    Serves fetcher calls on a listening Unix socket, one thread per
+    connection. Clients keep their connections open between calls.
+
+    Several processes may serve the same listening socket, e.g. gunicorn
+    workers that inherited it from the master; the kernel hands each new
+    connection to one of them.
+
+    Args:
+        listener (socket.socket): A socket from bind_socket.
+    """
+
+    def __init__(self, listener: socket.socket) -> None:
+        self.listener = listener
+        self._fetcher: Any = None
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Tuple[int, Any]]] = {
+            "authenticate": self._authenticate,
+            "fetch_secret": self._fetch_secret,
+            "fetch_secrets": self._fetch_secrets,
+            "cache_stats": self._cache_stats,
+            "ready": self._ready,
+        }
+
+    def start(self) -> Thread:
+        thread = Thread(target=self._accept, name="vaultutils-socket", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def fetcher(self) -> Any:
+        if self._fetcher is None:
+            from vaultutils.secret_fetcher import VaultSecretFetcher  # noqa: PLC0415
+
+            self._fetcher = VaultSecretFetcher()
+        return self._fetcher
+
+    def handle(self, op: str, args: Dict[str, Any]) -> Tuple[int, Any]:
+        """
+        Run one call.
+
+        Args:
+            op (str): The operation, named after the client method.
+            args (Dict[str, Any]): Its arguments.
+
+        Returns:
+            Tuple[int, Any]: The HTTP status code and the response body.
+        """
+        handler = self._handlers.get(op)
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown operation {op!r}"}
+        try:
+            return handler(args)
+        except Exception as e:
+            from vaultutils.resilience import error_status  # noqa: PLC0415
+
+            return error_status(e), {"error": str(e)}
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                # The listener was closed
+                return
+            Thread(
+                target=self._serve, args=(conn,), name="vaultutils-socket", daemon=True
+            ).start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        with conn:
+            try:
+                codec = _codec_for_tag(_recv_exactly(conn, 1))
+                if codec is None:
+                    conn.sendall(_REJECTED)
+                    return
+                conn.sendall(codec.tag)
+                while True:
+                    op, args = codec.loads(recv_frame(conn))
+                    status, body = self.handle(op, args)
+                    send_frame(conn, codec.dumps([int(status), body]))
+            except ConnectionError:
+                return
+            except Exception as e:
+                logging.warning(f"Closing socket connection after an error: {e}")
+
+    def _authenticate(self, _args: Dict[str, Any]) -> Tuple[int, Any]:
+        from vaultutils.auth import login_vault  # noqa: PLC0415
+
+        client = self.fetcher.client
+        login_vault(client)
+        return HTTPStatus.OK, {"token": str(client.token)}
+
+    def _fetch_secret(self, args: Dict[str, Any]) -> Tuple[int, Any]:
+        secret, entry = self.fetcher.fetch_secret_detailed(
+            args["path"], args.get("key"), args.get("version")
+        )
+        if entry.stale:
+            return HTTPStatus.OK, {"secret": secret, "stale": True}
+        return HTTPStatus.OK, {"secret": secret}
+
+    def _fetch_secrets(self, args: Dict[str, Any]) -> Tuple[int, Any]:
+        paths = args.get("paths")
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            return HTTPStatus.BAD_REQUEST, {
+                "error": "'paths' must be a list of strings"
+            }
+        secrets, errors, stale = self.fetcher.fetch_secrets_detailed(paths)
+        body = {"secrets": secrets, "errors": errors}
+        if stale:
+            body["stale"] = stale
+        return HTTPStatus.OK, body
+
+    def _cache_stats(self, _args: Dict[str, Any]) -> Tuple[int, Any]:
+        return HTTPStatus.OK, self.fetcher.cache_info()
+
+    def _ready(self, _args: Dict[str, Any]) -> Tuple[int, Any]:
+        status = self.fetcher.warm_up_status
+        return (
+            HTTPStatus.OK if status.ready else HTTPStatus.SERVICE_UNAVAILABLE,
+            status.as_dict(),
+        )
+
+
+class SocketTransport:
+    """
+    The client side: a pool of open connections to a SocketServer.
+
+    Args:
+        path (str): The server's socket file.
+        codec (str): "json" or "msgpack".
+        pool_size (int): Connections kept open for reuse.
+        timeout (float): Timeout in seconds for connecting and for each call.
+    """
+
+    def __init__(
+        self, path: str, codec: str = "json", pool_size: int = 10, timeout: float = 10
+    ) -> None:
+        self.path = path
+        self.codec = get_codec(codec)
+        self.timeout = timeout
+        self._pool: LifoQueue = LifoQueue(maxsize=pool_size)
+
+    def call(self, op: str, **args: Any) -> Tuple[int, Any]:
+        """
+        Run an operation on the server.
+
+        A pooled connection the server has since closed is replaced once.
+
+        Returns:
+            Tuple[int, Any]: The HTTP status code and the response body.
+        """
+        request = self.codec.dumps([op, args])
+        for attempt in range(2):
+            sock, reused = self._checkout()
+            try:
+                send_frame(sock, request)
+                status, body = self.codec.loads(recv_frame(sock))
+            except (ConnectionError, OSError):
+                sock.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            self._checkin(sock)
+            return status, body
+        err_msg: str = f"Could not reach the server at {self.path}"
+        raise ConnectionError(err_msg)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except Empty:
+                return
+
+    def _checkout(self) -> Tuple[socket.socket, bool]:
+        try:
+            return self._pool.get_nowait(), True
+        except Empty:
+            return self._connect(), False
+
+    def _checkin(self, sock: socket.socket) -> None:
+        try:
+            self._pool.put_nowait(sock)
+        except Full:
+            sock.close()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+            sock.sendall(self.codec.tag)
+            if _recv_exactly(sock, 1) != self.codec.tag:
+                err_msg: str = (
+                    f"The server does not support the {self.codec.tag!r} codec"
+                )
+                raise ConnectionError(err_msg)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
@@ -1,8 +1,17 @@
+import time
 import urllib.parse
 from functools import wraps
-from typing import Any, Dict, TypeVar
+from threading import Event, Lock
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, TypeVar
 
-from hvac import Client  # type: ignore
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from vaultutils.config import Config
+
+if TYPE_CHECKING:
+    from hvac import Client  # type: ignore
 
 
 def _extract_auth_url_params(auth_url: str) -> tuple[str, str]:
@@ -27,7 +36,7 @@ def _extract_auth_url_params(auth_url: str) -> tuple[str, str]:
 
 
 def _get_oidc_client_token(
-    vault_client: Client, code: str, nonce: str, state: str
+    vault_client: "Client", code: str, nonce: str, state: str
 ) -> str:
     """
     Get OIDC client token from Vault using the authorization code.
@@ -51,6 +60,64 @@ def _get_oidc_client_token(
     return client_token
 
 
+def create_session(
+    pool_size: Optional[int] = None, retries: Optional[int] = None
+) -> requests.Session:
+    """
+    Create a requests session with a keep-alive connection pool and retries.
+
+    Connection errors are retried for every method; 502, 503 and 504
+    responses only for idempotent reads.
+
+    Args:
+        pool_size (Optional[int]): Connections kept per host.
+        retries (Optional[int]): Number of retries.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    pool_size = Config.VAULT_HTTP_POOL_SIZE if pool_size is None else pool_size
+    retries = Config.VAULT_HTTP_RETRIES if retries is None else retries
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.1,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "LIST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def create_vault_client(
+    url: Optional[str] = None, namespace: Optional[str] = None
+) -> "Client":
+    """
+    Create an hvac client backed by a pooled, keep-alive session.
+
+    Args:
+        url (Optional[str]): The Vault URL, defaults to VAULT_URL.
+        namespace (Optional[str]): The Vault Enterprise namespace, if any.
+
+    Returns:
+        Client: The Vault client.
+    """
+    # Imported here so the CLI and client do not pay for hvac at startup
+    from hvac import Client  # noqa: PLC0415
+
+    return Client(
+        url=url or Config.VAULT_URL,
+        session=create_session(),
+        timeout=Config.VAULT_HTTP_TIMEOUT,
+        namespace=namespace,
+    )
+
+
 T = TypeVar("T")
 
 
@@ -66,4 +133,77 @@ def singleton(cls: T) -> T:
             instances[cls] = cls(*args, **kwargs)  # type: ignore
         return instances[cls]
 
+    def reset() -> None:
+        """Forget the instance, so the next call creates a new one."""
+        instances.pop(cls, None)
+
+    get_instance.reset = reset  # type: ignore
     return get_instance  # type: ignore
+
+
+class _Call:
+    """
+    An in-flight call tracked by SingleFlight.
+    """
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running wait for it and receive the same result (or exception).
+    Calls for different keys never block each other.
+
+    Args:
+        on_wait (Optional[Callable[[float], None]]): Called with the seconds a
+            coalesced caller spent waiting for the in-flight run.
+    """
+
+    def __init__(self, on_wait: Optional[Callable[[float], None]] = None) -> None:
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._on_wait = on_wait
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func for key, or wait for an in-flight run for the same key.
+
+        Args:
+            key (Hashable): The key identifying the call.
+            func (Callable[[], Any]): The function to run.
+
+        Returns:
+            Any: The result of func.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            started = time.perf_counter()
+            call.done.wait()
+            if self._on_wait is not None:
+                self._on_wait(time.perf_counter() - started)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
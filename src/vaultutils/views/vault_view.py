@@ -3,12 +3,33 @@ from flask import Blueprint  # type: ignore
 from vaultutils.controllers.vault_controller import VaultController
 
 vault_blueprint = Blueprint("vault", __name__)
+vault_blueprint.register_error_handler(Exception, VaultController.handle_error)
 
 vault_blueprint.add_url_rule(
     "/authenticate", view_func=VaultController.authenticate, methods=["POST"]
 )
 vault_blueprint.add_url_rule(
-    "/fetch-secret", view_func=VaultController.fetch_secret, methods=["POST"]
+    "/fetch-secret", view_func=VaultController.fetch_secret, methods=["GET", "POST"]
+)
+vault_blueprint.add_url_rule(
+    "/fetch-secrets", view_func=VaultController.fetch_secrets, methods=["POST"]
+)
+vault_blueprint.add_url_rule(
+    "/cache-stats", view_func=VaultController.cache_stats, methods=["GET"]
+)
+vault_blueprint.add_url_rule("/ready", view_func=VaultController.ready, methods=["GET"])
+vault_blueprint.add_url_rule("/watch", view_func=VaultController.watch, methods=["GET"])
+vault_blueprint.add_url_rule(
+    "/metrics", view_func=VaultController.metrics, methods=["GET"]
+)
+vault_blueprint.add_url_rule(
+    "/debug/profile", view_func=VaultController.debug_profile, methods=["GET"]
+)
+vault_blueprint.add_url_rule(
+    "/debug/threads", view_func=VaultController.debug_threads, methods=["GET"]
+)
+vault_blueprint.add_url_rule(
+    "/debug/cache", view_func=VaultController.debug_cache, methods=["GET"]
 )
 vault_blueprint.add_url_rule(
     "/shutdown", view_func=VaultController.shutdown, methods=["POST"]
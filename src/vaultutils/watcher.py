@@ -0,0 +1,182 @@
+"""
+Change notifications for watched secrets.
+
+Subscribers register the paths they care about and receive an event when
+one of them changes. However many subscribers watch a path, the watcher
+checks it once per interval, so one upstream check serves every consumer
+of the sidecar.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from hvac import exceptions  # type: ignore
+
+from vaultutils.config import Config
+
+_MISSING = object()
+
+
+class Subscription:
+    """
+    The change events of a set of paths, for one subscriber.
+
+    Events are dicts with the ``path`` and its new ``version``, and
+    ``deleted`` set when the secret no longer exists. A subscriber that
+    falls more than ``maxsize`` events behind loses the oldest ones.
+    """
+
+    def __init__(self, paths: Iterable[str], maxsize: int = 1000) -> None:
+        self.paths = list(dict.fromkeys(paths))
+        self._events: Queue = Queue(maxsize=maxsize)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except Full:
+                try:
+                    self._events.get_nowait()
+                except Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait, forever if None.
+
+        Returns:
+            Optional[Dict[str, Any]]: The event, or None on timeout.
+        """
+        try:
+            return self._events.get(timeout=timeout)
+        except Empty:
+            return None
+
+
+class SecretWatcher:
+    """
+    Polls the watched paths in a background thread and publishes changes.
+
+    Args:
+        check (Callable[[str], Any]): Returns the current version of a path,
+            e.g. VaultSecretFetcher.check_version.
+        interval (float): Seconds between two checks of a path.
+        concurrency (int): Maximum number of paths checked at once.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[str], Any],
+        interval: float = Config.VAULT_WATCH_INTERVAL,
+        concurrency: int = Config.VAULT_BATCH_CONCURRENCY,
+    ) -> None:
+        self.check = check
+        self.interval = interval
+        self.concurrency = concurrency
+        self._lock = Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._versions: Dict[str, Any] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[Thread] = None
+
+    def subscribe(self, paths: Iterable[str]) -> Subscription:
+        """
+        Start watching paths for a new subscriber.
+
+        Args:
+            paths (Iterable[str]): The paths of the secrets.
+
+        Returns:
+            Subscription: The subscriber's events.
+        """
+        subscription = Subscription(paths)
+        with self._lock:
+            for path in subscription.paths:
+                self._subscribers.setdefault(path, set()).add(subscription)
+        self._start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for path in subscription.paths:
+                subscribers = self._subscribers.get(path)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    # Nobody watches the path any more: stop checking it
+                    del self._subscribers[path]
+                    self._versions.pop(path, None)
+
+    def watched(self) -> List[str]:
+        with self._lock:
+            return list(self._subscribers)
+
+    def poll(self) -> int:
+        """
+        Check every watched path once and publish the changes.
+
+        The first check of a path only records its version.
+
+        Returns:
+            int: The number of changes published.
+        """
+        paths = self.watched()
+        if not paths:
+            return 0
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="vaultutils-watch"
+            )
+        changes = 0
+        for path, version in zip(paths, self._executor.map(self._check, paths)):
+            if version is _MISSING:
+                continue
+            with self._lock:
+                if path not in self._subscribers:
+                    continue
+                previous = self._versions.get(path, _MISSING)
+                self._versions[path] = version
+                subscribers = list(self._subscribers[path])
+            if previous is _MISSING or previous == version:
+                continue
+            event = {"path": path, "version": version, "deleted": version is None}
+            for subscription in subscribers:
+                subscription.publish(event)
+            changes += 1
+        return changes
+
+    def _check(self, path: str) -> Any:
+        try:
+            return self.check(path)
+        except (exceptions.InvalidPath, KeyError):
+            return None
+        except Exception as e:
+            logging.warning(f"Could not check {path} for changes: {e}")
+            return _MISSING
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = Thread(
+                target=self._run, name="vaultutils-watcher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                logging.warning(f"Checking watched secrets failed: {e}")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
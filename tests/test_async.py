@@ -0,0 +1,168 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest  # type: ignore
+
+httpx = pytest.importorskip("httpx")
+
+from vaultutils import asgi, auth  # noqa: E402
+from vaultutils.async_client import AsyncVaultManagerClient  # noqa: E402
+from vaultutils.async_secret_fetcher import AsyncVaultSecretFetcher  # noqa: E402
+from vaultutils.config import Config  # noqa: E402
+
+
+@pytest.fixture
+def vault_requests():
+    return []
+
+
+@pytest.fixture
+def fetcher(mocker, vault_requests):
+    mocker.patch("vaultutils.async_secret_fetcher.create_vault_client")
+    manager = auth.TokenManager()
+    manager.store("s.token", ttl=3600)
+    mocker.patch.object(auth, "token_manager", manager)
+
+    async def handler(request):
+        vault_requests.append(request.url.path)
+        await asyncio.sleep(0.05)
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(HTTPStatus.NOT_FOUND, json={"errors": []})
+        if request.url.path.endswith("/sealed"):
+            return httpx.Response(HTTPStatus.SERVICE_UNAVAILABLE, json={"errors": []})
+        return httpx.Response(
+            HTTPStatus.OK, json={"data": {"data": {"path": request.url.path}}}
+        )
+
+    fetcher = AsyncVaultSecretFetcher()
+    fetcher._http = httpx.AsyncClient(
+        base_url="http://vault", transport=httpx.MockTransport(handler)
+    )
+    return fetcher
+
+
+def test_concurrent_misses_are_coalesced(fetcher, vault_requests):
+    async def main():
+        return await asyncio.gather(
+            *(fetcher.fetch_secret("app/db", "path") for _ in range(10))
+        )
+
+    results = asyncio.run(main())
+
+    assert results == ["/v1/secret/data/app/db"] * 10
+    assert vault_requests == ["/v1/secret/data/app/db"]
+
+
+def test_fetch_secrets_reports_errors_per_path(fetcher):
+    secrets, errors = asyncio.run(fetcher.fetch_secrets(["a", "missing", "a"]))
+
+    assert secrets == {"a": {"path": "/v1/secret/data/a"}}
+    assert list(errors) == ["missing"]
+
+
+def test_reads_are_routed_to_mounts_and_namespaces(mocker):
+    mocker.patch("vaultutils.async_secret_fetcher.create_vault_client")
+    mocker.patch.object(Config, "VAULT_NAMESPACE", "org")
+    mocker.patch.object(Config, "VAULT_MOUNTS", "legacy:kv1@org/team-a")
+    tokens = {}
+    for namespace in ("org", "org/team-a"):
+        tokens[namespace] = auth.TokenManager(namespace=namespace)
+        tokens[namespace].store(f"s.{namespace}", ttl=3600)
+    mocker.patch.dict(auth.token_managers, tokens)
+    requests = []
+
+    def handler(request):
+        requests.append(
+            (
+                request.url.path,
+                request.headers["X-Vault-Namespace"],
+                request.headers["X-Vault-Token"],
+            )
+        )
+        data = {"path": request.url.path}
+        if request.url.path.startswith("/v1/secret/"):
+            data = {"data": data}
+        return httpx.Response(HTTPStatus.OK, json={"data": data})
+
+    fetcher = AsyncVaultSecretFetcher()
+    fetcher._http = httpx.AsyncClient(
+        base_url="http://vault", transport=httpx.MockTransport(handler)
+    )
+
+    async def main():
+        return await asyncio.gather(
+            fetcher.fetch_secret("app", "path"),
+            fetcher.fetch_secret("legacy/app", "path"),
+        )
+
+    assert asyncio.run(main()) == ["/v1/secret/data/app", "/v1/legacy/app"]
+    assert requests == [
+        ("/v1/secret/data/app", "org", "s.org"),
+        ("/v1/legacy/app", "org/team-a", "s.org/team-a"),
+    ]
+
+
+def test_dynamic_mounts_are_rejected(mocker):
+    mocker.patch("vaultutils.async_secret_fetcher.create_vault_client")
+    mocker.patch.object(Config, "VAULT_MOUNTS", "database:dynamic")
+
+    with pytest.raises(ValueError, match="not supported"):
+        AsyncVaultSecretFetcher()
+
+
+def test_asgi_fetch_secret(mocker, fetcher):
+    mocker.patch.object(asgi, "_fetcher", fetcher)
+
+    async def main():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://sidecar"
+        ) as client:
+            ok = await client.post("/fetch-secret", json={"path": "a", "key": "path"})
+            bad = await client.post("/fetch-secrets", json={"paths": "a"})
+            return ok, bad
+
+    ok, bad = asyncio.run(main())
+
+    assert ok.status_code == HTTPStatus.OK
+    assert ok.json() == {"secret": "/v1/secret/data/a"}
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_asgi_error_statuses(mocker, fetcher):
+    mocker.patch.object(asgi, "_fetcher", fetcher)
+
+    async def main():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://sidecar"
+        ) as client:
+            return [
+                (await client.post("/fetch-secret", json=payload)).status_code
+                for payload in (
+                    {"path": "missing"},
+                    {"path": "a", "key": "nope"},
+                    {"path": "sealed"},
+                    {"key": "path"},
+                )
+            ]
+
+    assert asyncio.run(main()) == [
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.BAD_REQUEST,
+    ]
+
+
+def test_async_client_fetch_secret():
+    def handler(request):
+        assert request.url.path == "/fetch-secret"
+        return httpx.Response(HTTPStatus.OK, json={"secret": {"key": "value"}})
+
+    async def main():
+        async with AsyncVaultManagerClient() as client:
+            client.session._transport = httpx.MockTransport(handler)
+            return await client.fetch_secret("path/to/secret", "key")
+
+    assert asyncio.run(main()) == {"secret": {"key": "value"}}
@@ -0,0 +1,179 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest  # type: ignore
+from hvac import exceptions  # type: ignore
+
+from vaultutils import auth, metrics
+
+
+@pytest.fixture(autouse=True)
+def token_manager(mocker):
+    manager = auth.TokenManager(refresh_margin=30)
+    mocker.patch.object(auth, "token_manager", manager)
+    mocker.patch.object(auth, "token_managers", {})
+    mocker.patch.object(auth, "token_renewers", {})
+    mocker.patch.object(auth.Config, "VAULT_TOKEN_BACKGROUND_RENEWAL", new=False)
+    return manager
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    client.url = "http://localhost:8200"
+    return client
+
+
+def test_fresh_token_skips_vault(client, token_manager):
+    token_manager.store("s.token", ttl=3600)
+
+    auth.login_vault(client)
+
+    assert client.token == "s.token"  # noqa: S105
+    client.auth.token.lookup_self.assert_not_called()
+    client.is_authenticated.assert_not_called()
+
+
+def test_approle_login_records_lease(mocker, client, token_manager):
+    mocker.patch.object(auth.Config, "get_auth_method", return_value="approle")
+
+    def login(**_kwargs):
+        client.token = "s.approle"  # noqa: S105
+        return {"auth": {"lease_duration": 3600, "renewable": True}}
+
+    client.auth.approle.login.side_effect = login
+    logins = metrics.AUTH_LOGINS.value("approle")
+
+    auth.login_vault(client)
+    auth.login_vault(client)
+
+    client.auth.approle.login.assert_called_once()
+    assert metrics.AUTH_LOGINS.value("approle") == logins + 1
+    client.auth.token.lookup_self.assert_not_called()
+    assert token_manager.is_fresh()
+    assert token_manager.renewable
+
+
+def test_token_near_expiry_is_renewed(client, token_manager):
+    token_manager.store("s.token", ttl=10, renewable=True)
+    client.auth.token.lookup_self.return_value = {
+        "data": {"ttl": 10, "renewable": True}
+    }
+    client.auth.token.renew_self.return_value = {
+        "auth": {"lease_duration": 3600, "renewable": True}
+    }
+
+    auth.login_vault(client)
+
+    client.auth.token.renew_self.assert_called_once()
+    assert token_manager.token == "s.token"  # noqa: S105
+    assert token_manager.is_fresh()
+
+
+def test_rejected_token_triggers_login(mocker, client, token_manager):
+    mocker.patch.object(auth.Config, "get_auth_method", return_value="token")
+    mocker.patch.object(auth.Config, "VAULT_TOKEN", "s.new")
+    token_manager.store("s.old")
+    client.auth.token.lookup_self.side_effect = [
+        exceptions.Forbidden(),
+        {"data": {"ttl": 0, "renewable": False}},
+    ]
+
+    auth.login_vault(client)
+
+    assert client.token == "s.new"  # noqa: S105
+    assert token_manager.token == "s.new"  # noqa: S105
+    assert token_manager.is_fresh()
+
+
+def test_renewal_delay(token_manager):
+    assert token_manager.renewal_delay(0.5) is None
+
+    token_manager.store("s.token", ttl=0)
+    assert token_manager.renewal_delay(0.5) is None
+
+    token_manager.store("s.token", ttl=1000)
+    assert 490 < token_manager.renewal_delay(0.5) <= 500
+    # Never later than two refresh margins before expiry
+    assert 930 < token_manager.renewal_delay(0.99) <= 940
+
+
+def test_renewer_renews_renewable_token(mocker, token_manager):
+    mocker.patch.object(auth, "create_vault_client")
+    token_manager.store("s.token", ttl=60, renewable=True)
+    renewer = auth.TokenRenewer(token_manager, "http://localhost:8200")
+    renewer.client.auth.token.renew_self.return_value = {
+        "auth": {"lease_duration": 3600, "renewable": True}
+    }
+
+    renewer.renew()
+
+    renewer.client.auth.approle.login.assert_not_called()
+    assert token_manager.token == "s.token"  # noqa: S105
+    assert token_manager.renewal_delay(0.5) > 1000
+
+
+def test_renewer_logs_in_again_when_not_renewable(mocker, token_manager):
+    mocker.patch.object(auth, "create_vault_client")
+    mocker.patch.object(auth.Config, "get_auth_method", return_value="approle")
+    token_manager.store("s.old", ttl=60, renewable=False)
+    renewer = auth.TokenRenewer(token_manager, "http://localhost:8200")
+
+    def login(**_kwargs):
+        renewer.client.token = "s.new"  # noqa: S105
+        return {"auth": {"lease_duration": 3600, "renewable": False}}
+
+    renewer.client.auth.approle.login.side_effect = login
+
+    renewer.renew()
+
+    renewer.client.auth.token.renew_self.assert_not_called()
+    assert token_manager.token == "s.new"  # noqa: S105
+    assert token_manager.is_fresh()
+
+
+def test_short_ttl_token_is_not_renewed_in_a_loop(mocker, token_manager):
+    mocker.patch.object(auth, "create_vault_client")
+    # Shorter than two refresh margins, and already due for renewal
+    token_manager.store("s.token", ttl=60, renewable=True)
+    token_manager.issued_at -= 45
+    token_manager.expires_at -= 45
+    renewer = auth.TokenRenewer(token_manager, "http://localhost:8200")
+    renew_self = renewer.client.auth.token.renew_self
+    renew_self.return_value = {"auth": {"lease_duration": 60, "renewable": True}}
+
+    renewer.start()
+    time.sleep(0.5)
+    renewer.stop()
+
+    assert renew_self.call_count == 1
+    assert 15 < token_manager.renewal_delay(0.66) <= 20
+    assert token_manager.is_fresh()
+
+
+def test_tokens_are_kept_per_namespace(mocker, token_manager):
+    mocker.patch.object(auth.Config, "get_auth_method", return_value="approle")
+    clients = {}
+    for namespace in ("team-a", "team-b"):
+        client = MagicMock()
+        client.url = "http://localhost:8200"
+        client.adapter.namespace = namespace
+
+        def login(_client=client, _namespace=namespace, **_kwargs):
+            _client.token = f"s.{_namespace}"
+            return {"auth": {"lease_duration": 3600, "renewable": True}}
+
+        client.auth.approle.login.side_effect = login
+        clients[namespace] = client
+
+    for _ in range(2):
+        for client in clients.values():
+            auth.login_vault(client)
+
+    assert clients["team-a"].token == "s.team-a"  # noqa: S105
+    assert clients["team-b"].token == "s.team-b"  # noqa: S105
+    for client in clients.values():
+        client.auth.approle.login.assert_called_once()
+    assert auth.get_token_manager("team-a").namespace == "team-a"
+    # The login namespace's token is left alone
+    assert token_manager.token is None
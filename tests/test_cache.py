@@ -0,0 +1,97 @@
+import time
+
+import pytest  # type: ignore
+
+from vaultutils.cache import CacheEntry, SecretCache, estimate_size
+
+
+def entry(value):
+    return CacheEntry(value, time.monotonic())
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        SecretCache(policy="fifo")
+
+
+def test_hits_and_misses():
+    cache = SecretCache()
+    assert cache.get("a") is None
+    cache.set("a", entry({"k": "v"}))
+    assert cache.get("a").value == {"k": "v"}
+
+    info = cache.info()
+    assert info["hits"] == 1
+    assert info["misses"] == 1
+    assert info["hit_ratio"] == 0.5
+
+
+def test_lru_eviction_is_counted():
+    cache = SecretCache(policy="lru", maxsize=2)
+    cache.set("a", entry({}))
+    cache.set("b", entry({}))
+    cache.get("a")
+    cache.set("c", entry({}))
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.info()["evictions"] == 1
+
+
+def test_lru_drops_expired_entries_before_live_ones():
+    cache = SecretCache(policy="lru", maxsize=2, ttl_overrides={"short": 0.05})
+    cache.set("short", entry({}))
+    time.sleep(0.1)
+    cache.set("a", entry({}))
+    cache.set("b", entry({}))
+
+    assert "a" in cache
+    assert "b" in cache
+    assert len(cache) == 2
+    info = cache.info()
+    assert info["expirations"] == 1
+    assert info["evictions"] == 0
+
+
+def test_byte_budget():
+    value = {"k": "x" * 50}
+    budget = estimate_size("a", value) * 2
+    cache = SecretCache(policy="lru", max_bytes=budget)
+    for key in ("a", "b", "c"):
+        cache.set(key, entry(value))
+
+    assert len(cache) == 2
+    assert cache.info()["size"] <= budget
+
+    cache.set("huge", entry({"k": "x" * budget}))
+    assert "huge" not in cache
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu", "ttl", "hybrid"])
+def test_ttl_overrides(policy):
+    cache = SecretCache(
+        policy=policy, ttl=300, ttl_overrides={"db": 0, "db/static": 60}
+    )
+    cache.set("db/creds", entry({}))
+    cache.set("db/static/creds", entry({}))
+    cache.set("app/creds", entry({}))
+
+    assert cache.ttl_for("dbx") == 300
+    assert "db/creds" not in cache
+    assert "db/static/creds" in cache
+    assert "app/creds" in cache
+    # An entry that is dead on arrival is not kept at all
+    assert len(cache) == 2
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu", "ttl", "hybrid"])
+def test_set_again_after_expiry(policy):
+    cache = SecretCache(policy=policy, ttl=0.05)
+    cache.set("a", entry({"k": "old"}))
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+    cache.set("a", entry({"k": "new"}))
+    assert cache.get("a").value == {"k": "new"}
+    assert len(cache) == 1
+    assert cache.info()["size"] == 1
@@ -19,21 +19,54 @@ def test_setup(runner: CliRunner, mocker) -> None:
 
 
 def test_start(runner: CliRunner, mocker) -> None:
-    mock_server = mocker.patch("vaultutils.cli.start_server")
+    mock_server = mocker.patch("vaultutils.server.start_server")
     result = runner.invoke(cli, ["start"])
     assert result.exit_code == 0
     mock_server.assert_called_once()
 
 
+def test_start_with_workers(runner: CliRunner, mocker) -> None:
+    mock_server = mocker.patch("vaultutils.server.start_server")
+    result = runner.invoke(cli, ["start", "--workers", "4", "--threads", "8"])
+    assert result.exit_code == 0
+    mock_server.assert_called_once_with(
+        workers=4, threads=8, prefetch=None, socket_path=None
+    )
+
+
+def test_start_with_unreadable_manifest(runner: CliRunner, mocker, tmp_path) -> None:
+    pytest.importorskip("yaml")
+    mock_server = mocker.patch("vaultutils.server.start_server")
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text("paths: [app/db\n")
+
+    result = runner.invoke(cli, ["start", "--prefetch", str(manifest)])
+    assert result.exit_code == 2
+    assert "not valid YAML" in result.output
+
+    mocker.patch.dict("sys.modules", {"yaml": None})
+    result = runner.invoke(cli, ["start", "--asgi", "--prefetch", str(manifest)])
+    assert result.exit_code == 2
+    assert "PyYAML is required" in result.output
+    mock_server.assert_not_called()
+
+
+def test_reload(runner: CliRunner, mocker) -> None:
+    mock_server = mocker.patch("vaultutils.server.reload_server")
+    result = runner.invoke(cli, ["reload"])
+    assert result.exit_code == 0
+    mock_server.assert_called_once()
+
+
 def test_stop(runner: CliRunner, mocker) -> None:
-    mock_server = mocker.patch("vaultutils.cli.stop_server")
+    mock_server = mocker.patch("vaultutils.server.stop_server")
     result = runner.invoke(cli, ["stop"])
     assert result.exit_code == 0
     mock_server.assert_called_once()
 
 
 def test_fetch_secret(runner: CliRunner, mocker) -> None:
-    mock_client = mocker.patch("vaultutils.cli.client")
+    mock_client = mocker.patch("vaultutils.cli.get_client").return_value
     mock_client.fetch_secret.return_value = {"key": "value"}
 
     # Capture the result and print it for debugging
@@ -48,9 +81,30 @@ def test_fetch_secret(runner: CliRunner, mocker) -> None:
 
 
 def test_authenticate(runner: CliRunner, mocker) -> None:
-    mock_client = mocker.patch("vaultutils.cli.client")
+    mock_client = mocker.patch("vaultutils.cli.get_client").return_value
     mock_client.authenticate.return_value = "test_token"
     result = runner.invoke(cli, ["authenticate"])
     assert result.exit_code == 0
     assert "Authenticated successfully" in result.output
     assert "test_token" in result.output
+
+
+def test_fetch_secrets(runner: CliRunner, mocker) -> None:
+    mock_client = mocker.patch("vaultutils.cli.get_client").return_value
+    mock_client.fetch_secrets.return_value = {"secrets": {"a": {"key": "value"}}}
+
+    result = runner.invoke(cli, ["fetch-secrets", "a", "b"])
+    assert result.exit_code == 0
+    mock_client.fetch_secrets.assert_called_once_with(["a", "b"])
+    assert "value" in result.output
+
+
+def test_start_with_prefetch(runner: CliRunner, mocker, tmp_path) -> None:
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("app/db\n")
+    mock_server = mocker.patch("vaultutils.server.start_server")
+    result = runner.invoke(cli, ["start", "--prefetch", str(manifest)])
+    assert result.exit_code == 0
+    mock_server.assert_called_once_with(
+        workers=None, threads=None, prefetch=str(manifest), socket_path=None
+    )
@@ -1,4 +1,7 @@
+import json
 from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
 
 import pytest  # type: ignore
 
@@ -18,19 +21,19 @@ def test_setup(mocker):
 
 
 def test_start(mocker, client):
-    mock_start_server = mocker.patch("vaultutils.client.start_server")
+    mock_start_server = mocker.patch("vaultutils.server.start_server")
     client.start()
     mock_start_server.assert_called_once()
 
 
 def test_stop(mocker, client):
-    mock_stop_server = mocker.patch("vaultutils.client.stop_server")
+    mock_stop_server = mocker.patch("vaultutils.server.stop_server")
     client.stop()
     mock_stop_server.assert_called_once()
 
 
 def test_authenticate(mocker, client):
-    mock_post = mocker.patch("requests.post")
+    mock_post = mocker.patch.object(client.session, "post")
     mock_post.return_value.status_code = HTTPStatus.OK
     mock_post.return_value.json.return_value = {"token": "test_token"}
 
@@ -40,7 +43,7 @@ def test_authenticate(mocker, client):
 
 
 def test_fetch_secret(mocker, client):
-    mock_post = mocker.patch("requests.post")
+    mock_post = mocker.patch.object(client.session, "post")
     mock_post.return_value.status_code = HTTPStatus.OK
     mock_post.return_value.json.return_value = {"secret": {"key": "value"}}
 
@@ -51,3 +54,125 @@ def test_fetch_secret(mocker, client):
         json={"path": "path/to/secret", "key": "key"},
         timeout=10,
     )
+
+
+def test_fetch_secrets(mocker, client):
+    mock_post = mocker.patch.object(client.session, "post")
+    mock_post.return_value.json.return_value = {"secrets": {}, "errors": {}}
+
+    result = client.fetch_secrets(["a", "b"])
+    assert result == {"secrets": {}, "errors": {}}
+    mock_post.assert_called_once_with(
+        "http://localhost:8001/fetch-secrets",
+        json={"paths": ["a", "b"]},
+        timeout=10,
+    )
+
+
+@pytest.fixture
+def keep_alive_server():
+    """A local HTTP/1.1 server that records the connections it accepts."""
+    connections = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = json.dumps({"secret": "value"}).encode()
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    server.connections = connections
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_is_reused(keep_alive_server):
+    client = VaultManagerClient(port=keep_alive_server.server_address[1])
+    session = client.session
+
+    assert client.fetch_secret("path/to/secret") == {"secret": "value"}
+    assert client.fetch_secret("path/to/secret") == {"secret": "value"}
+
+    # Both calls went through the same session over one pooled connection
+    assert client.session is session
+    assert len(keep_alive_server.connections) == 1
+
+
+def test_watch(mocker, client):
+    session = mocker.patch("vaultutils.client.create_session").return_value
+    stream = session.get.return_value.__enter__.return_value
+    stream.iter_lines.return_value = [
+        b": watching",
+        b"",
+        b"event: change",
+        b'data: {"path": "a", "version": 2, "deleted": false}',
+        b"",
+    ]
+    events = []
+
+    watch = client.watch(["a"], events.append)
+    watch.stop()
+    watch.join(timeout=5)
+
+    assert events[0] == {"path": "a", "version": 2, "deleted": False}
+    session.get.assert_called_with(
+        "http://localhost:8001/watch",
+        params={"path": ["a"]},
+        stream=True,
+        timeout=(10, 45.0),
+    )
+
+
+def test_fetch_secret_cache(mocker):
+    client = VaultManagerClient(cache_ttl=60)
+    mock_get = mocker.patch.object(client.session, "get")
+    mock_get.return_value.status_code = HTTPStatus.OK
+    mock_get.return_value.json.return_value = {"secret": "value"}
+    mock_get.return_value.headers = {"ETag": '"v1"', "Cache-Control": "max-age=0"}
+
+    assert client.fetch_secret("path/to/secret", "key") == {"secret": "value"}
+    mock_get.assert_called_once_with(
+        "http://localhost:8001/fetch-secret",
+        params={"path": "path/to/secret", "key": "key"},
+        headers={},
+        timeout=10,
+    )
+
+    # max-age=0: revalidated on the next read, and answered with a 304
+    mock_get.return_value.status_code = HTTPStatus.NOT_MODIFIED
+    mock_get.return_value.headers = {"ETag": '"v1"', "Cache-Control": "max-age=30"}
+    assert client.fetch_secret("path/to/secret", "key") == {"secret": "value"}
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+    # Fresh for 30 seconds: no request
+    assert client.fetch_secret("path/to/secret", "key") == {"secret": "value"}
+    assert mock_get.call_count == 2
+
+
+def test_stale_secrets_are_not_cached(mocker):
+    client = VaultManagerClient(cache_ttl=60)
+    mock_get = mocker.patch.object(client.session, "get")
+    mock_get.return_value.status_code = HTTPStatus.OK
+    mock_get.return_value.json.return_value = {"secret": "value", "stale": True}
+    mock_get.return_value.headers = {}
+
+    client.fetch_secret("path/to/secret")
+    client.fetch_secret("path/to/secret")
+
+    assert mock_get.call_count == 2
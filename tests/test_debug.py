@@ -0,0 +1,95 @@
+import time
+from http import HTTPStatus
+from threading import Event, Thread
+
+import pytest  # type: ignore
+
+from vaultutils import debug
+from vaultutils.cache import CacheEntry, estimate_size
+from vaultutils.config import Config
+from vaultutils.controllers import vault_controller
+from vaultutils.secret_fetcher import VaultSecretFetcher
+from vaultutils.server import app
+
+
+@pytest.fixture
+def client(mocker):
+    mocker.patch.object(Config, "VAULT_DEBUG_ENDPOINTS", new=True)
+    app.testing = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def holder():
+    """A thread holding the controller lock until the test ends."""
+    acquired, done = Event(), Event()
+
+    def hold():
+        with vault_controller.lock:
+            acquired.set()
+            done.wait()
+
+    thread = Thread(target=hold, name="lock-holder")
+    thread.start()
+    acquired.wait()
+    yield thread
+    done.set()
+    thread.join()
+
+
+def test_debug_endpoints_are_off_by_default(mocker, client):
+    mocker.patch.object(Config, "VAULT_DEBUG_ENDPOINTS", new=False)
+
+    assert client.get("/debug/threads").status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.usefixtures("holder")
+def test_profile_returns_collapsed_stacks(client):
+    response = client.get("/debug/profile?seconds=0.05")
+
+    assert response.status_code == HTTPStatus.OK
+    stacks = response.get_data(as_text=True).splitlines()
+    line = next(s for s in stacks if s.startswith("lock-holder;"))
+    stack, count = line.rsplit(" ", 1)
+    assert "test_debug:holder.<locals>.hold" in stack
+    assert int(count) > 0
+
+
+def test_only_one_profile_runs_at_a_time(client):
+    with debug._profile_lock:
+        response = client.get("/debug/profile?seconds=0.01")
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+def test_thread_dump_shows_lock_holders(client, holder):
+    body = client.get("/debug/threads").get_json()
+
+    thread = next(t for t in body["threads"] if t["ident"] == holder.ident)
+    assert thread["holds"] == ["authenticate"]
+    assert any("in hold" in frame for frame in thread["stack"])
+    lock = next(lock for lock in body["locks"] if lock["name"] == "authenticate")
+    assert lock == {
+        "name": "authenticate",
+        "locked": True,
+        "owner": "lock-holder",
+        "waiters": 0,
+    }
+
+
+def test_cache_report(mocker):
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    fetcher = VaultSecretFetcher.__wrapped__()
+    fetcher.cache.set("small", CacheEntry({"k": "v"}, time.monotonic()))
+    fetcher.cache.set("large", CacheEntry({"k": "v" * 100}, time.monotonic()))
+
+    report = debug.cache_report(fetcher, top=1)
+
+    tier = report["caches"]["mount:secret"]
+    assert tier["entries"] == 2
+    assert tier["largest"] == [
+        {"path": "large", "bytes": estimate_size("large", {"k": "v" * 100})}
+    ]
+    assert "v" * 100 not in str(report)
+    assert report["process"]["threads"] >= 1
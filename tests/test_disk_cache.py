@@ -0,0 +1,86 @@
+import time
+from pathlib import Path
+
+import pytest  # type: ignore
+
+fernet = pytest.importorskip("cryptography.fernet")
+
+from vaultutils import auth  # noqa: E402
+from vaultutils.disk_cache import DiskCache  # noqa: E402
+from vaultutils.secret_fetcher import VaultSecretFetcher  # noqa: E402
+
+
+@pytest.fixture
+def key():
+    return fernet.Fernet.generate_key().decode()
+
+
+@pytest.fixture
+def disk(tmp_path, key):
+    return DiskCache(str(tmp_path / "cache.bin"), key)
+
+
+def test_round_trip_drops_expired(disk, key):
+    now = time.time()
+    disk.set("live", {"k": "v"}, now, now + 60)
+    disk.set("expired", {"k": "v"}, now - 120, now - 60)
+    disk.set_token("s.token", now + 60, renewable=True)
+
+    other = DiskCache(disk.path, key)
+
+    assert [path for path, *_ in other.secrets()] == ["live"]
+    assert other.get_token() == {
+        "token": "s.token",
+        "expires_at": now + 60,
+        "renewable": True,
+    }
+    assert b"s.token" not in Path(disk.path).read_bytes()
+
+
+def test_writes_from_several_processes_are_merged(disk, key):
+    other = DiskCache(disk.path, key)
+    now = time.time()
+    disk.set("a", 1, now, now + 60)
+    other.set("b", 2, now, now + 60)
+    disk.flush()
+    other.flush()
+
+    assert sorted(path for path, *_ in disk.secrets()) == ["a", "b"]
+
+
+def test_file_with_another_key_is_ignored(disk):
+    disk.set_token("s.token", 0)
+
+    other = DiskCache(disk.path, fernet.Fernet.generate_key().decode())
+
+    assert other.get_token() is None
+
+
+def test_fetcher_restores_secrets(mocker, disk):
+    now = time.time()
+    disk.set("path/to/secret", {"key": "value"}, now, now + 60)
+    disk.flush()
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    mocker.patch("vaultutils.secret_fetcher.login_vault")
+    mocker.patch("vaultutils.secret_fetcher.get_disk_cache", return_value=disk)
+
+    fetcher = VaultSecretFetcher.__wrapped__()
+    read = mocker.patch.object(fetcher, "_fetch_secret_from_vault")
+
+    assert fetcher.fetch_secret("path/to/secret", "key") == "value"
+    read.assert_not_called()
+
+
+def test_login_restores_token(mocker, disk):
+    disk.set_token("s.saved", time.time() + 3600)
+    mocker.patch.object(auth, "token_manager", auth.TokenManager(refresh_margin=30))
+    mocker.patch.object(auth, "token_managers", {})
+    mocker.patch.object(auth, "token_renewers", {})
+    mocker.patch.object(auth.Config, "VAULT_TOKEN_BACKGROUND_RENEWAL", new=False)
+    mocker.patch("vaultutils.auth.get_disk_cache", return_value=disk)
+    client = mocker.MagicMock(url="http://localhost:8200")
+
+    auth.login_vault(client)
+
+    assert client.token == "s.saved"  # noqa: S105
+    client.auth.token.lookup_self.assert_not_called()
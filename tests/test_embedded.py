@@ -0,0 +1,47 @@
+import os
+
+import pytest  # type: ignore
+
+from vaultutils import auth
+from vaultutils.embedded import EmbeddedVaultClient
+from vaultutils.engines import Secret
+from vaultutils.secret_fetcher import VaultSecretFetcher
+
+
+@pytest.fixture
+def client(mocker):
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    mocker.patch("vaultutils.secret_fetcher.login_vault")
+    VaultSecretFetcher.reset()
+    yield EmbeddedVaultClient()
+    VaultSecretFetcher.reset()
+
+
+def test_same_responses_as_the_server(mocker, client):
+    mocker.patch.object(
+        client.fetcher,
+        "_fetch_secret_from_vault",
+        return_value=Secret({"key": "value"}),
+    )
+
+    assert client.fetch_secret("path/to/secret", "key") == {"secret": "value"}
+    assert "other" in client.fetch_secret("path/to/secret", "other")["error"]
+    assert client.fetch_secrets(["path/to/secret"]) == {
+        "secrets": {"path/to/secret": {"key": "value"}},
+        "errors": {},
+    }
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_gets_its_own_fetcher(client):
+    parent = client.fetcher
+    with auth._login_lock:
+        pid = os.fork()
+        if pid == 0:
+            # Nothing the parent held may leak into the child
+            fresh = client.fetcher is not parent and not auth._login_lock.locked()
+            os._exit(0 if fresh else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert client.fetcher is parent
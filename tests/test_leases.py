@@ -0,0 +1,73 @@
+import time
+
+import pytest  # type: ignore
+
+from vaultutils.config import Config
+from vaultutils.secret_fetcher import VaultSecretFetcher
+
+
+@pytest.fixture
+def fetcher(mocker):
+    mocker.patch.object(Config, "VAULT_MOUNTS", "database:dynamic")
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    mocker.patch("vaultutils.secret_fetcher.login_vault")
+    fetcher = VaultSecretFetcher.__wrapped__()
+    fetcher.client.read.return_value = {
+        "data": {"username": "u"},
+        "lease_id": "database/creds/app/abc",
+        "lease_duration": 3600,
+        "renewable": True,
+    }
+    yield fetcher
+    fetcher.leases.stop()
+
+
+def test_cache_expiry_follows_the_lease(fetcher):
+    fetcher.soft_ttl = 0
+
+    assert fetcher.fetch_secret("database/creds/app") == {"username": "u"}
+    assert fetcher.fetch_secret("database/creds/app") == {"username": "u"}
+
+    # Neither the soft TTL nor the 300s cache TTL issues new credentials
+    fetcher.client.read.assert_called_once()
+    entry = fetcher.mounts["database"].cache.peek("database/creds/app")
+    assert entry.expires_at - entry.fetched_at == pytest.approx(3600 - 30, abs=1)
+
+
+def test_due_leases_are_renewed(fetcher):
+    fetcher.fetch_secret("database/creds/app")
+    fetcher.leases.fraction = 0
+    fetcher.client.sys.renew_lease.return_value = {
+        "lease_id": "database/creds/app/abc",
+        "lease_duration": 7200,
+        "renewable": True,
+    }
+
+    assert fetcher.leases.renew_due() == 1
+
+    fetcher.client.sys.renew_lease.assert_called_once_with(
+        lease_id="database/creds/app/abc"
+    )
+    entry = fetcher.mounts["database"].cache.peek("database/creds/app")
+    assert entry.expires_at == pytest.approx(time.monotonic() + 7200 - 30, abs=1)
+
+
+def test_leases_of_evicted_secrets_are_not_renewed(fetcher):
+    fetcher.fetch_secret("database/creds/app")
+    fetcher.leases.fraction = 0
+    fetcher.mounts["database"].cache.delete("database/creds/app")
+
+    assert fetcher.leases.renew_due() == 0
+    fetcher.client.sys.renew_lease.assert_not_called()
+
+
+def test_leases_are_revoked_on_shutdown(fetcher):
+    fetcher.fetch_secret("database/creds/app")
+
+    assert fetcher.revoke_leases() == 1
+
+    fetcher.client.sys.revoke_lease.assert_called_once_with(
+        lease_id="database/creds/app/abc"
+    )
+    assert fetcher.mounts["database"].cache.peek("database/creds/app") is None
+    assert fetcher.cache_info()["leases"]["leases"] == 0
@@ -0,0 +1,62 @@
+from threading import Thread
+
+from vaultutils.metrics import Counter, Histogram, Registry, TimedLock
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(seconds)
+
+    samples = {
+        (name, labels.get("le")): value for name, labels, value in histogram.samples()
+    }
+
+    assert samples[("latency_seconds_bucket", "0.1")] == 1
+    assert samples[("latency_seconds_bucket", "1.0")] == 3
+    assert samples[("latency_seconds_bucket", "+Inf")] == 4
+    assert samples[("latency_seconds_count", None)] == 4
+    assert samples[("latency_seconds_sum", None)] == 6.05
+
+
+def test_registry_renders_text_format():
+    registry = Registry()
+    counter = Counter("logins_total", "Logins.", label="method")
+    registry.register(counter)
+    counter.inc(label_value="approle")
+    counter.inc(label_value="approle")
+    registry.add_collector(
+        lambda: [("entries", "gauge", "Entries.", [("entries", {}, 3)])]
+    )
+
+    assert registry.render() == (
+        "# HELP logins_total Logins.\n"
+        "# TYPE logins_total counter\n"
+        'logins_total{method="approle"} 2\n'
+        "# HELP entries Entries.\n"
+        "# TYPE entries gauge\n"
+        "entries 3\n"
+    )
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = Counter("reads_total", "Reads.", label="path")
+    registry.register(counter)
+    counter.inc(label_value='a"b\\c\nd')
+
+    assert 'reads_total{path="a\\"b\\\\c\\nd"} 1\n' in registry.render()
+
+
+def test_timed_lock_records_wait():
+    histogram = Histogram("wait_seconds", "Wait.", label="lock")
+    lock = TimedLock("test", histogram)
+
+    with lock:
+        thread = Thread(target=lambda: lock.acquire() and lock.release())
+        thread.start()
+        thread.join(0.05)
+    thread.join()
+
+    assert histogram.count("test") == 2
+    assert histogram.samples()[-2][2] >= 0.05
@@ -0,0 +1,139 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest  # type: ignore
+import requests  # type: ignore
+
+from vaultutils import auth, oidc
+from vaultutils.config import Config
+from vaultutils.oidc import CallbackServer
+
+
+@pytest.fixture
+def server():
+    server = CallbackServer(0)
+    yield server
+    server.close()
+
+
+def callback(server, **params):
+    return requests.get(
+        f"http://127.0.0.1:{server.port}/oidc/callback", params=params, timeout=5
+    )
+
+
+def test_callbacks_are_routed_by_state(server):
+    first, second = server.expect("s1"), server.expect("s2")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        codes = pool.map(lambda p: p.wait(5), [first, second])
+        assert callback(server, state="s2", code="c2").status_code == HTTPStatus.OK
+        assert callback(server, state="s1", code="c1").status_code == HTTPStatus.OK
+
+        assert list(codes) == ["c1", "c2"]
+
+
+def test_unknown_state_is_rejected(server):
+    server.expect("s1")
+
+    assert callback(server, state="other", code="c").status_code == (
+        HTTPStatus.BAD_REQUEST
+    )
+
+
+def test_provider_error_fails_the_login(server):
+    pending = server.expect("s1")
+    callback(server, state="s1", error="access_denied")
+
+    with pytest.raises(ValueError, match="access_denied"):
+        pending.wait(5)
+
+
+def auth_client(mocker):
+    client = mocker.MagicMock()
+    client.auth.oidc.oidc_authorization_url_request.return_value = {
+        "data": {"auth_url": "https://idp/auth?nonce=n&state=s"}
+    }
+    return client
+
+
+def test_get_oidc_token(mocker):
+    mocker.patch.object(Config, "VAULT_SERVER_HOST", "127.0.0.1")
+    client = auth_client(mocker)
+    client.auth.oidc.oidc_callback.return_value = {"auth": {"client_token": "tok"}}
+    mocker.patch(
+        "webbrowser.open",
+        side_effect=lambda _url: callback(oidc._servers[0], state="s", code="c"),
+    )
+
+    assert auth.get_oidc_token(client, oidc_callback_port=0) == "tok"
+    client.auth.oidc.oidc_callback.assert_called_once_with(
+        code="c", path="oidc", nonce="n", state="s"
+    )
+    # No login is waiting any more: the port is released
+    assert oidc._servers == {}
+
+
+def test_listener_is_shared_while_logins_are_open(mocker):
+    mocker.patch.object(Config, "VAULT_SERVER_HOST", "127.0.0.1")
+    server, first = oidc.open_login(0, "s1")
+    same, second = oidc.open_login(0, "s2")
+    assert same is server
+
+    oidc.close_login(server, "s1")
+    assert callback(server, state="s2", code="c2").status_code == HTTPStatus.OK
+    assert second.wait(5) == "c2"
+    with pytest.raises(ValueError, match="cancelled"):
+        first.wait(5)
+
+    oidc.close_login(server, "s2")
+    assert oidc._servers == {}
+
+
+def test_get_oidc_token_times_out(mocker, server):
+    mocker.patch.object(Config, "VAULT_OIDC_TIMEOUT", 0.1)
+    mocker.patch(
+        "vaultutils.oidc.open_login",
+        side_effect=lambda _port, state: (
+            server,
+            server.expect(state),
+        ),
+    )
+    mocker.patch(
+        "vaultutils.oidc.close_login", side_effect=lambda s, state: s.cancel(state)
+    )
+    mocker.patch("webbrowser.open")
+
+    with pytest.raises(TimeoutError):
+        auth.get_oidc_token(auth_client(mocker))
+
+    # The late callback no longer matches a login
+    assert callback(server, state="s", code="c").status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_headless_logins_run_concurrently(mocker):
+    playwright = mocker.MagicMock()
+    firefox = playwright.__enter__.return_value.firefox
+    context = firefox.launch.return_value.new_context.return_value
+    pages = [mocker.MagicMock(), mocker.MagicMock()]
+    context.new_page.side_effect = pages
+    mocker.patch("vaultutils.oidc._sync_playwright", return_value=lambda: playwright)
+    browser = oidc.HeadlessBrowser("", "")
+    first, second = oidc.PendingLogin("s1"), oidc.PendingLogin("s2")
+
+    browser.open("https://idp/1", first, timeout=5)
+    browser.open("https://idp/2", second, timeout=5)
+    # The second page opens while the first login is still waiting
+    for page in pages:
+        for _ in range(50):
+            if page.goto.called:
+                break
+            time.sleep(0.01)
+        page.goto.assert_called_once()
+
+    second.resolve("c2")
+    time.sleep(0.3)
+    pages[1].close.assert_called_once()
+    pages[0].close.assert_not_called()
+    browser.close()
@@ -0,0 +1,83 @@
+import json
+import sys
+
+import pytest  # type: ignore
+
+from vaultutils.config import Config
+from vaultutils.engines import Secret
+from vaultutils.prefetch import get_prefetch_paths, load_manifest
+from vaultutils.secret_fetcher import VaultSecretFetcher
+
+
+@pytest.mark.parametrize(
+    ("name", "content"),
+    [
+        ("manifest.json", json.dumps(["app/db", "app/api"])),
+        ("manifest.json", json.dumps({"paths": ["app/db", "app/api"]})),
+        ("manifest.txt", "# services\napp/db\n\napp/api\n"),
+    ],
+)
+def test_load_manifest(tmp_path, name, content):
+    manifest = tmp_path / name
+    manifest.write_text(content)
+
+    assert load_manifest(str(manifest)) == ["app/db", "app/api"]
+
+
+def test_load_yaml_manifest(tmp_path):
+    pytest.importorskip("yaml")
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text("paths:\n  - app/db\n  - app/api\n")
+
+    assert load_manifest(str(manifest)) == ["app/db", "app/api"]
+
+
+def test_yaml_manifest_without_pyyaml(tmp_path, mocker):
+    mocker.patch.dict(sys.modules, {"yaml": None})
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text("- app/db\n")
+
+    with pytest.raises(RuntimeError, match=r"vaultutils\[yaml\]"):
+        load_manifest(str(manifest))
+
+
+def test_invalid_manifest(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({"paths": "app/db"}))
+
+    with pytest.raises(ValueError, match="list of secret paths"):
+        load_manifest(str(manifest))
+
+
+def test_prefetch_paths_from_manifest_and_env(mocker, tmp_path):
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("app/db\napp/api\n")
+    mocker.patch.object(Config, "VAULT_PREFETCH_MANIFEST", str(manifest))
+    mocker.patch.object(Config, "VAULT_PREFETCH_PATHS", "app/api, app/queue")
+
+    assert get_prefetch_paths() == ["app/db", "app/api", "app/queue"]
+
+
+def test_warm_up_loads_paths_in_background(mocker):
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    login = mocker.patch("vaultutils.secret_fetcher.login_vault")
+    fetcher = VaultSecretFetcher.__wrapped__()
+
+    def read(path, _version):
+        if path == "missing":
+            raise KeyError(path)
+        return Secret({"path": path})
+
+    vault = mocker.patch.object(fetcher, "_fetch_secret_from_vault", side_effect=read)
+
+    fetcher.start_warm_up(["a", "b", "missing", "a"])
+    assert fetcher.warm_up_status.wait(5)
+
+    status = fetcher.warm_up_status.as_dict()
+    assert status["ready"]
+    assert status["loaded"] == 2
+    assert list(status["errors"]) == ["missing"]
+    login.assert_called()
+    vault.reset_mock()
+    assert fetcher.fetch_secret("a") == {"path": "a"}
+    vault.assert_not_called()
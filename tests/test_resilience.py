@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest  # type: ignore
+from hvac import exceptions  # type: ignore
+
+from vaultutils.engines import Secret
+from vaultutils.resilience import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    error_status,
+)
+from vaultutils.secret_fetcher import VaultSecretFetcher
+
+
+def fail():
+    raise exceptions.VaultDown
+
+
+@pytest.fixture
+def fetcher(mocker):
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    mocker.patch("vaultutils.secret_fetcher.login_vault")
+    fetcher = VaultSecretFetcher.__wrapped__()
+    # No jittered pauses between the simulated outage errors
+    fetcher.scheduler.backoff_max = 0
+    return fetcher
+
+
+def test_breaker_opens_after_consecutive_outages():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(exceptions.VaultDown):
+            breaker.call(fail)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "value")
+
+
+def test_breaker_ignores_request_errors():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    def missing():
+        raise exceptions.InvalidPath
+
+    with pytest.raises(exceptions.InvalidPath):
+        breaker.call(missing)
+
+    assert breaker.state == CLOSED
+
+
+def test_breaker_probe_closes_or_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    with pytest.raises(exceptions.VaultDown):
+        breaker.call(fail)
+
+    # The probe fails: open again
+    with pytest.raises(exceptions.VaultDown):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    assert breaker.call(lambda: "value") == "value"
+    assert breaker.info()["state"] == CLOSED
+
+
+def test_error_status():
+    assert error_status(KeyError("key")) == HTTPStatus.NOT_FOUND
+    assert error_status(exceptions.Forbidden()) == HTTPStatus.FORBIDDEN
+    assert error_status(CircuitOpenError()) == HTTPStatus.SERVICE_UNAVAILABLE
+    assert error_status(exceptions.InternalServerError()) == HTTPStatus.BAD_GATEWAY
+    assert error_status(RuntimeError()) == HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def test_missing_secrets_are_cached_briefly(mocker, fetcher):
+    read = mocker.patch.object(
+        fetcher, "_fetch_secret_from_vault", side_effect=exceptions.InvalidPath
+    )
+
+    for _ in range(3):
+        with pytest.raises(exceptions.InvalidPath):
+            fetcher.fetch_secret("path/to/missing")
+
+    read.assert_called_once()
+    assert fetcher.cache_info()["negative_hits"] == 2
+
+
+def test_stale_value_is_served_while_vault_is_down(mocker, fetcher):
+    read = mocker.patch.object(
+        fetcher, "_fetch_secret_from_vault", return_value=Secret({"key": "value"})
+    )
+    fetcher.fetch_secret("path/to/secret")
+    fetcher.cache.clear()
+    read.side_effect = exceptions.VaultDown
+
+    value, entry = fetcher.fetch_secret_detailed("path/to/secret", "key")
+    assert value == "value"
+    assert entry.stale
+    secrets, errors, stale = fetcher.fetch_secrets_detailed(
+        ["path/to/secret", "path/to/other"]
+    )
+    assert secrets == {"path/to/secret": {"key": "value"}}
+    assert list(errors) == ["path/to/other"]
+    assert stale == ["path/to/secret"]
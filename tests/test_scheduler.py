@@ -0,0 +1,114 @@
+import time
+from threading import Event, Thread
+
+import pytest  # type: ignore
+from hvac import exceptions  # type: ignore
+
+from vaultutils.scheduler import (
+    PREFETCH,
+    REFRESH,
+    USER,
+    AdaptiveLimiter,
+    UpstreamScheduler,
+    upstream_priority,
+)
+
+
+def test_limit_grows_while_latency_is_stable():
+    limiter = AdaptiveLimiter(initial=4, min_limit=1, max_limit=16)
+
+    for _ in range(50):
+        limiter.on_success(0.01, inflight=int(limiter.limit))
+
+    assert limiter.limit == 16
+
+
+def test_limit_does_not_grow_when_unused():
+    limiter = AdaptiveLimiter(initial=4, min_limit=1, max_limit=16)
+
+    for _ in range(50):
+        limiter.on_success(0.01, inflight=1)
+
+    assert limiter.limit == 4
+
+
+def test_limit_shrinks_when_latency_rises():
+    limiter = AdaptiveLimiter(initial=16, min_limit=1, max_limit=16)
+    for _ in range(50):
+        limiter.on_success(0.01, inflight=16)
+
+    # Ten times slower: the limit settles where the queueing headroom
+    # (its square root) equals the halving, at 4
+    for _ in range(30):
+        limiter.on_success(0.1, inflight=16)
+
+    assert limiter.limit < 8
+    limiter.on_overload()
+    assert limiter.limit < 4
+
+
+def test_waiting_calls_run_by_priority():
+    scheduler = UpstreamScheduler(AdaptiveLimiter(initial=1, min_limit=1))
+    release, started = Event(), Event()
+    order = []
+
+    def blocker():
+        started.set()
+        release.wait()
+
+    threads = [Thread(target=scheduler.call, args=(blocker,))]
+    threads[0].start()
+    started.wait()
+    for priority in (PREFETCH, REFRESH, USER):
+        thread = Thread(
+            target=scheduler.call, args=(lambda p=priority: order.append(p), priority)
+        )
+        thread.start()
+        threads.append(thread)
+        while scheduler.info()["queued"] < len(threads) - 1:
+            time.sleep(0.001)
+
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == [USER, REFRESH, PREFETCH]
+
+
+def test_rate_limited_calls_are_retried_after_a_backoff():
+    scheduler = UpstreamScheduler(retries=2, backoff_base=0.01, backoff_max=0.01)
+    attempts = []
+
+    def read():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise exceptions.RateLimitExceeded
+        return "value"
+
+    assert scheduler.call(read) == "value"
+    assert len(attempts) == 3
+
+
+def test_server_errors_are_not_retried():
+    scheduler = UpstreamScheduler(backoff_max=0)
+    limit = scheduler.limiter.limit
+
+    def read():
+        raise exceptions.InternalServerError
+
+    with pytest.raises(exceptions.InternalServerError):
+        scheduler.call(read)
+
+    assert scheduler.limiter.limit == limit / 2
+    assert scheduler.info()["inflight"] == 0
+
+
+def test_priority_comes_from_the_context(mocker):
+    scheduler = UpstreamScheduler()
+    acquire = mocker.spy(scheduler, "_acquire")
+
+    with upstream_priority(PREFETCH):
+        scheduler.call(lambda: None)
+    scheduler.call(lambda: None)
+
+    assert [c.args[0] for c in acquire.call_args_list] == [PREFETCH, USER]
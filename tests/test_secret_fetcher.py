@@ -0,0 +1,244 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest  # type: ignore
+from hvac import exceptions  # type: ignore
+
+from vaultutils.config import Config
+from vaultutils.engines import MountSpec, Secret
+from vaultutils.secret_fetcher import VaultSecretFetcher
+
+
+@pytest.fixture
+def fetcher(mocker):
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    mocker.patch("vaultutils.secret_fetcher.login_vault")
+    # Bypass the singleton so every test gets a fresh cache
+    return VaultSecretFetcher.__wrapped__()
+
+
+def test_fetch_secret_caches(mocker, fetcher):
+    read = mocker.patch.object(
+        fetcher, "_fetch_secret_from_vault", return_value=Secret({"key": "value"})
+    )
+
+    assert fetcher.fetch_secret("path/to/secret", "key") == "value"
+    assert fetcher.fetch_secret("path/to/secret") == {"key": "value"}
+    read.assert_called_once_with("path/to/secret", None)
+
+
+def test_fetch_secret_missing_key(mocker, fetcher):
+    mocker.patch.object(
+        fetcher, "_fetch_secret_from_vault", return_value=Secret({"key": "value"})
+    )
+
+    with pytest.raises(KeyError):
+        fetcher.fetch_secret("path/to/secret", "other")
+
+
+def test_concurrent_misses_are_coalesced(mocker, fetcher):
+    def slow_read(path, _version):
+        time.sleep(0.1)
+        return Secret({"path": path})
+
+    read = mocker.patch.object(
+        fetcher, "_fetch_secret_from_vault", side_effect=slow_read
+    )
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(
+            pool.map(lambda _: fetcher.fetch_secret("path/to/secret"), range(10))
+        )
+
+    assert results == [{"path": "path/to/secret"}] * 10
+    read.assert_called_once_with("path/to/secret", None)
+
+
+def test_misses_on_different_paths_run_in_parallel(mocker, fetcher):
+    first_started = Event()
+    release_first = Event()
+
+    def read(path, _version):
+        if path == "slow":
+            first_started.set()
+            release_first.wait(timeout=5)
+        return Secret({"path": path})
+
+    mocker.patch.object(fetcher, "_fetch_secret_from_vault", side_effect=read)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        slow = pool.submit(fetcher.fetch_secret, "slow")
+        assert first_started.wait(timeout=5)
+        # A miss on another path must not wait for the slow read
+        assert fetcher.fetch_secret("fast") == {"path": "fast"}
+        release_first.set()
+        assert slow.result(timeout=5) == {"path": "slow"}
+
+
+def test_stale_entry_is_served_while_refreshing(mocker, fetcher):
+    release_refresh = Event()
+    reads = iter([{"version": 1}, {"version": 2}])
+
+    def read(_path, _version):
+        value = next(reads)
+        if value["version"] == 2:
+            release_refresh.wait(timeout=5)
+        return Secret(value)
+
+    read_mock = mocker.patch.object(
+        fetcher, "_fetch_secret_from_vault", side_effect=read
+    )
+    fetcher.soft_ttl = 0
+
+    assert fetcher.fetch_secret("path/to/secret") == {"version": 1}
+    # Past the soft TTL: the stale value is returned without waiting on Vault
+    assert fetcher.fetch_secret("path/to/secret") == {"version": 1}
+
+    release_refresh.set()
+    fetcher._executor.shutdown(wait=True)
+    assert read_mock.call_count == 2
+    assert fetcher.cache.peek("path/to/secret").value == {"version": 2}
+
+
+def test_fetch_secrets_reports_errors_per_path(mocker, fetcher):
+    def read(path, _version):
+        if path == "missing":
+            err_msg = "no such path"
+            raise ValueError(err_msg)
+        return Secret({"path": path})
+
+    read_mock = mocker.patch.object(
+        fetcher, "_fetch_secret_from_vault", side_effect=read
+    )
+    fetcher.fetch_secret("cached")
+
+    secrets, errors = fetcher.fetch_secrets(["cached", "a", "missing", "a"])
+
+    assert secrets == {"cached": {"path": "cached"}, "a": {"path": "a"}}
+    assert errors == {"missing": "no such path"}
+    assert read_mock.call_count == 3
+
+
+def test_forbidden_read_logs_in_again(mocker, fetcher):
+    invalidate = mocker.patch("vaultutils.secret_fetcher.invalidate_token")
+    mocker.patch.object(
+        fetcher,
+        "_fetch_secret_from_vault",
+        side_effect=[exceptions.Forbidden(), Secret({"key": "value"})],
+    )
+
+    assert fetcher.fetch_secret("path/to/secret", "key") == "value"
+    invalidate.assert_called_once()
+
+
+def kv_response(version):
+    return {"data": {"data": {"version": version}, "metadata": {"version": version}}}
+
+
+def test_revalidation_skips_unchanged_data(fetcher):
+    fetcher.revalidate = True
+    kv = fetcher.client.secrets.kv
+    kv.read_secret_version.return_value = kv_response(1)
+    kv.read_secret_metadata.return_value = {"data": {"current_version": 1}}
+
+    assert fetcher.fetch_secret("app/db") == {"version": 1}
+    assert fetcher.cache.peek("app/db").version == 1
+    fetcher._refresh_secret("app/db")
+
+    kv.read_secret_version.assert_called_once()
+    assert fetcher.cache_info()["revalidations"] == 1
+
+    kv.read_secret_metadata.return_value = {"data": {"current_version": 2}}
+    kv.read_secret_version.return_value = kv_response(2)
+    fetcher._refresh_secret("app/db")
+
+    assert kv.read_secret_version.call_args.kwargs["version"] == 2
+    assert fetcher.fetch_secret("app/db") == {"version": 2}
+
+
+def test_specific_versions_are_cached_without_expiry(fetcher):
+    kv = fetcher.client.secrets.kv
+    kv.read_secret_version.return_value = kv_response(3)
+
+    assert fetcher.fetch_secret("app/db", "version", version=3) == 3
+    assert fetcher.fetch_secret("app/db", version=3) == {"version": 3}
+
+    kv.read_secret_version.assert_called_once_with(
+        path="app/db", version=3, mount_point=fetcher.mount_point
+    )
+    assert fetcher.versions.peek("app/db?version=3").expires_at == float("inf")
+    assert "app/db" not in fetcher.cache
+
+
+def test_deleted_versions_are_not_cached(fetcher):
+    kv = fetcher.client.secrets.kv
+    kv.read_secret_version.return_value = {
+        "data": {
+            "data": None,
+            "metadata": {"version": 2, "deletion_time": "2024-01-01T00:00:00Z"},
+        }
+    }
+
+    for _ in range(2):
+        with pytest.raises(exceptions.InvalidPath, match="is deleted"):
+            fetcher.fetch_secret("app/db", version=2)
+
+    assert "app/db?version=2" not in fetcher.versions
+
+
+def test_check_version_refreshes_changed_secrets(fetcher):
+    kv = fetcher.client.secrets.kv
+    kv.read_secret_version.return_value = kv_response(1)
+    kv.read_secret_metadata.return_value = {"data": {"current_version": 1}}
+    fetcher.fetch_secret("app/db")
+
+    assert fetcher.check_version("app/db") == 1
+    kv.read_secret_version.assert_called_once()
+
+    kv.read_secret_metadata.return_value = {"data": {"current_version": 2}}
+    kv.read_secret_version.return_value = kv_response(2)
+
+    assert fetcher.check_version("app/db") == 2
+    assert fetcher.cache.peek("app/db").value == {"version": 2}
+
+
+def test_mount_spec_parsing():
+    assert MountSpec.parse("database:dynamic@team-a") == MountSpec(
+        "database", "dynamic", "team-a"
+    )
+    assert MountSpec.parse("/legacy/") == MountSpec("legacy", "kv2", None)
+    with pytest.raises(ValueError, match="Invalid mount"):
+        MountSpec.parse("legacy:kv3")
+
+
+def test_paths_are_routed_to_their_mount(mocker):
+    mocker.patch.object(Config, "VAULT_MOUNTS", "legacy:kv1,database:dynamic@team-a")
+    mocker.patch(
+        "vaultutils.secret_fetcher.create_vault_client",
+        side_effect=lambda namespace=None: mocker.MagicMock(namespace=namespace),
+    )
+    mocker.patch("vaultutils.secret_fetcher.login_vault")
+    fetcher = VaultSecretFetcher.__wrapped__()
+    legacy, database = fetcher.mounts["legacy"], fetcher.mounts["database"]
+    legacy.client.secrets.kv.v1.read_secret.return_value = {"data": {"k": "v1"}}
+    database.client.read.return_value = {
+        "data": {"username": "u"},
+        "lease_id": "database/creds/app/abc",
+        "lease_duration": 3600,
+        "renewable": True,
+    }
+
+    assert fetcher.fetch_secret("legacy/app", "k") == "v1"
+    assert fetcher.fetch_secret("database/creds/app") == {"username": "u"}
+
+    legacy.client.secrets.kv.v1.read_secret.assert_called_once_with(
+        path="app", mount_point="legacy"
+    )
+    database.client.read.assert_called_once_with("database/creds/app")
+    assert legacy.client is fetcher.client
+    assert database.client.namespace == "team-a"
+    entry = database.cache.peek("database/creds/app")
+    assert entry.lease_id == "database/creds/app/abc"
+    assert fetcher.cache.peek("database/creds/app") is None
+    assert set(fetcher.cache_info()["mounts"]) == {"legacy", "database"}
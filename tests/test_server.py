@@ -1,10 +1,15 @@
+import time
 from http import HTTPStatus
 from unittest.mock import MagicMock, patch  # noqa: F401
 
 import pytest  # type: ignore
 
+from vaultutils.cache import CacheEntry
+from vaultutils.config import Config
+from vaultutils.resilience import CircuitOpenError
 from vaultutils.server import app as flask_app  # type: ignore
 from vaultutils.server import start_server, stop_server
+from vaultutils.watcher import SecretWatcher
 
 
 @pytest.fixture
@@ -34,7 +39,6 @@ def test_stop_server(mocker):
 
 def test_authenticate(mocker, client):
     mocker.patch("vaultutils.auth.login_vault")
-    mocker.patch("vaultutils.controllers.vault_controller.Client")
 
     response = client.post("/authenticate")
     assert response.status_code == HTTPStatus.OK
@@ -44,8 +48,8 @@ def test_authenticate(mocker, client):
 def test_fetch_secret(mocker, client):
     mocker.patch("vaultutils.auth.login_vault")
     mocker.patch(
-        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secret",
-        return_value={"key": "value"},
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secret_detailed",
+        return_value=({"key": "value"}, CacheEntry({"key": "value"}, time.monotonic())),
     )
 
     response = client.post(
@@ -59,3 +63,190 @@ def test_shutdown():
     # The shutdown endpoient can not be tested as it terminates the current process and
     # does not return anything
     pass
+
+
+def test_fetch_secrets(mocker, client):
+    mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secrets_detailed",
+        return_value=({"a": {"key": "value"}}, {"b": "not found"}, []),
+    )
+
+    response = client.post("/fetch-secrets", json={"paths": ["a", "b"]})
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json() == {
+        "secrets": {"a": {"key": "value"}},
+        "errors": {"b": "not found"},
+    }
+
+
+def test_fetch_secrets_requires_paths(client):
+    response = client.post("/fetch-secrets", json={"paths": "a"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_start_server_rejects_threads_without_workers(mocker):
+    mock_run = mocker.patch("vaultutils.server.app.run")
+
+    with pytest.raises(ValueError, match="--threads requires --workers"):
+        start_server(workers=0, threads=8)
+    mock_run.assert_not_called()
+
+
+def test_start_server_with_workers(mocker):
+    run = mocker.patch("gunicorn.app.base.BaseApplication.run", autospec=True)
+    shared_cache = mocker.patch("vaultutils.server._start_shared_cache")
+
+    start_server(workers=4, threads=8)
+
+    run.assert_called_once()
+    shared_cache.assert_called_once()
+    shared_cache.return_value.stop.assert_called_once()
+    gunicorn_app = run.call_args.args[0]
+    assert gunicorn_app.cfg.bind == ["localhost:8001"]
+    assert gunicorn_app.cfg.workers == 4
+    assert gunicorn_app.cfg.threads == 8
+
+
+def test_metrics(mocker, client):
+    mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secret_detailed",
+        return_value=({"key": "value"}, CacheEntry({"key": "value"}, time.monotonic())),
+    )
+    client.post("/fetch-secret", json={"path": "path/to/secret"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert "# TYPE vaultutils_cache_hits_total counter" in body
+    assert 'vaultutils_request_seconds_count{endpoint="vault.fetch_secret"}' in body
+
+
+def test_ready(mocker, client):
+    status = mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.warm_up_status"
+    )
+    status.ready = False
+    status.as_dict.return_value = {"ready": False, "state": "running"}
+
+    assert client.get("/ready").status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+    status.ready = True
+    assert client.get("/ready").status_code == HTTPStatus.OK
+
+
+def test_watch_streams_changes(mocker, client):
+    versions = {"path/to/secret": 1}
+    watcher = SecretWatcher(versions.get)
+    mocker.patch.object(watcher, "_start")
+    mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.watcher", watcher
+    )
+
+    response = client.get("/watch?path=path/to/secret")
+    stream = iter(response.response)
+
+    assert response.mimetype == "text/event-stream"
+    assert next(stream) == b": watching\n\n"
+    watcher.poll()
+    versions["path/to/secret"] = 2
+    assert watcher.poll() == 1
+    assert next(stream) == (
+        b'event: change\ndata: {"path": "path/to/secret", "version": 2, '
+        b'"deleted": false}\n\n'
+    )
+    response.close()
+    assert watcher.watched() == []
+
+
+def test_watch_streams_are_limited(mocker, app):
+    # No preserved request context: the streams outlive their request
+    client = app.test_client()
+    watcher = SecretWatcher(lambda _path: 1)
+    mocker.patch.object(watcher, "_start")
+    mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.watcher", watcher
+    )
+    mocker.patch.object(Config, "VAULT_WATCH_MAX_STREAMS", 1)
+
+    first = client.get("/watch?path=path/to/secret")
+    rejected = client.get("/watch?path=path/to/secret")
+    assert rejected.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert "Retry-After" in rejected.headers
+
+    # Closed before it started: nothing was subscribed, and the slot is free
+    first.close()
+    assert watcher.watched() == []
+    second = client.get("/watch?path=path/to/secret")
+    assert second.status_code == HTTPStatus.OK
+    second.close()
+
+
+def test_fetch_secret_stale(mocker, client):
+    mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secret_detailed",
+        return_value=({"key": "value"}, CacheEntry({}, 0, stale=True)),
+    )
+
+    response = client.post("/fetch-secret", json={"path": "path/to/secret"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json() == {"secret": {"key": "value"}, "stale": True}
+    assert response.headers["Warning"] == '110 - "Response is Stale"'
+
+
+@pytest.mark.parametrize(
+    ("error", "status"),
+    [
+        (KeyError("key"), HTTPStatus.NOT_FOUND),
+        (CircuitOpenError("Vault is unavailable"), HTTPStatus.SERVICE_UNAVAILABLE),
+    ],
+)
+def test_fetch_secret_errors(mocker, client, error, status):
+    mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secret_detailed",
+        side_effect=error,
+    )
+
+    response = client.post("/fetch-secret", json={"path": "path/to/secret"})
+    assert response.status_code == status
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{}, {"path": ""}, {"path": 1}, {"path": "a", "version": "2"}, ["a"]],
+)
+def test_fetch_secret_rejects_malformed_requests(mocker, client, body):
+    fetch = mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secret_detailed"
+    )
+
+    response = client.post("/fetch-secret", json=body)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "error" in response.get_json()
+    assert client.get("/fetch-secret").status_code == HTTPStatus.BAD_REQUEST
+    fetch.assert_not_called()
+
+
+def test_fetch_secret_revalidation(mocker, client):
+    mocker.patch(
+        "vaultutils.controllers.vault_controller.vault_secret_fetcher.fetch_secret_detailed",
+        return_value=(
+            "value",
+            CacheEntry({"key": "value"}, time.monotonic(), version=3),
+        ),
+    )
+
+    response = client.get("/fetch-secret?path=path/to/secret&key=key")
+    assert response.get_json() == {"secret": "value"}
+    etag = response.headers["ETag"]
+    assert etag.startswith('"v3-')
+    assert response.cache_control.private
+    assert 0 < response.cache_control.max_age <= 240
+
+    response = client.get(
+        "/fetch-secret?path=path/to/secret&key=key", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.data == b""
@@ -0,0 +1,71 @@
+import time
+
+import pytest  # type: ignore
+
+from vaultutils.cache import estimate_size
+from vaultutils.config import Config
+from vaultutils.engines import Secret
+from vaultutils.secret_fetcher import VaultSecretFetcher
+from vaultutils.shared_cache import SharedCacheClient, SharedCacheServer, _Store
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    server = SharedCacheServer(str(tmp_path / "cache.sock"), b"secret-key")
+    server.start()
+    yield SharedCacheClient(server.address, server.authkey)
+    server.stop()
+
+
+def test_round_trip(shared_cache):
+    now = time.time()
+    shared_cache.set("a", {"key": "value"}, now, now + 60)
+    shared_cache.set("expired", {"key": "value"}, now - 120, now - 60)
+
+    assert shared_cache.get("a") == ({"key": "value"}, now, now + 60)
+    assert shared_cache.get("expired") is None
+
+    shared_cache.delete("a")
+    assert shared_cache.get("a") is None
+
+
+def test_store_enforces_the_byte_budget(mocker):
+    value = {"key": "v" * 100}
+    mocker.patch.object(
+        Config, "VAULT_CACHE_MAX_BYTES", 2 * estimate_size("a", value) + 10
+    )
+    store = _Store()
+    now = time.time()
+
+    for offset, key in enumerate("abc"):
+        store.set(key, value, now, now + 60 + offset)
+    store.set("huge", {"key": "v" * 1000}, now, now + 60)
+
+    # The entry closest to expiry made room, and the oversized one was skipped
+    assert store.get("a") is None
+    assert store.get("b") is not None
+    assert store.get("c") is not None
+    assert store.get("huge") is None
+
+
+def test_unavailable_server_is_a_miss(tmp_path):
+    client = SharedCacheClient(str(tmp_path / "missing.sock"), b"secret-key")
+    assert client.get("a") is None
+    client.set("a", {}, time.time(), time.time() + 60)
+
+
+def test_fetcher_reads_through_shared_cache(mocker, shared_cache):
+    mocker.patch("vaultutils.secret_fetcher.create_vault_client")
+    mocker.patch("vaultutils.secret_fetcher.login_vault")
+    first, second = VaultSecretFetcher.__wrapped__(), VaultSecretFetcher.__wrapped__()
+    for fetcher in (first, second):
+        fetcher._shared = shared_cache
+    read = mocker.patch.object(
+        first, "_fetch_secret_from_vault", return_value=Secret({"key": "value"})
+    )
+    second_read = mocker.patch.object(second, "_fetch_secret_from_vault")
+
+    assert first.fetch_secret("path/to/secret", "key") == "value"
+    assert second.fetch_secret("path/to/secret", "key") == "value"
+    read.assert_called_once()
+    second_read.assert_not_called()
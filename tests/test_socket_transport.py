@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest  # type: ignore
+
+from vaultutils.cache import CacheEntry
+from vaultutils.client import VaultManagerClient
+from vaultutils.socket_transport import SocketServer, SocketTransport, bind_socket
+
+
+@pytest.fixture
+def server(mocker, tmp_path):
+    listener = bind_socket(str(tmp_path / "vault.sock"))
+    server = SocketServer(listener)
+    server._fetcher = mocker.MagicMock()
+    server.start()
+    yield server
+    listener.close()
+
+
+def test_client_fetches_over_the_socket(server):
+    server.fetcher.fetch_secret_detailed.return_value = ("value", CacheEntry({}, 0))
+    server.fetcher.fetch_secrets_detailed.return_value = ({"a": {"k": "v"}}, {}, [])
+    client = VaultManagerClient(socket_path=server.listener.getsockname())
+
+    assert client.fetch_secret("path/to/secret", "key") == {"secret": "value"}
+    assert client.fetch_secrets(["a"]) == {"secrets": {"a": {"k": "v"}}, "errors": {}}
+    server.fetcher.fetch_secret_detailed.assert_called_once_with(
+        "path/to/secret", "key", None
+    )
+    # Both calls went over one pooled connection
+    assert client.transport._pool.qsize() == 1
+
+
+def test_errors_keep_the_http_status(server):
+    server.fetcher.fetch_secret_detailed.side_effect = KeyError("other")
+    transport = SocketTransport(server.listener.getsockname())
+
+    status, body = transport.call("fetch_secret", path="path/to/secret", key="other")
+
+    assert status == HTTPStatus.NOT_FOUND
+    assert "other" in body["error"]
+    assert transport.call("unknown")[0] == HTTPStatus.NOT_FOUND
+
+
+def test_reconnects_after_the_server_closed_a_connection(server):
+    server.fetcher.fetch_secret_detailed.return_value = ("value", CacheEntry({}, 0))
+    transport = SocketTransport(server.listener.getsockname())
+    transport.call("fetch_secret", path="a")
+
+    transport._pool.queue[0].shutdown(2)
+
+    assert transport.call("fetch_secret", path="a") == (200, {"secret": "value"})
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="Unknown codec"):
+        SocketTransport("/nonexistent.sock", codec="xml")
@@ -0,0 +1,47 @@
+from vaultutils.watcher import SecretWatcher
+
+
+def test_one_check_serves_every_subscriber(mocker):
+    versions = {"a": 1, "b": 1}
+    check = mocker.Mock(side_effect=versions.get)
+    watcher = SecretWatcher(check)
+    mocker.patch.object(watcher, "_start")
+    first, second = watcher.subscribe(["a", "b"]), watcher.subscribe(["a"])
+
+    assert watcher.poll() == 0
+    versions["a"] = 2
+    assert watcher.poll() == 1
+
+    assert check.call_count == 4
+    event = {"path": "a", "version": 2, "deleted": False}
+    assert first.get(timeout=0) == event
+    assert second.get(timeout=0) == event
+    assert first.get(timeout=0) is None
+
+
+def test_unwatched_paths_are_no_longer_checked(mocker):
+    check = mocker.Mock(return_value=1)
+    watcher = SecretWatcher(check)
+    mocker.patch.object(watcher, "_start")
+
+    watcher.unsubscribe(watcher.subscribe(["a"]))
+
+    assert watcher.poll() == 0
+    check.assert_not_called()
+
+
+def test_deleted_secret_is_reported(mocker):
+    versions = {"a": 1}
+    watcher = SecretWatcher(lambda path: versions[path])
+    mocker.patch.object(watcher, "_start")
+    subscription = watcher.subscribe(["a"])
+    watcher.poll()
+
+    del versions["a"]
+    watcher.poll()
+
+    assert subscription.get(timeout=0) == {
+        "path": "a",
+        "version": None,
+        "deleted": True,
+    }